@@ -0,0 +1,126 @@
+"""
+Arc fitting for Rasterlamp - circular arcs instead of many short straight edges in the dxf & svg output
+
+The perimeters and hole edges of the circular ribs are points on circles, the curves of the other ribs
+are smooth - the points of a ring are joined to the longest runs that lie on one circle (or one straight
+line) within the tolerance, the points and the edges between them. Each run becomes one arc, given by its
+bulge (like the dxf LWPOLYLINE): tan(sweep angle / 4), positive counter-clockwise, 0 for a straight edge.
+The tessellated perimeters of Rib_y_0 and Rib_x_[k] (points on the circle) come back as one arc between two
+slots each - the straight lines of the low poly ribs stay straight edges.
+
+Copyright (C) 2019 Thomas Minke - tom@der-pfusch.de
+
+License (similar and successors):
+Attribution-NonCommercial-ShareAlike 3.0 Unported (CC BY-NC-SA 3.0)
+https://creativecommons.org/licenses/by-nc-sa/3.0/
+
+"""
+
+import math
+import numpy as np
+
+min_chord = 1e-9                    # in [mm] - runs with start & end closer than this are not fitted (full circles)
+max_edge_angle = math.radians(15)   # max. angle of a single edge on the arc - sharper turns are corners
+
+
+def Arc_Fit(points, tolerance):
+    # bulge of the arc (or straight line: 0.0) from the first to the last point through all points (k, 2)
+    # within the tolerance - None if there is none
+
+    start, end = points[0], points[-1]
+    chord = end - start
+    length = math.hypot(*chord)
+    if length < min_chord:
+        return None
+
+    # straight line - all points close to the chord and in order along it
+    offsets = points - start
+    distances = (offsets[:, 0] * chord[1] - offsets[:, 1] * chord[0]) / length
+    if np.max(np.abs(distances)) <= tolerance and np.all(np.diff(offsets @ chord) > 0):
+        return 0.0
+
+    # circle through start, middle & end point
+    middle = points[len(points) // 2]
+    a, b = middle - start, end - start
+    determinant = 2 * (a[0] * b[1] - a[1] * b[0])
+    if abs(determinant) < min_chord ** 2:
+        return None
+    center = start + np.array([b[1] * (a @ a) - a[1] * (b @ b), a[0] * (b @ b) - b[0] * (a @ a)]) / determinant
+    radius = math.hypot(*(start - center))
+    if np.max(np.abs(np.hypot(*(points - center).T) - radius)) > tolerance:
+        return None
+
+    # the edges between the points within the tolerance as well - the middle of each edge is its farthest
+    # point from the arc (sagitta): long straight edges with their ends on a circle (low poly) stay edges
+    middles = (points[1:] + points[:-1]) / 2
+    if np.max(np.abs(np.hypot(*(middles - center).T) - radius)) > tolerance:
+        return None
+
+    # all points in one direction around the center (counter-clockwise for a positive determinant), no edge
+    # turning around a corner - three points always lie on a circle
+    direction = 1.0 if determinant > 0 else -1.0
+    angles = np.arctan2(points[:, 1] - center[1], points[:, 0] - center[0])
+    sweep = np.mod(direction * (angles - angles[0]), 2 * math.pi)
+    sweep[0] = 0.0
+    steps = np.diff(sweep)
+    if not np.all(steps > 0) or np.max(steps) > max_edge_angle:
+        return None
+    return direction * math.tan(sweep[-1] / 4)
+
+
+def Fit_Ring(ring, tolerance):
+    # arcs of a closed ring - returns the start points of the arcs (from the first point of the ring on)
+    # and the bulge of each arc to the next start point
+
+    points = np.asarray(list(ring) + list(ring[:1]), dtype=float)
+    count = len(ring)
+    starts, bulges = [], []
+    i = 0
+    while i < count:
+        # longest run from point i: doubled until it fails, then bisected (a single edge always fits)
+        fitted, bulge, failed = i + 1, 0.0, None
+        probe = i + 2
+        while probe <= count:
+            fit = Arc_Fit(points[i:probe + 1], tolerance)
+            if fit is None:
+                failed = probe
+                break
+            fitted, bulge = probe, fit
+            probe = min(i + 2 * (probe - i), count) if probe < count else count + 1
+        while failed is not None and failed - fitted > 1:
+            probe = (fitted + failed) // 2
+            fit = Arc_Fit(points[i:probe + 1], tolerance)
+            if fit is None:
+                failed = probe
+            else:
+                fitted, bulge = probe, fit
+
+        starts.append(tuple(ring[i]))
+        bulges.append(bulge)
+        i = fitted
+
+    return starts, bulges
+
+
+def Arc_Center(start, end, bulge):
+    # center & radius of the arc from start to end - the center is left of the chord for counter-clockwise
+    # arcs below 180°
+    sweep = 4 * math.atan(bulge)
+    (x_a, y_a), (x_b, y_b) = start, end
+    length = math.hypot(x_b - x_a, y_b - y_a)
+    radius = length / (2 * math.sin(abs(sweep) / 2))
+    distance = radius * math.cos(sweep / 2) * (1 if sweep > 0 else -1)
+    return ((x_a + x_b) / 2 - (y_b - y_a) / length * distance,
+            (y_a + y_b) / 2 + (x_b - x_a) / length * distance), radius
+
+
+def Bulge_Points(start, end, bulge, max_angle=math.radians(2)):
+    # points of the arc from start to end (start included, end not) - steps of at most max_angle
+    if not bulge:
+        return [tuple(start)]
+    sweep = 4 * math.atan(bulge)
+    (center_x, center_y), radius = Arc_Center(start, end, bulge)
+    angle_a = math.atan2(start[1] - center_y, start[0] - center_x)
+    steps = max(int(math.ceil(abs(sweep) / max_angle)), 1)
+    return [(center_x + radius * math.cos(angle_a + sweep * step / steps),
+             center_y + radius * math.sin(angle_a + sweep * step / steps)) for step in range(steps)]
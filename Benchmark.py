@@ -0,0 +1,256 @@
+"""
+Benchmark for Rasterlamp - times the single stages of the lamp generation over a grid of lamp
+configurations and writes the results as json, so runs of different commits can be compared
+
+Stages: rib profiles, DrawRib_* (incl. cutouts & holes), Rect_Rib_Cutouts, Rib_Holes_Rectangular,
+scad_render, writing the SCAD-file and the export of the 2D view (native, openscad or a stub, if
+OpenSCAD is not installed). Every configuration is timed 'repeat' times (fastest run counts), the
+peak memory is measured in a separate run with tracemalloc.
+
+python Benchmark.py --output results.json
+python Benchmark.py --output results_new.json --compare results.json
+
+Copyright (C) 2019 Thomas Minke - tom@der-pfusch.de
+
+License (similar and successors):
+Attribution-NonCommercial-ShareAlike 3.0 Unported (CC BY-NC-SA 3.0)
+https://creativecommons.org/licenses/by-nc-sa/3.0/
+
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import tempfile
+import time
+import tracemalloc
+import numpy as np
+from solid import union
+import Native2D
+import Rasterlamp
+import RibModel
+
+# lamp sizes (lamp_width_x, lamp_width_y, lamp_height) x all combinations of the grid
+standard_sizes = [(350, 250, 100), (700, 500, 180)]
+standard_grid = {
+    'number_of_ribs_long_side': [11, 25, 51],
+    'number_of_ribs_short_side': [-1, 21],
+    'smoothness': [50, 100, 200],
+    }
+
+quick_sizes = [(350, 250, 100)]
+quick_grid = {
+    'number_of_ribs_long_side': [11, 25],
+    'number_of_ribs_short_side': [-1],
+    'smoothness': [50, 100],
+    }
+
+stages = ('profiles', 'draw_rib', 'rect_rib_cutouts', 'rib_holes_rectangular', 'scad_render', 'file_write', 'export')
+
+cutout_locations = {'y0': "inner", 'x': "outer", 'ny': "inner"}     # see DrawRib_Circular & DrawRib_NonCircular
+
+
+def Benchmark_Configs(sizes, grid, base_config):
+    # one configuration per lamp size and combination of the grid
+    configs = []
+    for lamp_width_x, lamp_width_y, lamp_height in sizes:
+        for variant in Rasterlamp.Sweep_Grid(grid):
+            configs.append(Rasterlamp.Config_Update(base_config, dict(
+                variant, lamp_width_x=lamp_width_x, lamp_width_y=lamp_width_y, lamp_height=lamp_height)))
+    return configs
+
+
+def Export_Backend(export):
+    # "auto": OpenSCAD if installed, else the stub
+    if export == "auto":
+        return "openscad" if shutil.which("openscad") else "stub"
+    return export
+
+
+def Run_Stages(config, export):
+    # generates the lamp once, stage by stage - returns the time of each stage and the counts
+    # (vertices: vertex budget of the ribs, see Rib_Vertex_Budget - output_vertices: of the native export,
+    #  model_bytes: coordinate arrays of the rib models, scad_bytes: length of the SCAD-text, dxf_bytes: native dxf)
+
+    times = dict.fromkeys(stages, 0.0)
+    counts = {'ribs': 0, 'vertices': 0, 'csg_nodes': 0, 'model_bytes': 0}
+
+    Rasterlamp.Lamp_Calculation.cache_clear()
+    Rasterlamp.Rib_Profiles.cache_clear()
+
+    time_start = time.perf_counter()
+    lamp = Rasterlamp.Lamp_Calculation(config)
+    profiles = Rasterlamp.Rib_Profiles(Rasterlamp.Lamp_Geometry(lamp))
+    times['profiles'] = time.perf_counter() - time_start
+
+    rib_numbers = [('y0', 0)] + [('x', k) for k in range(0, lamp.number_of_ribs_x)]
+    rib_numbers += [('ny', m) for m in range(1, lamp.number_of_ribs_y)]
+
+    scad_codes = []
+    ribs = []
+    for family, rib_number in rib_numbers:
+        profile = Rasterlamp.Rib_Profile(profiles, family, rib_number)
+        lamp_base, direction = Rasterlamp.Rib_Type(lamp, family)
+
+        # cutouts & holes on their own - DrawRib_* below calculates them once more
+        time_start = time.perf_counter()
+        Rasterlamp.Rect_Rib_Cutouts(lamp, profile, cutout_locations[family], lamp_base)
+        times['rect_rib_cutouts'] += time.perf_counter() - time_start
+
+        time_start = time.perf_counter()
+        Rasterlamp.Rib_Holes_Rectangular(lamp, profile, lamp_base)
+        times['rib_holes_rectangular'] += time.perf_counter() - time_start
+
+        time_start = time.perf_counter()
+        if family == 'ny':
+            rib = Rasterlamp.DrawRib_NonCircular(lamp, profile, lamp_base)
+        else:
+            rib = Rasterlamp.DrawRib_Circular(lamp, profile, lamp_base, direction)
+        rib_name = Rasterlamp.Rib_Name(family, rib_number)
+        rib_placed = Rasterlamp.Generate_OpenSCAD_view(lamp, RibModel.Full_Object(rib, RibModel.Module_Call(rib_name)),
+                                                       direction, rib_number)
+        times['draw_rib'] += time.perf_counter() - time_start
+
+        time_start = time.perf_counter()
+        scad_codes.append(RibModel.Rib_SCAD(RibModel.Rib_Module(rib, rib_name), rib_placed))
+        times['scad_render'] += time.perf_counter() - time_start
+
+        counts['ribs'] += 1
+        counts['vertices'] += Rasterlamp.Rib_Vertex_Budget(lamp, family, profile)
+        counts['csg_nodes'] += Rasterlamp.CSG_Nodes(RibModel.Half_Object(rib)) + Rasterlamp.CSG_Nodes(rib_placed)
+        counts['model_bytes'] += rib.Size()
+        ribs.append((rib, direction, rib_number))
+
+    with tempfile.TemporaryDirectory() as tmp_path:
+        file_out_scad = os.path.join(tmp_path, 'benchmark.scad')
+        file_out_dxf = os.path.join(tmp_path, 'benchmark.dxf')
+
+        counts['scad_bytes'] = sum(len(scad_code) for scad_code in scad_codes)
+
+        time_start = time.perf_counter()
+        with open(file_out_scad, "w") as f:
+            f.write("\n".join(scad_codes))
+        times['file_write'] = time.perf_counter() - time_start
+
+        time_start = time.perf_counter()
+        if export == "native":
+            rings = []
+            for rib, direction, rib_number in ribs:
+                placement = Native2D.Object_Placement(Rasterlamp.Generate_OpenSCAD_view(lamp, union(), direction, rib_number))
+                rings += [Native2D.Transform_Points(placement, ring) for ring in RibModel.Rib_Rings(rib)]
+            Native2D.Write_DXF(file_out_dxf, rings, lamp.arc_tolerance)
+            counts['output_vertices'] = sum(len(ring) for ring in rings)
+            counts['dxf_bytes'] = os.path.getsize(file_out_dxf)
+        elif export == "openscad":
+            subprocess.run(["openscad", "-o", file_out_dxf, file_out_scad], check=True,
+                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        times['export'] = time.perf_counter() - time_start
+
+    return times, counts
+
+
+def Benchmark_Config(config, export, repeat):
+    # fastest of 'repeat' runs per stage, the counts and the peak memory of one more run
+
+    times = None
+    for _ in range(repeat):
+        run_times, counts = Run_Stages(config, export)
+        times = run_times if times is None else {stage: min(times[stage], run_times[stage]) for stage in stages}
+
+    tracemalloc.start()
+    try:
+        Run_Stages(config, export)
+        _, peak_memory = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    result = {
+        'config': {field: getattr(config, field) for field in
+                   ('lamp_width_x', 'lamp_width_y', 'lamp_height', 'number_of_ribs_long_side',
+                    'number_of_ribs_short_side', 'smoothness', 'tessellation')},
+        'times': times,
+        'total': sum(times.values()),
+        'peak_memory': peak_memory,
+        }
+    result.update(counts)
+    return result
+
+
+def Benchmark_Meta(export, repeat):
+    # environment of the run - to tell the result files apart
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=os.path.dirname(os.path.abspath(__file__)),
+                                stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, check=True).stdout.decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+
+    return {
+        'commit': commit,
+        'date': time.strftime("%Y-%m-%d %H:%M:%S"),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'export': export,
+        'repeat': repeat,
+        }
+
+
+def Config_Label(config):
+    return "{lamp_width_x}x{lamp_width_y}x{lamp_height} ribs {number_of_ribs_long_side}/{number_of_ribs_short_side} " \
+           "smooth {smoothness}".format(**config)
+
+
+def Compare_Results(results, results_before):
+    # prints the ratio new/before of the total and every stage for the configurations in both runs
+    before = {json.dumps(result['config'], sort_keys=True): result for result in results_before['results']}
+    if results['meta']['export'] != results_before['meta']['export']:
+        print("export stages differ: {0} / {1}".format(results['meta']['export'], results_before['meta']['export']))
+
+    print("{0:<40}{1:>8}".format("new / {0}".format(results_before['meta']['commit']), "total")
+          + "".join("{0:>10}".format(stage[:9]) for stage in stages))
+    for result in results['results']:
+        result_before = before.get(json.dumps(result['config'], sort_keys=True))
+        if result_before is None:
+            continue
+        ratios = [result['total'] / result_before['total']]
+        ratios += [result['times'][stage] / result_before['times'][stage] if result_before['times'][stage] else 1.0
+                   for stage in stages]
+        print("{0:<40}{1:>8.3g}".format(Config_Label(result['config']), ratios[0])
+              + "".join("{0:>10.3g}".format(ratio) for ratio in ratios[1:]))
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Times the stages of the lamp generation over a grid of configurations")
+    parser.add_argument('--output', default='benchmark.json', help="json file for the results")
+    parser.add_argument('--export', choices=("auto", "native", "openscad", "stub"), default="auto",
+                        help="export stage - auto: openscad if installed, else the stub")
+    parser.add_argument('--repeat', type=int, default=3, help="runs per configuration - the fastest counts")
+    parser.add_argument('--quick', action='store_true', help="small grid for a fast check")
+    parser.add_argument('--compare', metavar='FILE', help="results of an earlier run to compare with")
+    args = parser.parse_args()
+
+    export = Export_Backend(args.export)
+    base_config = Rasterlamp.default_config._replace(view="2D_plotting", cache_path=None, parallel_workers=1)
+    if args.quick:
+        configs = Benchmark_Configs(quick_sizes, quick_grid, base_config)
+    else:
+        configs = Benchmark_Configs(standard_sizes, standard_grid, base_config)
+
+    results = {'meta': Benchmark_Meta(export, args.repeat), 'results': []}
+    for number, config in enumerate(configs, 1):
+        result = Benchmark_Config(config, export, args.repeat)
+        results['results'].append(result)
+        print("{0:>3}/{1} {2:<40} {3:8.3f}s {4:>8} vertices {5:>6} nodes {6:8.1f}MB".format(
+            number, len(configs), Config_Label(result['config']), result['total'], result['vertices'],
+            result['csg_nodes'], result['peak_memory'] / 1024 ** 2))
+
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=1)
+
+    if args.compare:
+        with open(args.compare) as f:
+            Compare_Results(results, json.load(f))
@@ -0,0 +1,263 @@
+"""
+Export for Rasterlamp - writes the output files of a lamp while its ribs are generated
+
+Every output format has a writer that gets the ribs one after another (in the order of the lamp) as
+soon as they are generated: SCAD-text, dxf & svg outlines and stl triangles go to the file (or to an
+anonymous temporary file for the part after the header) right away - no format waits for the whole
+lamp in memory. The writers run in threads of their own, fed by short queues: a writer that falls
+behind holds the generation back instead of collecting ribs.
+
+All files are written under a temporary name next to their target and renamed together when every
+writer is done - until then the files of the last run stay as they are, and after an error no half
+written file is left.
+
+Copyright (C) 2019 Thomas Minke - tom@der-pfusch.de
+
+License (similar and successors):
+Attribution-NonCommercial-ShareAlike 3.0 Unported (CC BY-NC-SA 3.0)
+https://creativecommons.org/licenses/by-nc-sa/3.0/
+
+"""
+
+import contextlib
+import os
+import queue
+import shutil
+import struct
+import tempfile
+import threading
+import uuid
+import Native2D
+import Native3D
+import Trace
+
+queue_size = 4      # ribs waiting per writer - the generation waits if a writer falls behind
+
+
+def Temporary_Path(file_out):
+    # hidden file next to file_out with the same ending (OpenSCAD chooses the format by the ending)
+    file_root, file_ending = os.path.splitext(os.path.basename(file_out))
+    return os.path.join(os.path.dirname(file_out), ".{0}.{1}.tmp{2}".format(file_root, uuid.uuid4().hex[:8], file_ending))
+
+
+def Remove(file_path):
+    try:
+        os.remove(file_path)
+    except OSError:
+        pass
+
+
+@contextlib.contextmanager
+def Atomic_Output(file_out):
+    # with Atomic_Output(file_out) as file_tmp: ... - file_tmp is renamed to file_out if the block succeeds
+    file_tmp = Temporary_Path(file_out)
+    try:
+        yield file_tmp
+        os.replace(file_tmp, file_out)
+    finally:
+        Remove(file_tmp)
+
+
+# -------------------------------------------------------------------------------------------------------
+# Writers - one per output file: Start(), Add() for every rib, Finish() - all writing to file_tmp
+
+class Writer:
+
+    def __init__(self, name, file_out):
+        self.name = name            # for the session & the trace - see Rasterlamp.Generate_Lamp
+        self.file_out = file_out
+        self.file_tmp = Temporary_Path(file_out)
+        self.files = []             # files opened by the writer - closed in any case
+
+    def Open(self, *args, **kwargs):
+        f = open(*args, **kwargs)
+        self.files.append(f)
+        return f
+
+    def Close(self):
+        for f in self.files:
+            f.close()
+
+    def Start(self):
+        pass
+
+    def Add(self, rib_name, rib_result):
+        pass
+
+    def Finish(self):
+        # returns the value of the export (kept by the session)
+        return None
+
+
+class SCAD_Writer(Writer):
+    # SCAD-text of the ribs, one rib per line block
+
+    def Start(self):
+        self.f = self.Open(self.file_tmp, "w")
+        self.separator = ""
+
+    def Add(self, rib_name, rib_result):
+        self.f.write(self.separator + rib_result['scad'])
+        self.separator = "\n"
+
+
+class Outline_Writer(Writer):
+    # placed 2D rings of the ribs - the header needs the bounds of all ribs, so the entities go to a
+    # temporary file first and are copied behind the header at the end
+    # Entities() gets (ring, bulges) of each ring - the arcs fitted to the rings, if the rib has them (see Arcs)
+
+    def Start(self):
+        self.body = tempfile.TemporaryFile("w+")
+        self.files.append(self.body)
+        self.bounds = None
+        self.rings = 0
+
+    def Add(self, rib_name, rib_result):
+        rings = rib_result['rings']
+        if rings:
+            bounds = Native2D.Rings_Bounds(rings)
+            if self.bounds is not None:
+                bounds = (min(bounds[0], self.bounds[0]), min(bounds[1], self.bounds[1]),
+                          max(bounds[2], self.bounds[2]), max(bounds[3], self.bounds[3]))
+            self.bounds = bounds
+        self.body.write(self.Entities(rib_result.get('arcs') or [(ring, None) for ring in rings]))
+        self.rings += len(rings)
+
+    def Finish(self):
+        self.body.seek(0)
+        with open(self.file_tmp, "w") as f:
+            f.write(self.Header(self.bounds or Native2D.Rings_Bounds([])))
+            shutil.copyfileobj(self.body, f)
+            f.write(self.Footer())
+
+
+class DXF_Writer(Outline_Writer):
+    # see Native2D.Write_DXF
+
+    def Header(self, bounds):
+        return "\n".join(Native2D.DXF_Header(bounds)) + "\n"
+
+    def Entities(self, arcs):
+        return "".join("\n".join(Native2D.DXF_Ring(ring, bulges)) + "\n" for ring, bulges in arcs)
+
+    def Footer(self):
+        return "\n".join(Native2D.dxf_footer) + "\n"
+
+
+class SVG_Writer(Outline_Writer):
+    # see Native2D.Write_SVG - the rings of all ribs form one path
+
+    def Header(self, bounds):
+        return Native2D.SVG_Header(bounds)
+
+    def Entities(self, arcs):
+        return "".join((" " if self.rings or number else "") + Native2D.SVG_Ring(ring, bulges)
+                       for number, (ring, bulges) in enumerate(arcs))
+
+    def Footer(self):
+        return Native2D.svg_footer
+
+
+class STL_Writer(Writer):
+    # see Native3D.Write_STL - the number of triangles in the header is written at the end
+
+    def Start(self):
+        self.f = self.Open(self.file_tmp, "wb")
+        self.f.write(Native3D.stl_header + struct.pack("<I", 0))
+        self.triangles = 0
+
+    def Add(self, rib_name, rib_result):
+        instances = [(rib_name, matrix, color) for matrix, color in rib_result['instances']]
+        corners, _ = Native3D.Instance_Triangles({rib_name: rib_result['mesh']}, instances)
+        self.f.write(Native3D.STL_Facets(corners).tobytes())
+        self.triangles += len(corners)
+
+    def Finish(self):
+        self.f.seek(len(Native3D.stl_header))
+        self.f.write(struct.pack("<I", self.triangles))
+
+
+class Mesh_Writer(Writer):
+    # glTF & preview picture need all meshes at once - the meshes are shared, not copied per instance
+
+    def __init__(self, name, file_out, write):
+        Writer.__init__(self, name, file_out)
+        self.write = write          # Native3D.Write_GLTF or Native3D.Render_PNG
+        self.meshes = {}
+        self.instances = []
+
+    def Add(self, rib_name, rib_result):
+        self.meshes[rib_name] = rib_result['mesh']
+        self.instances += [(rib_name, matrix, color) for matrix, color in rib_result['instances']]
+
+    def Finish(self):
+        self.write(self.file_tmp, self.meshes, self.instances)
+
+
+# -------------------------------------------------------------------------------------------------------
+# Export stream - runs the writers
+
+class Export_Stream:
+    # stream = Export_Stream(writers); stream.Add(rib_name, rib_result) for every rib; values = stream.Close()
+    # on any error of the generation: stream.Abort()
+
+    def __init__(self, writers):
+        self.writers = writers
+        self.queues = [queue.Queue(queue_size) for _ in writers]
+        self.values = [None] * len(writers)
+        self.errors = [None] * len(writers)
+        self.aborted = False
+        self.threads = [threading.Thread(target=self.Run, args=(number,), daemon=True) for number in range(len(writers))]
+        for thread in self.threads:
+            thread.start()
+
+    def Run(self, number):
+        writer, rib_queue = self.writers[number], self.queues[number]
+        all_ribs = False
+        try:
+            with Trace.Span(writer.name, category="export"):
+                writer.Start()
+                for rib_name, rib_result in iter(rib_queue.get, None):
+                    writer.Add(rib_name, rib_result)
+                all_ribs = True
+                if not self.aborted:
+                    self.values[number] = writer.Finish()
+        except BaseException as error:
+            self.errors[number] = error
+            if not all_ribs:
+                for _ in iter(rib_queue.get, None):     # keep taking the ribs - the generation must not block
+                    pass
+        finally:
+            writer.Close()
+
+    def Add(self, rib_name, rib_result):
+        for rib_queue in self.queues:
+            rib_queue.put((rib_name, rib_result))
+
+    def Join(self):
+        for rib_queue in self.queues:
+            rib_queue.put(None)
+        for thread in self.threads:
+            thread.join()
+
+    def Close(self):
+        # waits for all writers and renames the files - returns {writer name: value}
+        self.Join()
+
+        errors = [error for error in self.errors if error is not None]
+        if errors:
+            self.Discard()
+            raise errors[0]
+
+        for writer in self.writers:
+            os.replace(writer.file_tmp, writer.file_out)
+        return {writer.name: value for writer, value in zip(self.writers, self.values)}
+
+    def Abort(self):
+        self.aborted = True
+        self.Join()
+        self.Discard()
+
+    def Discard(self):
+        for writer in self.writers:
+            Remove(writer.file_tmp)
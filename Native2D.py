@@ -0,0 +1,596 @@
+"""
+Native 2D backend for Rasterlamp - evaluates the 2D SolidPython objects of the ribs in python
+and writes dxf & svg files without calling OpenSCAD
+
+The SolidPython object tree (polygon, square, circle, translate, rotate, mirror, union, difference,
+intersection) is flattened to a boolean expression over shapes (polygons, each with one or more rings). The expression is evaluated in
+vertical slabs between all vertex x-coordinates: inside a slab every edge is a straight line, so the
+boolean operations reduce to interval operations. The resulting trapezoids are stitched back
+together to closed outlines (rings).
+
+Copyright (C) 2019 Thomas Minke - tom@der-pfusch.de
+
+License (similar and successors):
+Attribution-NonCommercial-ShareAlike 3.0 Unported (CC BY-NC-SA 3.0)
+https://creativecommons.org/licenses/by-nc-sa/3.0/
+
+"""
+
+import math
+from collections import defaultdict
+import Arcs
+
+snap_tolerance = 1e-9    # in [mm] - coordinates closer than this are treated as identical
+
+identity = (1.0, 0.0, 0.0, 0.0, 1.0, 0.0)   # 2D affine transform (a, b, c, d, e, f): x' = a*x + b*y + c
+                                            #                                         y' = d*x + e*y + f
+
+
+# -------------------------------------------------------------------------------------------------------
+# SolidPython object tree --> boolean expression over polygons
+
+def Transform_Combine(outer, inner):
+    # transform applying 'inner' first and 'outer' afterwards
+    a1, b1, c1, d1, e1, f1 = outer
+    a2, b2, c2, d2, e2, f2 = inner
+    return (a1 * a2 + b1 * d2, a1 * b2 + b1 * e2, a1 * c2 + b1 * f2 + c1,
+            d1 * a2 + e1 * d2, d1 * b2 + e1 * e2, d1 * c2 + e1 * f2 + f1)
+
+
+def Transform_Points(transform, points):
+    a, b, c, d, e, f = transform
+    return [(a * x + b * y + c, d * x + e * y + f) for x, y in points]
+
+
+def Object_Transform(scad_object):
+    # 2D transform of translate, rotate & mirror objects
+    params = scad_object.params
+
+    if scad_object.name == 'translate':
+        v = params['v']
+        return (1.0, 0.0, v[0], 0.0, 1.0, v[1])
+
+    elif scad_object.name == 'rotate':
+        v = params.get('v')
+        if v is not None and (v[0] or v[1]):
+            raise ValueError("Native2D: rotation around x or y axis is not possible in 2D")
+        angle = math.radians(-params['a'] if v is not None and v[2] < 0 else params['a'])
+        cos_a, sin_a = math.cos(angle), math.sin(angle)
+        return (cos_a, -sin_a, 0.0, sin_a, cos_a, 0.0)
+
+    elif scad_object.name == 'mirror':
+        n_x, n_y = params['v'][0], params['v'][1]
+        length = n_x ** 2 + n_y ** 2
+        return (1 - 2 * n_x * n_x / length, -2 * n_x * n_y / length, 0.0,
+                -2 * n_x * n_y / length, 1 - 2 * n_y * n_y / length, 0.0)
+
+
+def Object_Placement(scad_object):
+    # transform of a chain of translate, rotate & mirror objects down to its innermost object
+    # (e.g. the placement of a view applied to an empty object)
+
+    transform = identity
+    while scad_object.children:
+        if scad_object.name in ('translate', 'rotate', 'mirror'):
+            transform = Transform_Combine(transform, Object_Transform(scad_object))
+        elif scad_object.name not in ('union', 'color') or len(scad_object.children) > 1:
+            raise ValueError("Native2D: '{0}' is not a placement".format(scad_object.name))
+        scad_object = scad_object.children[0]
+
+    return transform
+
+
+def Object_Rings(scad_object):
+    # outline of the primitive objects (polygon, square, circle) as list of rings
+    params = scad_object.params
+
+    if scad_object.name == 'polygon':
+        points = [(point[0], point[1]) for point in params['points']]
+        if params.get('paths'):
+            return [[points[index] for index in path] for path in params['paths']]
+        return [points]
+
+    elif scad_object.name == 'square':
+        size = params['size']
+        width, height = (size, size) if isinstance(size, (int, float)) else (size[0], size[1])
+        x_0, y_0 = (-width / 2, -height / 2) if params.get('center') else (0, 0)
+        return [[(x_0, y_0), (x_0 + width, y_0), (x_0 + width, y_0 + height), (x_0, y_0 + height)]]
+
+    elif scad_object.name == 'circle':
+        radius = params['r'] if params.get('r') is not None else params['d'] / 2
+        segments = params.get('segments') or params.get('$fn')   # SolidPython renames segments on render
+        if not segments or segments < 3:
+            raise ValueError("Native2D: circles need a segment number >= 3")
+        # same vertices as OpenSCAD --> fragments start at 0 degrees
+        return [[(radius * math.cos(2 * math.pi * i / segments), radius * math.sin(2 * math.pi * i / segments))
+                 for i in range(segments)]]
+
+
+def Object_To_Expression(scad_object, shapes, transform=identity):
+    # converts a 2D SolidPython object to a boolean expression - the primitives are stored in 'shapes'
+    # (each shape is a list of rings, filled by the even-odd rule)
+    # expression: ('shape', index) | ('union' / 'difference' / 'intersection', [expressions]) | False (empty)
+
+    name = scad_object.name
+
+    if name in ('polygon', 'square', 'circle'):
+        shapes.append([Transform_Points(transform, ring) for ring in Object_Rings(scad_object)])
+        return ('shape', len(shapes) - 1)
+
+    elif name in ('translate', 'rotate', 'mirror'):
+        transform = Transform_Combine(transform, Object_Transform(scad_object))
+        name = 'union'
+
+    elif name == 'color':
+        name = 'union'
+
+    elif name not in ('union', 'difference', 'intersection'):
+        raise ValueError("Native2D: SCAD object '{0}' is not supported in 2D".format(name))
+
+    children = [Object_To_Expression(child, shapes, transform) for child in scad_object.children]
+
+    # flatten the nesting: union(union(a, b), c) --> union(a, b, c)
+    #                      difference(difference(a, b), c) --> difference(a, b, c)
+    flat_children = []
+    for number, child in enumerate(children):
+        if child and child[0] == name and (name != 'difference' or number == 0):
+            flat_children.extend(child[1])
+        else:
+            flat_children.append(child)
+
+    if not flat_children:
+        return False
+    if len(flat_children) == 1:
+        return flat_children[0]
+    return (name, flat_children)
+
+
+def Expression_Reduce(expression, active):
+    # removes all shapes not in 'active' (they are empty in the current slab)
+    if expression is False:
+        return False
+
+    if expression[0] == 'shape':
+        return expression if expression[1] in active else False
+
+    operation = expression[0]
+    children = [Expression_Reduce(child, active) for child in expression[1]]
+
+    if operation == 'union':
+        children = [child for child in children if child is not False]
+    elif operation == 'difference':
+        if children[0] is False:
+            return False
+        children = children[:1] + [child for child in children[1:] if child is not False]
+    elif operation == 'intersection':
+        if False in children:
+            return False
+
+    if not children:
+        return False
+    if len(children) == 1:
+        return children[0]
+    return (operation, children)
+
+
+def Expression_Inside(expression, inside):
+    # evaluates the expression for the set of shapes the point is inside of
+    if expression is False:
+        return False
+
+    operation = expression[0]
+
+    if operation == 'shape':
+        return expression[1] in inside
+    elif operation == 'union':
+        return any(Expression_Inside(child, inside) for child in expression[1])
+    elif operation == 'difference':
+        return (Expression_Inside(expression[1][0], inside)
+                and not any(Expression_Inside(child, inside) for child in expression[1][1:]))
+    elif operation == 'intersection':
+        return all(Expression_Inside(child, inside) for child in expression[1])
+
+
+# -------------------------------------------------------------------------------------------------------
+# slab evaluation
+
+def Edge_Y(edge, x):
+    # y-coordinate of the (non-vertical) edge at position x - exact at the end points
+    x_0, y_0, x_1, y_1, _ = edge
+    if x == x_0:
+        return y_0
+    if x == x_1:
+        return y_1
+    return y_0 + (y_1 - y_0) * (x - x_0) / (x_1 - x_0)
+
+
+def Slab_Edges(shapes):
+    # all non-vertical edges, ordered left to right, with the index of their shape
+
+    edges = []
+    for shape_index, shape in enumerate(shapes):
+        for ring in shape:
+            for (x_0, y_0), (x_1, y_1) in zip(ring, ring[1:] + ring[:1]):
+                if x_0 < x_1:
+                    edges.append((x_0, y_0, x_1, y_1, shape_index))
+                elif x_1 < x_0:
+                    edges.append((x_1, y_1, x_0, y_0, shape_index))
+    edges.sort(key=lambda edge: edge[0])
+    return edges
+
+
+def Slab_Sweep(edges, x_coords):
+    # yields (x_left, x_right, active edges) for every slab between the sorted x-coordinates
+
+    active = []
+    next_edge = 0
+    for x_left, x_right in zip(x_coords, x_coords[1:]):
+        active = [edge for edge in active if edge[2] > x_left]
+        while next_edge < len(edges) and edges[next_edge][0] <= x_left:
+            if edges[next_edge][2] > x_left:
+                active.append(edges[next_edge])
+            next_edge += 1
+        yield x_left, x_right, active
+
+
+def Edge_Crossings(edges, x_coords):
+    # x-coordinates where edges cross inside a slab - added as slab borders
+
+    crossings = set()
+    for x_left, x_right, active in Slab_Sweep(edges, x_coords):
+        ends = sorted((Edge_Y(edge, x_left), Edge_Y(edge, x_right)) for edge in active)
+        if all(ends[i][1] <= ends[i + 1][1] + snap_tolerance for i in range(len(ends) - 1)):
+            continue
+
+        for i, edge_a in enumerate(active):
+            for edge_b in active[i + 1:]:
+                diff_left = Edge_Y(edge_a, x_left) - Edge_Y(edge_b, x_left)
+                diff_right = Edge_Y(edge_a, x_right) - Edge_Y(edge_b, x_right)
+                if (diff_left > snap_tolerance and diff_right < -snap_tolerance) or \
+                        (diff_left < -snap_tolerance and diff_right > snap_tolerance):
+                    crossings.add(x_left + (x_right - x_left) * diff_left / (diff_left - diff_right))
+
+    return crossings
+
+
+def Slab_Intervals(expression, active, x_left, x_right, reduced_cache):
+    # filled intervals of the slab as (lower edge, upper edge)
+
+    active_shapes = frozenset(edge[4] for edge in active)
+    if active_shapes not in reduced_cache:
+        reduced_cache[active_shapes] = Expression_Reduce(expression, active_shapes)
+    reduced = reduced_cache[active_shapes]
+    if reduced is False:
+        return []
+
+    x_mid = (x_left + x_right) / 2
+    crossing = sorted(((Edge_Y(edge, x_mid), edge) for edge in active), key=lambda item: item[0])
+
+    intervals = []
+    inside = set()
+    filled = False
+    lower_edge = None
+    i = 0
+    while i < len(crossing):
+        # edges crossing the middle of the slab at the same height are toggled together
+        y_group = crossing[i][0]
+        while i < len(crossing) and crossing[i][0] - y_group <= snap_tolerance:
+            inside ^= {crossing[i][1][4]}
+            edge = crossing[i][1]
+            i += 1
+
+        now_filled = Expression_Inside(reduced, inside)
+        if now_filled and not filled:
+            lower_edge = edge
+        elif filled and not now_filled:
+            intervals.append((lower_edge, edge))
+        filled = now_filled
+
+    return intervals
+
+
+def Snap_Map(values):
+    # maps values closer than snap_tolerance to one representative
+    mapping = {}
+    representative = None
+    for value in sorted(values):
+        if representative is None or value - representative > snap_tolerance:
+            representative = value
+        mapping[value] = representative
+    return mapping
+
+
+def Interval_Difference(intervals_a, intervals_b):
+    # parts of the sorted, disjoint intervals_a not covered by intervals_b
+    result = []
+    for low, high in intervals_a:
+        for cut_low, cut_high in intervals_b:
+            if cut_high <= low or cut_low >= high:
+                continue
+            if cut_low > low:
+                result.append((low, cut_low))
+            low = max(low, cut_high)
+            if low >= high:
+                break
+        if low < high:
+            result.append((low, high))
+    return result
+
+
+def Segments_To_Rings(segments):
+    # chains the directed boundary segments to closed rings
+
+    outgoing = defaultdict(list)
+    for start, end in segments:
+        if start != end:
+            outgoing[start].append(end)
+
+    rings = []
+    for ring_start in list(outgoing):
+        while outgoing[ring_start]:
+            ring = [ring_start]
+            point = outgoing[ring_start].pop()
+            while point != ring_start:
+                ring.append(point)
+                point = outgoing[point].pop()
+            rings.append(Ring_Simplify(ring))
+
+    return [ring for ring in rings if len(ring) >= 3]
+
+
+def Ring_Simplify(ring):
+    # removes points on straight lines (slab borders split every straight edge)
+    simplified = list(ring)
+    changed = True
+    while changed and len(simplified) >= 3:
+        changed = False
+        result = []
+        for i, (x, y) in enumerate(simplified):
+            x_prev, y_prev = result[-1] if result else simplified[i - 1]
+            x_next, y_next = simplified[(i + 1) % len(simplified)]
+            cross = (x - x_prev) * (y_next - y) - (y - y_prev) * (x_next - x)
+            scale = math.hypot(x - x_prev, y - y_prev) * math.hypot(x_next - x, y_next - y)
+            if abs(cross) <= snap_tolerance * max(scale, snap_tolerance) and \
+                    (x - x_prev) * (x_next - x) + (y - y_prev) * (y_next - y) >= 0:
+                changed = True
+                continue
+            result.append((x, y))
+        simplified = result
+    return simplified
+
+
+def Evaluate_Slabs(expression, shapes):
+    # evaluates the boolean expression in vertical slabs - returns (x_coords, slabs):
+    # slabs[i] holds the filled trapezoids between x_coords[i] and x_coords[i + 1] as
+    # (low_left, high_left, low_right, high_right) - neighbours share the same (snapped) y-values
+
+    # snap the vertex x-coordinates first (e.g. mirrored points) - avoids slabs of almost no width
+    x_mapping = Snap_Map({x for shape in shapes for ring in shape for x, _ in ring})
+    shapes = [[[(x_mapping[x], y) for x, y in ring] for ring in shape] for shape in shapes]
+
+    edges = Slab_Edges(shapes)
+    x_coords = sorted(set(x_mapping.values()))
+    x_coords = sorted(set(x_coords) | Edge_Crossings(edges, x_coords))
+
+    reduced_cache = {}
+    slabs = []
+    for x_left, x_right, active in Slab_Sweep(edges, x_coords):
+        intervals = Slab_Intervals(expression, active, x_left, x_right, reduced_cache)
+        slabs.append([(Edge_Y(low, x_left), Edge_Y(high, x_left), Edge_Y(low, x_right), Edge_Y(high, x_right))
+                      for low, high in intervals])
+
+    # snap the y-values on every slab border, left and right neighbour have to use the same points
+    for i, x in enumerate(x_coords):
+        values = []
+        if i > 0:
+            values += [y for interval in slabs[i - 1] for y in interval[2:]]
+        if i < len(slabs):
+            values += [y for interval in slabs[i] for y in interval[:2]]
+        mapping = Snap_Map(values)
+        if i > 0:
+            slabs[i - 1] = [interval[:2] + (mapping[interval[2]], mapping[interval[3]]) for interval in slabs[i - 1]]
+        if i < len(slabs):
+            slabs[i] = [(mapping[interval[0]], mapping[interval[1]]) + interval[2:] for interval in slabs[i]]
+
+    return x_coords, slabs
+
+
+def Slabs_To_Segments(x_coords, slabs):
+    # directed boundary segments of the trapezoids - the filled area is on the left side
+
+    segments = []
+    for i, x in enumerate(x_coords):
+        # bottom (left to right) and top (right to left) border of the filled trapezoids
+        if i < len(slabs):
+            x_right = x_coords[i + 1]
+            for low_left, high_left, low_right, high_right in slabs[i]:
+                segments.append(((x, low_left), (x_right, low_right)))
+                segments.append(((x_right, high_right), (x, high_left)))
+
+        # vertical borders - material ends (upwards) or starts (downwards) at x
+        left = [(interval[2], interval[3]) for interval in slabs[i - 1]] if i > 0 else []
+        right = [(interval[0], interval[1]) for interval in slabs[i]] if i < len(slabs) else []
+        for low, high in Interval_Difference(left, right):
+            segments.append(((x, low), (x, high)))
+        for low, high in Interval_Difference(right, left):
+            segments.append(((x, high), (x, low)))
+
+    return segments
+
+
+def Slabs_Mirror_X(x_coords, slabs):
+    # x_coords & slabs (see Evaluate_Slabs) of the area united with its mirror image at x = 0
+    # the area has to lie in x >= 0 - slabs left of x = 0 are dropped
+
+    first = next((i for i, x in enumerate(x_coords) if x >= 0), len(x_coords))
+    x_half, slabs_half = list(x_coords[first:]), list(slabs[first:len(x_coords) - 1])
+    if not slabs_half:
+        return x_coords, slabs
+    if x_half[0] > 0:
+        x_half, slabs_half = [0.0] + x_half, [[]] + slabs_half
+
+    x_mirrored = [-x for x in reversed(x_half[1:])] + x_half
+    slabs_mirrored = [[(low_right, high_right, low_left, high_left) for low_left, high_left, low_right, high_right in slab]
+                      for slab in reversed(slabs_half)]
+    return x_mirrored, slabs_mirrored + slabs_half
+
+
+def Evaluate_Expression(expression, shapes):
+    # evaluates the boolean expression - returns the outline as list of rings
+    # outer rings are counter-clockwise, holes clockwise
+    return Segments_To_Rings(Slabs_To_Segments(*Evaluate_Slabs(expression, shapes)))
+
+
+def Object_To_Rings(scad_object):
+    # outline of a 2D SolidPython object as list of rings (lists of (x, y) points)
+    shapes = []
+    expression = Object_To_Expression(scad_object, shapes)
+    if expression is False:
+        return []
+    return Evaluate_Expression(expression, shapes)
+
+
+# -------------------------------------------------------------------------------------------------------
+# dxf & svg output
+
+def Rings_Bounds(rings):
+    x_coords = [x for ring in rings for x, _ in ring] or [0]
+    y_coords = [y for ring in rings for _, y in ring] or [0]
+    return min(x_coords), min(y_coords), max(x_coords), max(y_coords)
+
+
+def DXF_Header(bounds):
+    # lines of a dxf file up to the entities - same structure as the OpenSCAD dxf export
+    min_x, min_y, max_x, max_y = bounds
+    return ["  0", "SECTION", "  2", "HEADER",
+            "  9", "$ACADVER", "  1", "AC1006",
+            "  9", "$INSBASE", " 10", "0.0", " 20", "0.0", " 30", "0.0",
+            "  9", "$EXTMIN", " 10", repr(min_x), " 20", repr(min_y),
+            "  9", "$EXTMAX", " 10", repr(max_x), " 20", repr(max_y),
+            "  0", "ENDSEC",
+            "  0", "SECTION", "  2", "ENTITIES"]
+
+
+def Ring_Arcs(ring, arc_tolerance=None):
+    # points & bulges of a ring (see Arcs.Fit_Ring) - arc_tolerance None: the points, no bulges
+    if arc_tolerance is None:
+        return ring, None
+    return Arcs.Fit_Ring(ring, arc_tolerance)
+
+
+def Transform_Arcs(transform, arcs):
+    # placed arcs (ring, bulges) - a mirroring transform turns the arcs around (negative bulges)
+    a, b, _, d, e, _ = transform
+    mirrored = a * e - b * d < 0
+    return [(Transform_Points(transform, ring), [-bulge for bulge in bulges] if bulges and mirrored else bulges)
+            for ring, bulges in arcs]
+
+
+def DXF_Ring(ring, bulges=None):
+    # a ring as closed LWPOLYLINE on layer 0 - bulges: arc to the next point (see Arcs)
+    lines = ["  0", "LWPOLYLINE", "  8", "0", " 90", str(len(ring)), " 70", "1"]
+    for number, (x, y) in enumerate(ring):
+        lines += [" 10", repr(x), " 20", repr(y)]
+        if bulges and bulges[number]:
+            lines += [" 42", repr(bulges[number])]
+    return lines
+
+
+dxf_footer = ["  0", "ENDSEC", "  0", "EOF"]
+
+
+def Write_DXF(file_out, rings, arc_tolerance=None):
+    # writes the rings as closed LWPOLYLINEs on layer 0 (same structure as the OpenSCAD dxf export)
+    # arc_tolerance: arcs fitted to the rings are written as bulges (see Arcs)
+    Write_DXF_Arcs(file_out, [Ring_Arcs(ring, arc_tolerance) for ring in rings])
+
+
+def Write_DXF_Arcs(file_out, arcs):
+    # see Write_DXF - arcs: (ring, bulges) of each ring (see Ring_Arcs)
+
+    lines = DXF_Header(Rings_Bounds([ring for ring, _ in arcs]))
+    for ring, bulges in arcs:
+        lines += DXF_Ring(ring, bulges)
+    lines += dxf_footer
+
+    with open(file_out, "w") as f:
+        f.write("\n".join(lines) + "\n")
+
+
+def Read_DXF(dxf_code):
+    # rings of the LWPOLYLINE & LINE entities of a dxf file (e.g. exported by OpenSCAD)
+    # the LINEs are chained to rings at their common end points, bulges of the LWPOLYLINEs become points
+
+    lines = [line.strip() for line in dxf_code.splitlines()]
+    pairs = list(zip(lines[0::2], lines[1::2])) + [("0", "EOF")]
+
+    rings = []
+    segments = []
+    entity = None
+    values = []
+    for code, value in pairs:
+        if code == "0":
+            if entity == "LWPOLYLINE":
+                points, bulges = [], []
+                for code_value, number in values:
+                    if code_value == "10":
+                        points.append([float(number), None])
+                        bulges.append(0.0)
+                    elif code_value == "20":
+                        points[-1][1] = float(number)
+                    elif code_value == "42" and points:
+                        bulges[-1] = float(number)
+                points = [tuple(point) for point in points]
+                rings.append([arc_point for number, point in enumerate(points) for arc_point in
+                              Arcs.Bulge_Points(point, points[(number + 1) % len(points)], bulges[number])])
+            elif entity == "LINE":
+                coords = dict(values)
+                segments.append(((float(coords["10"]), float(coords["20"])),
+                                 (float(coords["11"]), float(coords["21"]))))
+            entity = value
+            values = []
+        else:
+            values.append((code, value))
+
+    return rings + Segments_To_Rings(segments)
+
+
+def SVG_Header(bounds):
+    # svg file up to the path data - y-axis flipped like the OpenSCAD svg export
+    min_x, min_y, max_x, max_y = bounds
+    width = max_x - min_x
+    height = max_y - min_y
+    return ('<?xml version="1.0" standalone="no"?>\n'
+            '<svg width="{0:.6f}mm" height="{1:.6f}mm" viewBox="{2:.6f} {3:.6f} {0:.6f} {1:.6f}" '
+            'xmlns="http://www.w3.org/2000/svg" version="1.1">\n'.format(width, height, min_x, -max_y)
+            + '<title>Rasterlamp</title>\n'
+            + '<path d="')
+
+
+def SVG_Ring(ring, bulges=None):
+    # y-axis flipped: the flip turns the arcs around - counter-clockwise arcs (positive bulge) are clockwise
+    # in svg (sweep flag 0)
+    if not bulges:
+        return "M " + " L ".join("{0:.6f},{1:.6f}".format(x, -y) for x, y in ring) + " z"
+
+    path = ["M {0:.6f},{1:.6f}".format(ring[0][0], -ring[0][1])]
+    for number, bulge in enumerate(bulges):
+        end = ring[(number + 1) % len(ring)]
+        if bulge:
+            _, radius = Arcs.Arc_Center(ring[number], end, bulge)
+            path.append("A {0:.6f},{0:.6f} 0 {1:d} {2:d} {3:.6f},{4:.6f}".format(
+                radius, int(abs(bulge) > 1), int(bulge < 0), end[0], -end[1]))
+        elif number + 1 < len(ring):
+            path.append("L {0:.6f},{1:.6f}".format(end[0], -end[1]))
+    return " ".join(path) + " z"
+
+
+svg_footer = '" stroke="black" fill="lightgray" stroke-width="0.5" fill-rule="evenodd"/>\n</svg>\n'
+
+
+def Write_SVG(file_out, rings, arc_tolerance=None):
+    # writes the rings as one path (evenodd filled) - y-axis flipped like the OpenSCAD svg export
+    # arc_tolerance: arcs fitted to the rings are written as arcs of the path (see Arcs)
+    with open(file_out, "w") as f:
+        f.write(SVG_Header(Rings_Bounds(rings)) + " ".join(SVG_Ring(*Ring_Arcs(ring, arc_tolerance)) for ring in rings)
+                + svg_footer)
@@ -0,0 +1,410 @@
+"""
+Native 3D backend for Rasterlamp - extrudes the 2D rib outlines of the native backend to triangle
+meshes and writes stl & glTF files (and a preview picture) without calling OpenSCAD
+
+Each rib outline is extruded once (unit height) - the 3D view (linear_extrude, rotate, translate,
+mirror, color of Generate_OpenSCAD_view) becomes a list of instances: a 4x4 matrix and a colour per
+placed copy. The stl gets every instance as triangles of its own, the glTF shares one mesh between all
+instances of a rib. The faces of the mesh are the trapezoids of Native2D.Evaluate_Slabs - with all
+corners of the neighbouring slabs on their sides, so the mesh is closed (no T-junctions).
+
+The preview is rendered in software (numpy): the triangles are split into the pixel rows they cover,
+a z-buffer keeps the pixel closest to the viewer, flat shaded.
+
+Copyright (C) 2019 Thomas Minke - tom@der-pfusch.de
+
+License (similar and successors):
+Attribution-NonCommercial-ShareAlike 3.0 Unported (CC BY-NC-SA 3.0)
+https://creativecommons.org/licenses/by-nc-sa/3.0/
+
+"""
+
+import json
+import math
+import struct
+import zlib
+import numpy as np
+import Native2D
+
+default_color = (0.98, 0.84, 0.17)      # colour of objects without color() - like OpenSCAD
+preview_rotation = (60, 0, 20)          # camera rotation [°] around x, y & z - as "--camera=0,-100,100,60,0,20,1200"
+preview_light = (-0.3, 0.4, 1.0)        # light direction in view coordinates (towards the viewer)
+samples_per_chunk = 2 ** 21             # rasterizer: pixels handled at once - bounds the memory
+
+
+# -------------------------------------------------------------------------------------------------------
+# SolidPython object tree --> instances (4x4 matrix & colour)
+
+def Matrix_Translate(v):
+    matrix = np.eye(4)
+    matrix[:len(v), 3] = v
+    return matrix
+
+
+def Matrix_Scale(v):
+    return np.diag(list(v) + [1.0])
+
+
+def Matrix_Rotate(axis, angle):
+    # rotation by 'angle' [°] around 'axis' (right-handed)
+    x, y, z = np.asarray(axis, dtype=float) / np.linalg.norm(axis)
+    a = math.radians(angle)
+    c, s, t = math.cos(a), math.sin(a), 1 - math.cos(a)
+    matrix = np.eye(4)
+    matrix[:3, :3] = [[t * x * x + c, t * x * y - s * z, t * x * z + s * y],
+                      [t * x * y + s * z, t * y * y + c, t * y * z - s * x],
+                      [t * x * z - s * y, t * y * z + s * x, t * z * z + c]]
+    return matrix
+
+
+def Matrix_Mirror(v):
+    n = np.zeros(3)
+    n[:len(v)] = v
+    matrix = np.eye(4)
+    matrix[:3, :3] -= 2 * np.outer(n, n) / np.dot(n, n)
+    return matrix
+
+
+def Object_Matrix(scad_object):
+    # 4x4 matrix of translate, rotate, mirror & linear_extrude objects
+    params = scad_object.params
+
+    if scad_object.name == 'translate':
+        return Matrix_Translate(params['v'])
+
+    elif scad_object.name == 'rotate':
+        if params.get('v') is not None:
+            return Matrix_Rotate(params['v'], params['a'])
+        a = params['a']
+        if isinstance(a, (int, float)):
+            return Matrix_Rotate((0, 0, 1), a)
+        # rotate([x, y, z]): around x first, then y, then z
+        return Matrix_Rotate((0, 0, 1), a[2]) @ Matrix_Rotate((0, 1, 0), a[1]) @ Matrix_Rotate((1, 0, 0), a[0])
+
+    elif scad_object.name == 'mirror':
+        return Matrix_Mirror(params['v'])
+
+    elif scad_object.name == 'linear_extrude':
+        # the meshes are extruded from z=0 to z=1 - see Extrude_Rings
+        height = params['height']
+        matrix = Matrix_Scale((1.0, 1.0, height))
+        if params.get('center'):
+            matrix = Matrix_Translate((0, 0, -height / 2)) @ matrix
+        return matrix
+
+
+def Object_Instances(scad_object, matrix=None, color=default_color):
+    # placed copies of the innermost object(s) of a 3D view (e.g. the view applied to an empty object)
+    # returns a list of (matrix, colour) - union branches into one instance per child
+
+    matrix = np.eye(4) if matrix is None else matrix
+    name = scad_object.name
+
+    if name in ('translate', 'rotate', 'mirror', 'linear_extrude'):
+        matrix = matrix @ Object_Matrix(scad_object)
+    elif name == 'color':
+        color = tuple(scad_object.params['c'][:3])
+    elif name != 'union':
+        raise ValueError("Native3D: '{0}' is not a placement".format(name))
+
+    if not scad_object.children:
+        return [(matrix, color)]
+
+    return [instance for child in scad_object.children for instance in Object_Instances(child, matrix, color)]
+
+
+# -------------------------------------------------------------------------------------------------------
+# Extrusion of the 2D outlines
+
+def Strip_Triangles(left, right):
+    # triangulates the area between two ascending chains of vertex indices on the left & right side of
+    # a trapezoid - (index, y) pairs, counter-clockwise triangles
+    triangles = []
+    i = j = 0
+    while i < len(left) - 1 or j < len(right) - 1:
+        if j < len(right) - 1 and (i == len(left) - 1 or right[j + 1][1] <= left[i + 1][1]):
+            triangles.append((left[i][0], right[j][0], right[j + 1][0]))
+            j += 1
+        else:
+            triangles.append((left[i][0], right[j][0], left[i + 1][0]))
+            i += 1
+    return triangles
+
+
+def Extrude_Rings(rings):
+    # closed prism of the rings (filled by the even-odd rule) from z=0 to z=1
+    # returns (vertices, triangles) as arrays - triangles counter-clockwise seen from outside
+
+    x_coords, slabs = Native2D.Evaluate_Slabs(('shape', 0), [rings])
+
+    vertices = []
+    indices = {}
+
+    def Vertex(x, y, z):
+        key = (x, y, z)
+        if key not in indices:
+            indices[key] = len(vertices)
+            vertices.append(key)
+        return indices[key]
+
+    # all corners on every slab border - the sides of the trapezoids have to contain them
+    corners = [set() for _ in x_coords]
+    for i, slab in enumerate(slabs):
+        for low_left, high_left, low_right, high_right in slab:
+            corners[i].update((low_left, high_left))
+            corners[i + 1].update((low_right, high_right))
+    corners = [sorted(border) for border in corners]
+
+    triangles = []
+    for i, slab in enumerate(slabs):
+        x_left, x_right = x_coords[i], x_coords[i + 1]
+        for low_left, high_left, low_right, high_right in slab:
+            if low_left == high_left and low_right == high_right:
+                continue
+            left = [y for y in corners[i] if low_left <= y <= high_left]
+            right = [y for y in corners[i + 1] if low_right <= y <= high_right]
+            for z in (0.0, 1.0):
+                strip = Strip_Triangles([(Vertex(x_left, y, z), y) for y in left],
+                                        [(Vertex(x_right, y, z), y) for y in right])
+                # bottom face seen from below
+                triangles += strip if z else [(a, c, b) for a, b, c in strip]
+
+    # side walls - the filled area is on the left of each boundary segment, outside on the right
+    for (x_a, y_a), (x_b, y_b) in Native2D.Slabs_To_Segments(x_coords, slabs):
+        a0, b0 = Vertex(x_a, y_a, 0.0), Vertex(x_b, y_b, 0.0)
+        a1, b1 = Vertex(x_a, y_a, 1.0), Vertex(x_b, y_b, 1.0)
+        triangles += [(a0, b0, b1), (a0, b1, a1)]
+
+    return np.array(vertices, dtype=float).reshape(-1, 3), np.array(triangles, dtype=np.int64).reshape(-1, 3)
+
+
+def Transform_Vertices(matrix, vertices):
+    return vertices @ matrix[:3, :3].T + matrix[:3, 3]
+
+
+def Instance_Triangles(meshes, instances):
+    # corners of all triangles of all instances (T, 3, 3) and the colour of each triangle (T, 3)
+    # mirrored instances get their triangles reversed - still counter-clockwise seen from outside
+    # meshes: {name: (vertices, triangles)}, instances: list of (mesh name, matrix, colour)
+
+    corners = []
+    colors = []
+    for name, matrix, color in instances:
+        vertices, triangles = meshes[name]
+        if np.linalg.det(matrix[:3, :3]) < 0:
+            triangles = triangles[:, ::-1]
+        corners.append(Transform_Vertices(matrix, vertices)[triangles])
+        colors.append(np.tile(np.asarray(color, dtype=float), (len(triangles), 1)))
+
+    return np.concatenate(corners), np.concatenate(colors)
+
+
+# -------------------------------------------------------------------------------------------------------
+# stl & glTF
+
+def STL_Facets(corners):
+    # binary stl records of the triangles (T, 3, 3) - normal, corners & attribute
+    normals = np.cross(corners[:, 1] - corners[:, 0], corners[:, 2] - corners[:, 0])
+    lengths = np.linalg.norm(normals, axis=1)
+    normals /= np.where(lengths > 0, lengths, 1.0)[:, None]
+
+    facets = np.zeros(len(corners), dtype=[('normal', '<f4', 3), ('corners', '<f4', (3, 3)), ('attribute', '<u2')])
+    facets['normal'] = normals
+    facets['corners'] = corners
+    return facets
+
+
+stl_header = b"Rasterlamp".ljust(80, b" ")
+
+
+def Write_STL(file_out, meshes, instances):
+    # binary stl - every instance as triangles of its own
+
+    corners, _ = Instance_Triangles(meshes, instances)
+    facets = STL_Facets(corners)
+
+    with open(file_out, "wb") as f:
+        f.write(stl_header)
+        f.write(struct.pack("<I", len(facets)))
+        f.write(facets.tobytes())
+
+
+def Write_GLTF(file_out, meshes, instances):
+    # binary glTF (.glb) - one mesh per rib, one node per instance (matrix & material of its colour)
+    # a root node converts [mm] to [m] and z-up to y-up (glTF convention)
+
+    binary = bytearray()
+    buffer_views = []
+    accessors = []
+
+    def Add_Buffer(data, target):
+        while len(binary) % 4:
+            binary.append(0)
+        buffer_views.append({'buffer': 0, 'byteOffset': len(binary), 'byteLength': data.nbytes, 'target': target})
+        binary.extend(data.tobytes())
+        return len(buffer_views) - 1
+
+    materials = []
+    material_indices = {}
+    gltf_meshes = []
+    mesh_indices = {}
+    nodes = [{'name': "Rasterlamp", 'matrix': [0.001, 0, 0, 0, 0, 0, -0.001, 0, 0, 0.001, 0, 0, 0, 0, 0, 1],
+              'children': []}]
+
+    for name, matrix, color in instances:
+        if color not in material_indices:
+            material_indices[color] = len(materials)
+            materials.append({'pbrMetallicRoughness': {'baseColorFactor': list(color) + [1.0], 'metallicFactor': 0.0,
+                                                       'roughnessFactor': 0.8}})
+
+        # the instances of a mirrored mesh are mirrored by their matrix - glTF reverses the winding itself
+        if name not in mesh_indices:
+            vertices, triangles = meshes[name]
+            vertices = vertices.astype('<f4')
+            accessors.append({'bufferView': Add_Buffer(vertices, 34962), 'componentType': 5126,
+                              'count': len(vertices), 'type': "VEC3",
+                              'min': vertices.min(axis=0).tolist(), 'max': vertices.max(axis=0).tolist()})
+            accessors.append({'bufferView': Add_Buffer(triangles.astype('<u4'), 34963), 'componentType': 5125,
+                              'count': triangles.size, 'type': "SCALAR"})
+            mesh_indices[name] = len(gltf_meshes)
+            gltf_meshes.append({'name': name, 'primitives': [{'attributes': {'POSITION': len(accessors) - 2},
+                                                              'indices': len(accessors) - 1,
+                                                              'material': material_indices[color]}]})
+
+        nodes[0]['children'].append(len(nodes))
+        nodes.append({'name': name, 'mesh': mesh_indices[name], 'matrix': matrix.T.flatten().tolist()})
+
+    while len(binary) % 4:
+        binary.append(0)
+
+    gltf = {'asset': {'version': "2.0", 'generator': "Rasterlamp"}, 'scene': 0, 'scenes': [{'nodes': [0]}],
+            'nodes': nodes, 'meshes': gltf_meshes, 'materials': materials, 'accessors': accessors,
+            'bufferViews': buffer_views, 'buffers': [{'byteLength': len(binary)}]}
+    json_chunk = json.dumps(gltf, separators=(',', ':')).encode()
+    json_chunk += b" " * (-len(json_chunk) % 4)
+
+    with open(file_out, "wb") as f:
+        f.write(struct.pack("<4sII", b"glTF", 2, 12 + 8 + len(json_chunk) + 8 + len(binary)))
+        f.write(struct.pack("<I4s", len(json_chunk), b"JSON"))
+        f.write(json_chunk)
+        f.write(struct.pack("<I4s", len(binary), b"BIN\x00"))
+        f.write(binary)
+
+
+# -------------------------------------------------------------------------------------------------------
+# Preview picture
+
+def Write_PNG(file_out, image):
+    # image: (height, width, 3) array of uint8 - RGB, 8 bit per channel
+
+    def Chunk(tag, data):
+        return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data) & 0xffffffff)
+
+    height, width, _ = image.shape
+    rows = np.concatenate([np.zeros((height, 1), dtype=np.uint8), image.reshape(height, -1)], axis=1)
+
+    with open(file_out, "wb") as f:
+        f.write(b"\x89PNG\r\n\x1a\n")
+        f.write(Chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)))
+        f.write(Chunk(b"IDAT", zlib.compress(rows.tobytes(), 6)))
+        f.write(Chunk(b"IEND", b""))
+
+
+def Splat(depth_buffer, image, pixels, depths, colors):
+    # keeps the sample closest to the viewer per pixel - within the samples and against the buffer
+    order = np.lexsort((-depths, pixels))
+    pixels, depths, colors = pixels[order], depths[order], colors[order]
+    first = np.ones(len(pixels), dtype=bool)
+    first[1:] = pixels[1:] != pixels[:-1]
+    pixels, depths, colors = pixels[first], depths[first], colors[first]
+
+    closer = depths > depth_buffer[pixels]
+    depth_buffer[pixels[closer]] = depths[closer]
+    image[pixels[closer]] = colors[closer]
+
+
+def Triangle_Spans(pixels_x, pixels_y, width, height):
+    # pixel rows covered by the triangles - returns (triangle, row, first column, last column) per span
+    # a pixel is covered if its centre is inside the triangle
+
+    row_first = np.maximum(np.ceil(pixels_y.min(axis=1) - 0.5), 0).astype(int)
+    row_last = np.minimum(np.floor(pixels_y.max(axis=1) - 0.5), height - 1).astype(int)
+    counts = np.maximum(row_last - row_first + 1, 0)
+
+    triangle = np.repeat(np.arange(len(counts)), counts)
+    row = row_first[triangle] + np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    y_center = row + 0.5
+
+    # crossings of the row centre with the three edges
+    left = np.full(len(row), np.inf)
+    right = np.full(len(row), -np.inf)
+    for a, b in ((0, 1), (1, 2), (2, 0)):
+        x_a, y_a = pixels_x[triangle, a], pixels_y[triangle, a]
+        x_b, y_b = pixels_x[triangle, b], pixels_y[triangle, b]
+        crossing = (np.minimum(y_a, y_b) <= y_center) & (y_center <= np.maximum(y_a, y_b)) & (y_a != y_b)
+        x_cross = x_a + (y_center - y_a) * (x_b - x_a) / np.where(crossing, y_b - y_a, 1.0)
+        left = np.where(crossing, np.minimum(left, x_cross), left)
+        right = np.where(crossing, np.maximum(right, x_cross), right)
+
+    column_first = np.maximum(np.ceil(left - 0.5), 0)
+    column_last = np.minimum(np.floor(right - 0.5), width - 1)
+    covered = column_first <= column_last
+    return (triangle[covered], row[covered], column_first[covered].astype(int),
+            column_last[covered].astype(int))
+
+
+def Render_PNG(file_out, meshes, instances, size=(1600, 1200), rotation=preview_rotation):
+    # preview picture - parallel projection in the camera rotation, zoomed to fit the lamp
+
+    width, height = size
+    view = (Matrix_Rotate((1, 0, 0), -rotation[0]) @ Matrix_Rotate((0, 1, 0), -rotation[1])
+            @ Matrix_Rotate((0, 0, 1), -rotation[2]))
+
+    corners, colors = Instance_Triangles(meshes, [(name, view @ matrix, color) for name, matrix, color in instances])
+
+    # flat shading - both sides of a triangle lit alike
+    light = np.asarray(preview_light) / np.linalg.norm(preview_light)
+    normals = np.cross(corners[:, 1] - corners[:, 0], corners[:, 2] - corners[:, 0])
+    lengths = np.linalg.norm(normals, axis=1)
+    shade = 0.35 + 0.65 * np.abs(normals @ light) / np.where(lengths > 0, lengths, 1.0)
+    colors = np.clip(colors * shade[:, None] * 255, 0, 255).astype(np.uint8)
+
+    # to pixels: 5% margin all around, y-axis downwards - triangles seen edge-on are left out
+    low = corners[:, :, :2].reshape(-1, 2).min(axis=0)
+    high = corners[:, :, :2].reshape(-1, 2).max(axis=0)
+    scale = 0.9 * min(width / max(high[0] - low[0], 1e-9), height / max(high[1] - low[1], 1e-9))
+    visible = normals[:, 2] != 0
+    pixels_x = (corners[visible, :, 0] - (low[0] + high[0]) / 2) * scale + width / 2
+    pixels_y = height / 2 - (corners[visible, :, 1] - (low[1] + high[1]) / 2) * scale
+    depths = corners[visible, :, 2]
+    colors = colors[visible]
+
+    # depth as plane over the pixels: z = z_0 + dz_x * (x - x_0) + dz_y * (y - y_0)
+    plane = np.cross(np.stack([pixels_x[:, 1] - pixels_x[:, 0], pixels_y[:, 1] - pixels_y[:, 0],
+                               depths[:, 1] - depths[:, 0]], axis=1),
+                     np.stack([pixels_x[:, 2] - pixels_x[:, 0], pixels_y[:, 2] - pixels_y[:, 0],
+                               depths[:, 2] - depths[:, 0]], axis=1))
+    dz_x = -plane[:, 0] / plane[:, 2]
+    dz_y = -plane[:, 1] / plane[:, 2]
+
+    depth_buffer = np.full(width * height, -np.inf)
+    image = np.full((width * height, 3), 255, dtype=np.uint8)
+
+    triangle, row, column_first, column_last = Triangle_Spans(pixels_x, pixels_y, width, height)
+    counts = column_last - column_first + 1
+    ends = np.cumsum(counts)
+    start = 0
+    while start < len(counts):
+        # spans of about samples_per_chunk pixels at once
+        stop = max(int(np.searchsorted(ends, ends[start] - counts[start] + samples_per_chunk, side='right')), start + 1)
+        span = slice(start, stop)
+        pixel_triangle = np.repeat(triangle[span], counts[span])
+        pixel_row = np.repeat(row[span], counts[span])
+        pixel_column = np.repeat(column_first[span], counts[span]) + np.arange(counts[span].sum()) \
+            - np.repeat(np.cumsum(counts[span]) - counts[span], counts[span])
+        pixel_depths = (depths[pixel_triangle, 0] + dz_x[pixel_triangle] * (pixel_column + 0.5 - pixels_x[pixel_triangle, 0])
+                        + dz_y[pixel_triangle] * (pixel_row + 0.5 - pixels_y[pixel_triangle, 0]))
+        Splat(depth_buffer, image, pixel_row * width + pixel_column, pixel_depths, colors[pixel_triangle])
+        start = stop
+
+    Write_PNG(file_out, image.reshape(height, width, 3))
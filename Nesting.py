@@ -0,0 +1,197 @@
+"""
+Nesting for Rasterlamp - packs the rib outlines onto material sheets for laser cutting
+
+Every part is described by its lowest and highest point in narrow columns across the sheet width
+(its lower and upper envelope). The parts are placed one after another on the skyline of the parts
+already placed: at the column where the part ends lowest, resting on the skyline with its lower
+envelope - so the arcs of the ribs nest into each other. Parts are tried upright and turned by 180°.
+The optional refinement swaps parts in the order of placement and keeps every swap that helps.
+
+Copyright (C) 2019 Thomas Minke - tom@der-pfusch.de
+
+License (similar and successors):
+Attribution-NonCommercial-ShareAlike 3.0 Unported (CC BY-NC-SA 3.0)
+https://creativecommons.org/licenses/by-nc-sa/3.0/
+
+"""
+
+import math
+import random
+import numpy as np
+import Native2D
+
+column_width = 1.0      # in [mm] - resolution of the envelopes & skylines
+
+
+def Ring_Area(ring):
+    # signed area (shoelace) - positive for counter-clockwise rings
+    points = np.asarray(ring, dtype=float)
+    x_coords, y_coords = points[:, 0], points[:, 1]
+    return 0.5 * float(np.dot(x_coords, np.roll(y_coords, -1)) - np.dot(np.roll(x_coords, -1), y_coords))
+
+
+def Part_Area(rings):
+    # area of a part - outer rings are counter-clockwise, holes clockwise (see Native2D.Evaluate_Expression)
+    return sum(Ring_Area(ring) for ring in rings)
+
+
+def Part_Orientations(rings):
+    # transforms of a part, upright and turned by 180° - both moved to x>=0 & y>=0 touching the axes
+    orientations = []
+    for a in (1.0, -1.0):
+        turned = [Native2D.Transform_Points((a, 0.0, 0.0, 0.0, a, 0.0), ring) for ring in rings]
+        min_x, min_y, _, _ = Native2D.Rings_Bounds(turned)
+        orientations.append((a, 0.0, -min_x, 0.0, a, -min_y))
+    return orientations
+
+
+def Part_Envelope(rings, gap):
+    # lowest and highest point of the part (at x>=0 & y>=0) in each column - grown by half the gap
+    # to all sides, so two envelopes that don't overlap keep the parts at least 'gap' apart
+    # returns (low, high, shift): shift is the number of columns added on the left side
+
+    start = np.concatenate([np.asarray(ring, dtype=float) for ring in rings])
+    end = np.concatenate([np.roll(np.asarray(ring, dtype=float), -1, axis=0) for ring in rings])
+    x_a, y_a, x_b, y_b = start[:, 0], start[:, 1], end[:, 0], end[:, 1]
+
+    left = np.minimum(x_a, x_b)
+    right = np.maximum(x_a, x_b)
+    first = np.floor(left / column_width).astype(int)
+    last = np.floor(right / column_width).astype(int)
+    columns = int(last.max()) + 1
+
+    # one entry per edge and column it crosses - the edge clipped to the column
+    counts = last - first + 1
+    edge = np.repeat(np.arange(len(counts)), counts)
+    column = first[edge] + np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    clip_left = np.maximum(left[edge], column * column_width)
+    clip_right = np.minimum(right[edge], (column + 1) * column_width)
+
+    dx = x_b[edge] - x_a[edge]
+    slope = np.divide(y_b[edge] - y_a[edge], dx, out=np.zeros_like(dx), where=dx != 0)
+    y_left = np.where(dx != 0, y_a[edge] + (clip_left - x_a[edge]) * slope, y_a[edge])
+    y_right = np.where(dx != 0, y_a[edge] + (clip_right - x_a[edge]) * slope, y_b[edge])
+
+    low = np.full(columns, np.inf)
+    high = np.full(columns, -np.inf)
+    np.minimum.at(low, column, np.minimum(y_left, y_right))
+    np.maximum.at(high, column, np.maximum(y_left, y_right))
+
+    # grow by half the gap - vertical directly, horizontal by whole columns
+    shift = math.ceil(gap / 2 / column_width) if gap > 0 else 0
+    low_grown = np.full(columns + 2 * shift, np.inf)
+    high_grown = np.full(columns + 2 * shift, -np.inf)
+    for offset in range(2 * shift + 1):
+        low_grown[offset:offset + columns] = np.minimum(low_grown[offset:offset + columns], low)
+        high_grown[offset:offset + columns] = np.maximum(high_grown[offset:offset + columns], high)
+
+    return low_grown - gap / 2, high_grown + gap / 2, shift
+
+
+def Skyline_Position(skyline, low, high, sheet_height):
+    # best position of an envelope on the skyline - (top, column, y) with the lowest top, None if it doesn't fit
+
+    width = low.size
+    positions = skyline.size - width + 1
+    if positions <= 0:
+        return None
+
+    # lowest y at every column so that the part stays above the skyline (and the sheet bottom)
+    windows = np.lib.stride_tricks.as_strided(skyline, shape=(positions, width), strides=skyline.strides * 2,
+                                              writeable=False)
+    y_coords = np.maximum((windows - low).max(axis=1), -np.min(low))
+
+    tops = y_coords + np.max(high)
+    fits = np.flatnonzero(tops <= sheet_height)
+    if fits.size == 0:
+        return None
+
+    column = int(fits[np.argmin(tops[fits])])
+    return float(tops[column]), column, float(y_coords[column])
+
+
+def Nest_Order(parts, order, sheet_width, sheet_height, margin, gap):
+    # places the parts in the given order on as many sheets as needed (first sheet the part fits on)
+    # parts: list of (orientations, envelopes, area) - see Nest_Parts
+
+    columns = int((sheet_width - 2 * margin) / column_width)
+    inner_height = sheet_height - 2 * margin
+
+    sheets = []
+    for index in order:
+        orientations, envelopes, area = parts[index]
+
+        new_sheet = {'skyline': np.zeros(columns), 'placements': [], 'area': 0.0}
+        for sheet in sheets + [new_sheet]:
+            candidates = []
+            for orientation, (low, high, shift) in zip(orientations, envelopes):
+                position = Skyline_Position(sheet['skyline'], low, high, inner_height)
+                if position is not None:
+                    candidates.append(position + (orientation, low, high, shift))
+            if candidates:
+                break
+
+        if not candidates:
+            raise ValueError("part {0} does not fit on a sheet of {1} x {2}mm".format(index, sheet_width, sheet_height))
+        if sheet is new_sheet:
+            sheets.append(sheet)
+
+        _, column, y, orientation, low, high, shift = min(candidates, key=lambda candidate: candidate[:2])
+        skyline = sheet['skyline']
+        filled = np.isfinite(high)
+        skyline[column:column + high.size][filled] = np.maximum(skyline[column:column + high.size][filled],
+                                                                y + high[filled])
+
+        placement = (1.0, 0.0, margin + (column + shift) * column_width, 0.0, 1.0, margin + y)
+        sheet['placements'].append((index, Native2D.Transform_Combine(placement, orientation)))
+        sheet['area'] += area
+
+    return sheets
+
+
+def Nest_Parts(parts, sheet_width, sheet_height, margin=0.0, gap=0.0, refinement=0):
+    # nests the parts (each a list of rings) onto sheets - returns one dict per sheet:
+    #   placements:  list of (part index, transform) - see Native2D.Transform_Points
+    #   area:        area of the parts on the sheet
+    #   utilization: share of the sheet covered by parts
+    # refinement: number of additional part orders tried - fewest sheets, lowest last sheet wins
+
+    nest_parts = []
+    for rings in parts:
+        orientations = Part_Orientations(rings)
+        envelopes = [Part_Envelope([Native2D.Transform_Points(orientation, ring) for ring in rings], gap)
+                     for orientation in orientations]
+        nest_parts.append((orientations, envelopes, Part_Area(rings)))
+
+    widths = [envelopes[0][0].size for _, envelopes, _ in nest_parts]
+    heights = [float(np.max(envelopes[0][1])) for _, envelopes, _ in nest_parts]
+    areas = [area for _, _, area in nest_parts]
+
+    def Score(sheets):
+        # fewer sheets first, then less height used on the last sheet
+        return len(sheets), float(np.max(sheets[-1]['skyline'])) if sheets else 0.0
+
+    # big parts first - several measures of "big", the best order is the start of the refinement
+    best = None
+    for measure in (widths, areas, heights):
+        order = sorted(range(len(parts)), key=lambda index: -measure[index])
+        sheets = Nest_Order(nest_parts, order, sheet_width, sheet_height, margin, gap)
+        if best is None or Score(sheets) < Score(best[1]):
+            best = (order, sheets)
+
+    # refinement: swap two parts of the best order, keep the swap if the result is better
+    swap = random.Random(0)
+    for _ in range(refinement if len(parts) > 1 else 0):
+        order = list(best[0])
+        i, j = swap.sample(range(len(order)), 2)
+        order[i], order[j] = order[j], order[i]
+        sheets = Nest_Order(nest_parts, order, sheet_width, sheet_height, margin, gap)
+        if Score(sheets) < Score(best[1]):
+            best = (order, sheets)
+
+    sheets = best[1]
+    for sheet in sheets:
+        del sheet['skyline']
+        sheet['utilization'] = sheet['area'] / (sheet_width * sheet_height)
+
+    return sheets
@@ -0,0 +1,94 @@
+"""
+Parallel processing for Rasterlamp - runs the rib generation in a pool of worker processes
+
+Copyright (C) 2019 Thomas Minke - tom@der-pfusch.de
+
+License (similar and successors):
+Attribution-NonCommercial-ShareAlike 3.0 Unported (CC BY-NC-SA 3.0)
+https://creativecommons.org/licenses/by-nc-sa/3.0/
+
+"""
+
+import multiprocessing
+import os
+import queue
+import time
+
+poll_interval = 0.1     # in [s] - how often the time limits of the running jobs are checked
+
+started = None          # worker process: queue for the start of its jobs (see Start_Worker)
+
+
+def Start_Worker(start_queue):
+    # initializer of the worker processes
+    global started
+    started = start_queue
+
+
+def Timed_Job(task):
+    # runs function(job) in a worker process - reports the start of the job first (see Iterate_Parallel)
+    function, number, job = task
+    if started is not None:
+        started.put((number, time.monotonic()))
+    return function(job)
+
+
+def Run_Parallel(function, jobs, workers=0, timeout=None, job_name=None):
+    # runs function(job) for every job in a pool of worker processes - returns the results in order of 'jobs'
+    # workers, timeout, job_name: see Iterate_Parallel
+    return list(Iterate_Parallel(function, jobs, workers, timeout, job_name))
+
+
+def Iterate_Parallel(function, jobs, workers=0, timeout=None, job_name=None):
+    # runs function(job) for every job in a pool of worker processes - yields the results in order of 'jobs'
+    # as soon as they are done (the following jobs keep running meanwhile)
+    # workers: number of worker processes, 0 for one per CPU core
+    # timeout: time limit in [s] for one job, from its start in a worker - if exceeded, or on any error or
+    #          Ctrl-C, the run is cancelled: pending jobs are dropped and running workers are terminated
+    # job_name: function(job) --> name of the job in the TimeoutError (default: "job <number>")
+
+    if not jobs:
+        return
+
+    if workers <= 0:
+        workers = os.cpu_count() or 1
+    workers = min(workers, len(jobs))
+
+    # with a time limit the workers report the start of each job - the running jobs are checked while waiting
+    start_queue = multiprocessing.Queue() if timeout is not None else None
+    start_times = {}
+
+    pool = multiprocessing.Pool(processes=workers, initializer=Start_Worker, initargs=(start_queue,))
+    try:
+        pending = [pool.apply_async(Timed_Job, ((function, number, job),)) for number, job in enumerate(jobs)]
+
+        for async_result in pending:
+            while timeout is not None and not async_result.ready():
+                async_result.wait(poll_interval)
+                while True:
+                    try:
+                        number, start_time = start_queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    start_times[number] = start_time
+
+                now = time.monotonic()
+                for number, start_time in list(start_times.items()):
+                    if pending[number].ready():
+                        del start_times[number]
+                    elif now - start_time > timeout:
+                        name = job_name(jobs[number]) if job_name else "job {0}".format(number)
+                        raise TimeoutError("{0} exceeded the time limit of {1}s".format(name, timeout))
+
+            yield async_result.get()
+
+        pool.close()
+
+    except BaseException:
+        pool.terminate()
+        raise
+
+    finally:
+        pool.join()
+        if start_queue is not None:
+            start_queue.close()
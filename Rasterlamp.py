@@ -21,9 +21,29 @@ https://creativecommons.org/licenses/by-nc-sa/3.0/
 
 from solid import *
 from solid.utils import *
+import argparse
+import collections
+import csv
+import functools
+import itertools
+import json
 import math
 import os
 import subprocess
+import sys
+import tempfile
+import time
+import numpy as np
+import Export
+import Native2D
+import Native3D
+import Nesting
+import Parallel
+import RibCache
+import RibModel
+import Toolpath
+import Trace
+import Validate
 
 # -------------------------------------------------------------------------------------------------------
 # adapt values below to define your lamp shade properties
@@ -57,35 +77,115 @@ rib_cutout_residue = 4.0    # in [mm] - remaining material left after cutout - r
 # view = "2D_cutting"     # drawstyle in SCAD 2D_cutting for generating G-Code
 view = "3D_show"        # drawstyle in SCAD 2D_plotting for generating G-Code, 3D_show for show
 
+# set backend for exporting the views (2D: dxf & svg - 3D: png)
+export_backend = "native"       # calculates the geometry in python - no OpenSCAD needed, 3D: stl & glTF (.glb)
+# export_backend = "openscad"   # renders dxf, svg & png with OpenSCAD (needs to be installed)
+preview_png = True              # native 3D: preview picture rendered in python as well
+
+# pre-merge the cutouts of each half-rib in python - OpenSCAD gets a single polygon to subtract
+premerge_cutouts = False
+
+# parallel generation - each rib is generated (and rendered) in its own job
+parallel_workers = 1    # number of worker processes: 1 --> no parallel processing, 0 --> one per CPU core
+job_timeout = 600       # in [s] - time limit for generating & rendering a single rib, None --> no limit
+
+# cache for the rendered rib geometry - ribs with unchanged inputs are not rendered again
+cache_path = os.path.join(os.path.expanduser('~'), '.cache', 'Rasterlamp')   # None --> no caching
+cache_size = 500        # in [MB] - least recently used entries are removed above this size
+
+# material sheets for laser cutting - view "2D_cutting" nests all ribs onto sheets, one dxf per sheet
+sheet_width = 600       # in [mm] - size of the material sheet / laser bed, None --> no nesting
+sheet_height = 400      # in [mm]
+sheet_margin = 5        # in [mm] - distance of the parts from the sheet edges
+kerf = 0.2              # in [mm] - width of the laser cut - min. gap between two parts
+nesting_refinement = 0  # number of additional part orders tried - better use of material, longer calculation
+
+# toolpath of the sheets - cutting order of the contours, holes before the outer contour of each part (see Toolpath)
+toolpath = "dxf"        # "dxf" --> ordered entities in the sheet dxf, "gcode" --> G-code as well, None --> nesting order
+cut_speed = 20          # in [mm/s] - laser speed while cutting
+travel_speed = 200      # in [mm/s] - speed of the moves between the contours
+pierce_time = 0.5       # in [s] - piercing the material at the start of each contour
+
+# instrumentation - True --> timing of all stages & ribs in <file_name>_trace.json (chrome://tracing)
+trace = False
+
+# pre-flight check of the rib profiles before anything is rendered - see Validate
+preflight_check = "warn"    # "warn" --> print the weak spots, "error" --> stop (sweeps skip the variant), None --> off
+min_web_width = 1.5         # in [mm] - thinnest material left between holes, slots & perimeters - limit of the
+                            #           material: the rib_cutout_residue gets thinner across steep perimeters
+                            #           (default lamp: ~1.2mm at the base of the outer Rib_x ribs - reported)
+min_edge_length = 0.2       # in [mm] - shortest edge of outlines, holes & slots
+
 # adapt values above to define your lamp shade properties
 # -------------------------------------------------------------------------------------------------------
 
 epsilon = 0.02      # very small adder for better cutting in OpenSCAD
 smoothness = 100    # higher number, smoother curves, langer calculation times
 
+# tessellation of the curves (perimeters & hole cutouts)
+tessellation = "fixed"        # number of points by smoothness
+# tessellation = "adaptive"   # number of points by curvature & length of each curve - see Curve_Segment_Density
+# tessellation = "low_poly"   # straight lines between the rib crossing points - see Rib_Low_Poly_Grid
+chord_tolerance = 0.05        # in [mm] - adaptive: max. deviation of the straight segments from the exact curve
+                              #           e.g. half of the Kerf - less is not visible on the cut part
 
-# -------------------------------------------------------------------------------------------------------
-# General calculations
+# dxf & svg output - circular arcs (dxf: LWPOLYLINE bulges) instead of the many short edges of the curves
+arc_tolerance = 0.01          # in [mm] - max. distance of the curve points from the fitted arcs, None --> edges only
 
-# reverse lamp_width_x and lamp_width_y if lamp_width_y > lamp_width_x
-if lamp_width_x < lamp_width_y:
-    print("lamp_width_x < lamp_width_y: change necessary")
-    tmp = lamp_width_x
-    lamp_width_x = lamp_width_y
-    lamp_width_y = tmp
-    print("new values are lamp_width_x={0} & lamp_width_y={1}".format(lamp_width_x, lamp_width_y))
 
-# calculation of lamp outer shell circle radius acc. to Pytagoras - see drawing
-radius_0_y = (((lamp_width_x / 2) ** 2 + lamp_height ** 2) / (2 * lamp_height))     # bigger radius
-radius_0_x = (((lamp_width_y / 2) ** 2 + lamp_height ** 2) / (2 * lamp_height))     # smaller radius
+# -------------------------------------------------------------------------------------------------------
+# Lamp configuration
+
+# all values above as one immutable configuration - the functions below get everything from the lamp
+# they are called with (never from the module values), so one process can generate any number of lamps
+LampConfig = collections.namedtuple('LampConfig', [
+    'file_path', 'file_name',
+    'lamp_width_x', 'lamp_width_y', 'lamp_height', 'arc_height_main_rib',
+    'number_of_ribs_long_side', 'number_of_ribs_short_side', 'dist_rib_edge',
+    'thickness_material', 'tolerance', 'rib_cutout_chamfer', 'rib_cutout_residue',
+    'view', 'export_backend', 'preview_png', 'premerge_cutouts', 'parallel_workers', 'job_timeout',
+    'cache_path', 'cache_size',
+    'sheet_width', 'sheet_height', 'sheet_margin', 'kerf', 'nesting_refinement',
+    'toolpath', 'cut_speed', 'travel_speed', 'pierce_time', 'trace',
+    'preflight_check', 'min_web_width', 'min_edge_length',
+    'epsilon', 'smoothness', 'tessellation', 'chord_tolerance', 'arc_tolerance'])
+
+default_config = LampConfig(
+    file_path=file_path, file_name=file_name,
+    lamp_width_x=lamp_width_x, lamp_width_y=lamp_width_y, lamp_height=lamp_height,
+    arc_height_main_rib=arc_height_main_rib,
+    number_of_ribs_long_side=number_of_ribs_long_side, number_of_ribs_short_side=number_of_ribs_short_side,
+    dist_rib_edge=dist_rib_edge,
+    thickness_material=thickness_material, tolerance=tolerance,
+    rib_cutout_chamfer=rib_cutout_chamfer, rib_cutout_residue=rib_cutout_residue,
+    view=view, export_backend=export_backend, preview_png=preview_png, premerge_cutouts=premerge_cutouts,
+    parallel_workers=parallel_workers, job_timeout=job_timeout,
+    cache_path=cache_path, cache_size=cache_size,
+    sheet_width=sheet_width, sheet_height=sheet_height, sheet_margin=sheet_margin, kerf=kerf,
+    nesting_refinement=nesting_refinement,
+    toolpath=toolpath, cut_speed=cut_speed, travel_speed=travel_speed, pierce_time=pierce_time, trace=trace,
+    preflight_check=preflight_check, min_web_width=min_web_width, min_edge_length=min_edge_length,
+    epsilon=epsilon, smoothness=smoothness, tessellation=tessellation, chord_tolerance=chord_tolerance,
+    arc_tolerance=arc_tolerance)
+
+# configuration incl. the values derived from it - see Lamp_Calculation
+Lamp = collections.namedtuple('Lamp', LampConfig._fields + (
+    'radius_0_x', 'radius_0_y', 'number_of_ribs_x', 'number_of_ribs_y', 'dist_ribs_x', 'dist_ribs_y',
+    'lamp_base_x', 'lamp_base_y'))
+
+# configuration values without influence on the geometry of the ribs
+output_fields = ('file_path', 'file_name', 'view', 'export_backend', 'preview_png', 'premerge_cutouts',
+                 'parallel_workers', 'job_timeout', 'cache_path', 'cache_size',
+                 'sheet_width', 'sheet_height', 'sheet_margin', 'kerf', 'nesting_refinement',
+                 'toolpath', 'cut_speed', 'travel_speed', 'pierce_time', 'trace',
+                 'preflight_check', 'min_web_width', 'min_edge_length', 'arc_tolerance')
+
+# Lamp configuration
+# -------------------------------------------------------------------------------------------------------
 
-# error check - lamp height > radius_x_0
-if lamp_height > radius_0_x:
-    radius_0_x = lamp_height
-    print('Error: lamp height > (small side lamp)/2 ')
-    print("small side lamp width changed to {0}[mm]".format(2*radius_0_x))
 
-# calculation rib numbers & rib distances
+# -------------------------------------------------------------------------------------------------------
+# General calculations
 
 # input error check and divide by 2 due to symmetry
 def Rib_Error_Check(number_ribs):
@@ -99,24 +199,62 @@ def Rib_Error_Check(number_ribs):
     return number_ribs
 
 
-# due to symmetry half number of ribs + Rib_0 & type conv. to int necessary due to division
-number_of_ribs_x = int((Rib_Error_Check(number_of_ribs_long_side) + 1) / 2)
+@functools.lru_cache(maxsize=16)
+def Lamp_Calculation(config):
+    # derives radii, rib numbers & distances and the lamp bases from the configuration
+    # cached for the last configurations (sweeps & the service see many) - returns a Lamp
+
+    lamp_width_x = config.lamp_width_x
+    lamp_width_y = config.lamp_width_y
+    lamp_height = config.lamp_height
+    dist_rib_edge = config.dist_rib_edge
+
+    # reverse lamp_width_x and lamp_width_y if lamp_width_y > lamp_width_x
+    if lamp_width_x < lamp_width_y:
+        print("lamp_width_x < lamp_width_y: change necessary")
+        lamp_width_x, lamp_width_y = lamp_width_y, lamp_width_x
+        print("new values are lamp_width_x={0} & lamp_width_y={1}".format(lamp_width_x, lamp_width_y))
+
+    # calculation of lamp outer shell circle radius acc. to Pytagoras - see drawing
+    radius_0_y = (((lamp_width_x / 2) ** 2 + lamp_height ** 2) / (2 * lamp_height))     # bigger radius
+    radius_0_x = (((lamp_width_y / 2) ** 2 + lamp_height ** 2) / (2 * lamp_height))     # smaller radius
+
+    # error check - lamp height > radius_x_0
+    if lamp_height > radius_0_x:
+        radius_0_x = lamp_height
+        print('Error: lamp height > (small side lamp)/2 ')
+        print("small side lamp width changed to {0}[mm]".format(2*radius_0_x))
 
-# calculate distance between ribs in x
-dist_ribs_x = (lamp_width_x / 2 - dist_rib_edge) / (number_of_ribs_x - 1)
+    # calculation rib numbers & rib distances
 
-# same for y, but option "-1 - automated calculation" included
-if number_of_ribs_short_side != -1:
-    number_of_ribs_y = int((Rib_Error_Check(number_of_ribs_short_side) + 1) / 2)
-    dist_ribs_y = (lamp_width_y / 2 - dist_rib_edge) / (number_of_ribs_y - 1)
-else:
-    number_of_ribs_y = math.ceil((lamp_width_y / 2 - dist_rib_edge) / dist_ribs_x) + 1  # +1 to add rib at y=0
-    dist_ribs_y = (lamp_width_y / 2 - dist_rib_edge) / (number_of_ribs_y - 1)
+    # due to symmetry half number of ribs + Rib_0 & type conv. to int necessary due to division
+    number_of_ribs_x = int((Rib_Error_Check(config.number_of_ribs_long_side) + 1) / 2)
 
+    # calculate distance between ribs in x
+    dist_ribs_x = (lamp_width_x / 2 - dist_rib_edge) / (number_of_ribs_x - 1)
 
-# calculation lamp_base - baseline, where the lamp should finally sit on - different in calculation for x&y
-lamp_base_x = radius_0_x - lamp_height
-lamp_base_y = radius_0_y - lamp_height
+    # same for y, but option "-1 - automated calculation" included
+    if config.number_of_ribs_short_side != -1:
+        number_of_ribs_y = int((Rib_Error_Check(config.number_of_ribs_short_side) + 1) / 2)
+        dist_ribs_y = (lamp_width_y / 2 - dist_rib_edge) / (number_of_ribs_y - 1)
+    else:
+        number_of_ribs_y = math.ceil((lamp_width_y / 2 - dist_rib_edge) / dist_ribs_x) + 1  # +1 to add rib at y=0
+        dist_ribs_y = (lamp_width_y / 2 - dist_rib_edge) / (number_of_ribs_y - 1)
+
+    # calculation lamp_base - baseline, where the lamp should finally sit on - different in calculation for x&y
+    lamp_base_x = radius_0_x - lamp_height
+    lamp_base_y = radius_0_y - lamp_height
+
+    return Lamp(*config._replace(lamp_width_x=lamp_width_x, lamp_width_y=lamp_width_y),
+                radius_0_x=radius_0_x, radius_0_y=radius_0_y,
+                number_of_ribs_x=number_of_ribs_x, number_of_ribs_y=number_of_ribs_y,
+                dist_ribs_x=dist_ribs_x, dist_ribs_y=dist_ribs_y,
+                lamp_base_x=lamp_base_x, lamp_base_y=lamp_base_y)
+
+
+def Lamp_Geometry(lamp):
+    # the lamp without the output values - equal for all variants of a sweep that share their geometry
+    return lamp._replace(**{field: None for field in output_fields})
 
 # General calculations
 # -------------------------------------------------------------------------------------------------------
@@ -140,83 +278,300 @@ def Circle_Coords_Z(x_coord, radius):
         return math.sqrt(radius ** 2 - x_coord ** 2)
 
 
-def Non_Circular_Coords_Z(x_coord, rib_number):
-    radius = radius_0_x - (radius_0_y - Circle_Coords_Z(x_coord, radius_0_y))
-    z_coord = Circle_Coords_Z(rib_number * dist_ribs_y, radius)
+def Non_Circular_Coords_Z(lamp, x_coord, rib_number):
+    radius = lamp.radius_0_x - (lamp.radius_0_y - Circle_Coords_Z(x_coord, lamp.radius_0_y))
+    z_coord = Circle_Coords_Z(rib_number * lamp.dist_ribs_y, radius)
     return z_coord
 
 
-def Rect_Rib_Cutouts(rib_object, number_of_ribs, dist_ribs, cutout_location, lamp_base, shape, rib_radius, rib_number=0):
-    # cuts out the intersecting parts of the ribs
+# Calculate circle coordinates 'z' for an array of 'x' & 'radius' (numpy broadcasting)
+# same result as Circle_Coords_Z --> -1 for points outside of the circle
+def Circle_Coords_Z_Array(x_coords, radius):
+
+    square_diff = np.asarray(radius, dtype=float) ** 2 - np.asarray(x_coords, dtype=float) ** 2
+    return np.where(square_diff < 0, -1.0, np.sqrt(np.abs(square_diff)))
+
+
+def Arc_Segments(lamp, radius):
+    # number of segments of a full circle with the radius - for the arcs of the circular ribs
+    # adaptive: the chord of one segment deviates max. chord_tolerance from the circle, multiple of 4 so
+    # the quarter arc starts and ends on a vertex
+
+    if lamp.tessellation != "adaptive":
+        return lamp.smoothness * 10
+
+    segment_angle = 2 * math.acos(max(-1.0, 1 - lamp.chord_tolerance / radius))
+    return max(8, 4 * math.ceil(2 * math.pi / segment_angle / 4))
+
+
+def Curve_Segment_Density(lamp, x_coords, z_coords, z_min):
+    # segments per [mm] in x needed to follow the curves z_coords (ribs x samples) within chord_tolerance
+    # a chord of length c on a curve with curvature k deviates k*c^2/8 from it --> c = sqrt(8*tolerance/k)
+    # max. of all curves of a family, just where they are above z_min (below everything is cut away)
+
+    slope = np.gradient(z_coords, x_coords, axis=1)
+    arc_length = np.sqrt(1 + slope ** 2)                # length of the curve per [mm] in x
+    curvature = np.abs(np.gradient(slope, x_coords, axis=1)) / arc_length ** 3
+    curvature = np.minimum(curvature, 8 / lamp.chord_tolerance)     # segments not shorter than the tolerance
+
+    density = np.sqrt(curvature / (8 * lamp.chord_tolerance)) * arc_length
+    density = np.where(z_coords >= z_min, density, 0.0)
+    return density.max(axis=0)
+
+
+def Rib_Sample_Grid(lamp, number_of_ribs, dist_ribs, z_function, z_min):
+    # x positions (half rib) where the rib profiles are sampled - one grid for each rib family
+    #   outline:  perimeter of the non-circular ribs
+    #   crossing: rib crossing points (square cutouts)
+    #   holes:    outline of the rib hole cutouts - one row per hole
+    # tessellation "fixed": smoothness+1 outline samples, smoothness/number_of_ribs steps per hole
+    # tessellation "adaptive": samples by curvature & length of the family's curves z_function(x) above z_min
+
+    outline_end = lamp.lamp_width_x / 2
+    crossing = np.arange(number_of_ribs) * dist_ribs
+
+    hole_width = dist_ribs - 2 * lamp.rib_cutout_residue - lamp.thickness_material
+    hole_start = crossing + lamp.thickness_material / 2 + lamp.rib_cutout_residue
+
+    if lamp.tessellation == "adaptive":
+        # dense pilot samples of all curves --> number of segments from x=0 up to each pilot sample
+        pilot = np.linspace(0, outline_end, 2049)
+        pilot_z = z_function(pilot)
+        density = Curve_Segment_Density(lamp, pilot, pilot_z, z_min)
+        segments = np.concatenate(([0.0], np.cumsum((density[1:] + density[:-1]) / 2 * np.diff(pilot))))
+
+        # equal number of segments between the samples, plus the samples where a curve crosses z_min or
+        # leaves its domain - no chord may bridge a cut away part of the curve
+        outline = np.interp(np.linspace(0, segments[-1], max(1, math.ceil(segments[-1])) + 1), segments, pilot)
+        above = pilot_z >= z_min
+        crossing_z_min = np.flatnonzero((above[:, 1:] != above[:, :-1]).any(axis=0))
+        outline = np.unique(np.concatenate(([0.0, outline_end], outline[1:-1],
+                                            pilot[crossing_z_min], pilot[crossing_z_min + 1])))
+
+        # same steps for all holes of the family - enough for the most curved one
+        hole_segments = np.interp(hole_start + hole_width, pilot, segments) - np.interp(hole_start, pilot, segments)
+        smooth_rib_cutout = max(1, math.ceil(hole_segments.max()))
+    else:
+        outline = np.arange(lamp.smoothness + 1) * (outline_end / lamp.smoothness)
+        smooth_rib_cutout = int(lamp.smoothness / number_of_ribs)
+
+    hole_increment = hole_width / smooth_rib_cutout
+    holes = hole_start[:, None] + np.arange(smooth_rib_cutout + 1)[None, :] * hole_increment
+
+    x_coords = np.concatenate((outline, crossing, holes.ravel()))
+    sections = {
+        'outline': slice(0, outline.size),
+        'crossing': slice(outline.size, outline.size + crossing.size),
+        'holes': slice(outline.size + crossing.size, x_coords.size),
+        }
+
+    grid = {
+        'number_of_ribs': number_of_ribs,
+        'dist_ribs': dist_ribs,
+        'hole_increment': hole_increment,
+        'hole_shape': holes.shape,
+        'x': x_coords,
+        'sections': sections,
+        }
+    return grid
+
+
+def Rib_Low_Poly_Grid(lamp, number_of_ribs, dist_ribs, z_function, z_min):
+    # tessellation "low_poly": the perimeters of each rib are straight lines between its crossing points
+    # (above z_min) - the last line runs to the point where the curve reaches z_min (lamp base) and on
+    # below it, so the rib ends where the curved one does and every hole lies on one straight line
+    # returns the grid (see Rib_Sample_Grid - outline x-positions per rib) and the outer z-values
+
+    outline_end = lamp.lamp_width_x / 2
+    crossing = np.arange(number_of_ribs) * dist_ribs
+    crossing_z = z_function(crossing)                   # exact - the square cutouts stay where they are
+
+    # end of every rib: first pilot sample below z_min (the curve ends at z=0, -1 beyond)
+    pilot = np.linspace(0, outline_end, 2049)
+    pilot_z = z_function(pilot)
+    below = pilot_z < z_min
+    found = below.any(axis=1)
+    last = np.where(found, below.argmax(axis=1), pilot.size - 1)
+    z_a = pilot_z[np.arange(last.size), np.maximum(last - 1, 0)]
+    z_b = np.maximum(pilot_z[np.arange(last.size), last], 0.0)
+    share = np.where(found, (z_a - z_min) / np.maximum(z_a - z_b, 1e-12), 1.0)
+    end_x = pilot[np.maximum(last - 1, 0)] + share * (pilot[last] - pilot[np.maximum(last - 1, 0)])
+    end_z = np.where(found, z_min, pilot_z[:, -1])
+
+    # same holes as the curved ribs - two samples each (straight top & bottom)
+    hole_width = dist_ribs - 2 * lamp.rib_cutout_residue - lamp.thickness_material
+    hole_start = crossing + lamp.thickness_material / 2 + lamp.rib_cutout_residue
+    holes = np.stack((hole_start, hole_start + hole_width), axis=1)
+
+    far_x = outline_end + dist_ribs             # beyond all samples - the last line goes on to here
+    x_coords = []
+    outer = []
+    for rib in range(crossing_z.shape[0]):
+        corner = (crossing_z[rib] > z_min) & (crossing < end_x[rib])
+        corner_x = np.append(crossing[corner], end_x[rib])
+        corner_z = np.append(crossing_z[rib][corner], end_z[rib])
+        if corner_x.size > 1:
+            slope = (corner_z[-1] - corner_z[-2]) / max(corner_x[-1] - corner_x[-2], 1e-12)
+        else:
+            slope = 0.0
+        corner_x = np.append(corner_x, far_x)
+        corner_z = np.append(corner_z, corner_z[-1] + slope * (far_x - corner_x[-2]))
+
+        outline = np.sort(np.append(crossing, end_x[rib]))
+        rib_x = np.concatenate((outline, crossing, holes.ravel()))
+        rib_z = np.interp(rib_x, corner_x, corner_z)
+        rib_z[outline.size:outline.size + crossing.size] = crossing_z[rib]
+        x_coords.append(rib_x)
+        outer.append(rib_z)
+
+    outline_size = number_of_ribs + 1
+    sections = {
+        'outline': slice(0, outline_size),
+        'crossing': slice(outline_size, outline_size + number_of_ribs),
+        'holes': slice(outline_size + number_of_ribs, outline_size + number_of_ribs + holes.size),
+        }
+
+    grid = {
+        'number_of_ribs': number_of_ribs,
+        'dist_ribs': dist_ribs,
+        'hole_increment': hole_width,
+        'hole_shape': holes.shape,
+        'x': np.array(x_coords),
+        'sections': sections,
+        }
+    return grid, np.array(outer)
+
+
+@functools.lru_cache(maxsize=16)
+def Rib_Profiles(lamp):
+    # calculates the outer and inner perimeter of all ribs in one go - cached for the last lamps
+    # returns one entry per rib family, each with a (ribs x samples) array of outer and inner z-values:
+    #   'y0': circular rib Rib_y_0
+    #   'x':  circular ribs Rib_x_[n]
+    #   'ny': non-circular ribs Rib_y_[m] (row m - row 0 is not used as a rib, Rib_y_0 is circular)
+
+    profiles = {}
+
+    # circular ribs - radius of Rib_x_[n] follows the outer shell of Rib_y_0
+    radius_y0 = np.array([lamp.radius_0_y])
+    radius_x = lamp.radius_0_x - (lamp.radius_0_y - Circle_Coords_Z_Array(np.arange(lamp.number_of_ribs_x) * lamp.dist_ribs_x, lamp.radius_0_y))
+
+    # non-circular ribs - see Non_Circular_Coords_Z
+    def Non_Circular_Z(x_coords):
+        radius_ny = lamp.radius_0_x - (lamp.radius_0_y - Circle_Coords_Z_Array(x_coords, lamp.radius_0_y))
+        return Circle_Coords_Z_Array((np.arange(lamp.number_of_ribs_y) * lamp.dist_ribs_y)[:, None], radius_ny[None, :])
+
+    # Rib_y_0 and Rib_y_[m] are crossed by the Rib_x_[n], Rib_x_[n] are crossed by the Rib_y_[m]
+    families = (
+        ('y0', lamp.number_of_ribs_x, lamp.dist_ribs_x, lamp.lamp_base_y, radius_y0,
+         lambda x_coords: Circle_Coords_Z_Array(x_coords[None, :], radius_y0[:, None])),
+        ('x', lamp.number_of_ribs_y, lamp.dist_ribs_y, lamp.lamp_base_x, radius_x,
+         lambda x_coords: Circle_Coords_Z_Array(x_coords[None, :], radius_x[:, None])),
+        ('ny', lamp.number_of_ribs_x, lamp.dist_ribs_x, lamp.lamp_base_x, None, Non_Circular_Z),
+        )
+
+    for family, number_of_ribs, dist_ribs, lamp_base, radius, z_function in families:
+        if lamp.tessellation == "low_poly":
+            grid, outer = Rib_Low_Poly_Grid(lamp, number_of_ribs, dist_ribs, z_function, lamp_base)
+        else:
+            grid = Rib_Sample_Grid(lamp, number_of_ribs, dist_ribs, z_function, lamp_base)
+            outer = z_function(grid['x'])
+        profiles[family] = dict(grid, radius=radius, outer=outer, inner=outer - lamp.arc_height_main_rib)
+
+    return profiles
+
+
+def Rib_Profile(profiles, family, rib_number):
+    # slice of a single rib out of Rib_Profiles - sections as (x, outer, inner) lists of floats
+
+    family_profile = profiles[family]
+    outer = family_profile['outer'][rib_number]
+    inner = family_profile['inner'][rib_number]
+    x_coords = family_profile['x']
+    if x_coords.ndim == 2:      # low poly: x-positions per rib
+        x_coords = x_coords[rib_number]
+
+    profile = {
+        'number_of_ribs': family_profile['number_of_ribs'],
+        'dist_ribs': family_profile['dist_ribs'],
+        'hole_increment': family_profile['hole_increment'],
+        }
+    if family_profile['radius'] is not None:
+        profile['radius'] = float(family_profile['radius'][rib_number])
+
+    for section, index in family_profile['sections'].items():
+        values = [x_coords[index], outer[index], inner[index]]
+        if section == 'holes':
+            values = [value.reshape(family_profile['hole_shape']) for value in values]
+        profile[section] = tuple(value.tolist() for value in values)
+
+    return profile
 
-    for k in range(0, number_of_ribs):
 
-        if shape == 'circular':
-            z_coord = Circle_Coords_Z(k*dist_ribs, rib_radius)  # on circle from which rectangle is cut out
+def Rect_Rib_Cutouts(lamp, profile, cutout_location, lamp_base):
+    # cutouts for the intersecting parts of the ribs - returns the list of rectangles [x_min, y_min, x_max, y_max]
 
-        elif shape == 'non_circular':
-            z_coord = Non_Circular_Coords_Z(k * dist_ribs, rib_number)
+    cutouts = []
+    cutout_width = lamp.thickness_material + 2 * lamp.tolerance
+    crossing_x, crossing_z, _ = profile['crossing']
+
+    for k in range(0, profile['number_of_ribs']):
+
+        z_coord = crossing_z[k]                             # on circle from which rectangle is cut out
 
         if z_coord != -1:                                   # compliance - circle coordinate was calculated correctly
 
-            if z_coord - arc_height_main_rib < lamp_base:   # check if coord approaching lamp_base - room for cutout
+            if z_coord - lamp.arc_height_main_rib < lamp_base:   # check if coord approaching lamp_base - room for cutout
                 cutout_height = z_coord - lamp_base         # if yes - limit cutout height
             else:
-                cutout_height = arc_height_main_rib
+                cutout_height = lamp.arc_height_main_rib
 
             if cutout_location == "inner":                  # long ribs are cut on the inner perimeter
                                                             # short ones on the outer perimeter
-                if z_coord - arc_height_main_rib > lamp_base:
-                    z_coord -= arc_height_main_rib          # in circular area inner perimeter
+                if z_coord - lamp.arc_height_main_rib > lamp_base:
+                    z_coord -= lamp.arc_height_main_rib          # in circular area inner perimeter
                 else:
                     z_coord = lamp_base                     # in flat area cut on flats
 
-            cutout_square = translate([k*dist_ribs, z_coord]) (
-                square(size=[thickness_material+2*tolerance, cutout_height], center=True)
-                )
+            cutouts.append([crossing_x[k] - cutout_width / 2, z_coord - cutout_height / 2,
+                            crossing_x[k] + cutout_width / 2, z_coord + cutout_height / 2])
 
             if cutout_location == "outer":                  # enlarge very tiny cutouts towards the top
-                cutout_square += translate([k*dist_ribs-(thickness_material/2+tolerance), z_coord])(
-                square(size=[thickness_material+2*tolerance, 500], center=False)
-                )
+                cutout_left = crossing_x[k] - (lamp.thickness_material / 2 + lamp.tolerance)
+                cutouts.append([cutout_left, z_coord, cutout_left + cutout_width, z_coord + 500])
 
-            rib_object = rib_object - cutout_square
+    return cutouts
 
-    return rib_object
 
+def Rib_Holes_Rectangular(lamp, profile, lamp_base):
+    # the "holes" in the ribs for aesthetics - returns the list of hole polygons (lists of points)
 
-def Rib_Holes_Rectangular(rib_object, number_of_ribs, dist_ribs, lamp_base, shape, rib_radius, rib_number=0):
-    # cuts out the "holes" in the ribs for aesthetics
-    
-    smooth_rib_cutout = int(smoothness / number_of_ribs)
+    if lamp.tessellation == "low_poly":
+        return Rib_Holes_Low_Poly(lamp, profile, lamp_base)
 
-    increment = (dist_ribs-2*rib_cutout_residue-thickness_material) / smooth_rib_cutout
+    holes = []
 
-    for m in range(0, number_of_ribs):
+    increment = profile['hole_increment']
+    holes_x, holes_outer, holes_inner = profile['holes']
 
-        start_polygon_x = m * dist_ribs + thickness_material / 2 + rib_cutout_residue
-        
-        if shape == 'non_circular':
-            start_polygon_top_y = Non_Circular_Coords_Z(start_polygon_x, rib_number) - rib_cutout_residue
-            start_polygon_bot_y = Non_Circular_Coords_Z(start_polygon_x, rib_number) - arc_height_main_rib + rib_cutout_residue
-        elif shape == 'circular':
-            start_polygon_top_y = Circle_Coords_Z(start_polygon_x, rib_radius) - rib_cutout_residue
-            start_polygon_bot_y = Circle_Coords_Z(start_polygon_x, rib_radius) - arc_height_main_rib + rib_cutout_residue
+    for m in range(0, profile['number_of_ribs']):
 
+        # sampled outline of hole m - top follows the outer, bottom the inner perimeter
+        hole_x = holes_x[m]
+        hole_top = [z_coord - lamp.rib_cutout_residue for z_coord in holes_outer[m]]
+        hole_bot = [z_coord + lamp.rib_cutout_residue for z_coord in holes_inner[m]]
+
+        start_polygon_x = hole_x[0]
+        start_polygon_top_y = hole_top[0]
+        start_polygon_bot_y = hole_bot[0]
 
         polygon_rib_cutout_top = [[start_polygon_x, start_polygon_top_y]]
         polygon_rib_cutout_bot = [[start_polygon_x, start_polygon_bot_y]]
 
-        lamp_cutout_bottom = lamp_base + rib_cutout_residue
+        lamp_cutout_bottom = lamp_base + lamp.rib_cutout_residue
 
         # curved section of top cutout
-        for n in range(0, smooth_rib_cutout + 1):
-            polygon_1_x = start_polygon_x + n * increment
-            
-            if shape == 'non_circular':
-                polygon_1_y = Non_Circular_Coords_Z(polygon_1_x, rib_number) - rib_cutout_residue
-            elif shape == 'circular':
-                polygon_1_y = Circle_Coords_Z(polygon_1_x, rib_radius) - rib_cutout_residue
+        for polygon_1_x, polygon_1_y in zip(hole_x, hole_top):
 
             # case 1: triangular cutout at rib end (complete polygon)
             if (polygon_1_y < lamp_cutout_bottom) and (start_polygon_bot_y < lamp_cutout_bottom):
@@ -236,13 +591,7 @@ def Rib_Holes_Rectangular(rib_object, number_of_ribs, dist_ribs, lamp_base, shap
         last_x_top, last_y_top = polygon_rib_cutout_top[-1]
 
         # curved section of bottom cutout
-        for p in range(0, smooth_rib_cutout + 1):
-            polygon_2_x = start_polygon_x + p * increment
-            
-            if shape == 'non_circular':
-                polygon_2_y = Non_Circular_Coords_Z(polygon_2_x, rib_number) - arc_height_main_rib + rib_cutout_residue
-            elif shape == 'circular':
-                polygon_2_y = Circle_Coords_Z(polygon_2_x, rib_radius) - arc_height_main_rib + rib_cutout_residue
+        for polygon_2_x, polygon_2_y in zip(hole_x, hole_bot):
 
             # case 1
             if (start_polygon_bot_y < lamp_cutout_bottom) and (last_y_top <= lamp_cutout_bottom):
@@ -269,140 +618,154 @@ def Rib_Holes_Rectangular(rib_object, number_of_ribs, dist_ribs, lamp_base, shap
 
         polygon_rib_cutout = polygon_rib_cutout_top + polygon_rib_cutout_bot[::-1]
 
-        rib_object = difference()(
-            rib_object,
-            polygon(polygon_rib_cutout)
-        )
+        holes.append(polygon_rib_cutout)
 
-    return rib_object
+    return holes
 
 
-def DrawRib_Circular(rib_radius, lamp_base, move_direction):
-    # generates circular ribs (just the half of it) (rib_y[0] and ribs_x[n])
+def Clip_Polygon_Z(points, z_min):
+    # part of the convex polygon above z_min (Sutherland-Hodgman for a single line)
+    clipped = []
+    for (x_a, z_a), (x_b, z_b) in zip(points, points[1:] + points[:1]):
+        if z_a >= z_min:
+            clipped.append([x_a, z_a])
+        if (z_a >= z_min) != (z_b >= z_min):
+            share = (z_min - z_a) / (z_b - z_a)
+            clipped.append([x_a + share * (x_b - x_a), z_min])
+    return clipped
 
-    # create the half-rib
-    rib_object = difference()(
 
-        # create an arc - this is the upper lamp shape
-        arc(rad=rib_radius, start_degrees=0, end_degrees=90, segments=smoothness*10),
+def Rib_Holes_Low_Poly(lamp, profile, lamp_base):
+    # holes of the low poly ribs - top & bottom are straight lines (two samples each, see Rib_Low_Poly_Grid),
+    # so each hole is the quadrilateral between them, cut off at the residue above the lamp base
 
-        # cut away the same arc, just shifted to -arc_height_main_rib in y
-        translate([0, -arc_height_main_rib])(
-            arc(rad=rib_radius, start_degrees=0, end_degrees=90, segments=smoothness*10)
-        ),
+    holes = []
+    holes_x, holes_outer, holes_inner = profile['holes']
+    lamp_cutout_bottom = lamp_base + lamp.rib_cutout_residue
 
-        # cut away anything that is below the lamp base (radius_0-lamp_height)
-        translate([-epsilon, -radius_0_y])(
-            square(size=[radius_0_y + 2 * epsilon, lamp_base + radius_0_y], center=False)
-        )
-    )
+    for hole_x, hole_outer, hole_inner in zip(holes_x, holes_outer, holes_inner):
+        hole = [[hole_x[0], hole_inner[0] + lamp.rib_cutout_residue], [hole_x[1], hole_inner[1] + lamp.rib_cutout_residue],
+                [hole_x[1], hole_outer[1] - lamp.rib_cutout_residue], [hole_x[0], hole_outer[0] - lamp.rib_cutout_residue]]
+        hole = Clip_Polygon_Z(hole, lamp_cutout_bottom)
+        if len(hole) >= 3:
+            holes.append(hole)
+
+    return holes
+
+
+def DrawRib_Circular(lamp, profile, lamp_base, move_direction):
+    # generates circular ribs (just the half of it) (rib_y[0] and ribs_x[n]) - returns the rib model
+    # profile: slice of Rib_Profiles for this rib - see Rib_Profile
+
+    rib_radius = profile['radius']
+
+    if lamp.tessellation == "low_poly":
+        # straight lines between the crossing points instead of the arcs
+        polygon_coords_outer, polygon_coords_inner = Outline_Polygons(lamp, profile)
+        perimeters = {'outer': polygon_coords_outer, 'inner': polygon_coords_inner}
+    else:
+        # the arc (upper lamp shape) minus the same arc, just shifted to -arc_height_main_rib in y
+        perimeters = {'radius': rib_radius, 'segments': Arc_Segments(lamp, rib_radius),
+                      'arc_height': lamp.arc_height_main_rib}
+
+    # cut away anything that is below the lamp base (radius_0-lamp_height)
+    cutouts = [[-lamp.epsilon, -lamp.radius_0_y, lamp.radius_0_y + lamp.epsilon, lamp_base]]
+    holes = []
 
     # square cutouts rib intersection (for putting ribs together)
+    # number and distance of the crossing ribs are part of the profile
     if move_direction == "y":       # calculation of rib_y_0
-        number_of_ribs = number_of_ribs_x
-        dist_ribs = dist_ribs_x
         cutout_location = "inner"
     elif move_direction == "x":     # calculation of rib_x_[n]
-        number_of_ribs = number_of_ribs_y
-        dist_ribs = dist_ribs_y
         cutout_location = "outer"
     else:
         print("error - rib cutout calc in Draw_Rib_circular - move_direction not 'x' or 'y'")
-        return rib_object
+        cutout_location = None
 
-    rib_object = Rect_Rib_Cutouts(rib_object, number_of_ribs, dist_ribs, cutout_location, lamp_base, 'circular', rib_radius)
- 
-    # Rib Hole Rectangular cutouts circular ribs
-    rib_object = Rib_Holes_Rectangular(rib_object, number_of_ribs, dist_ribs, lamp_base, 'circular', rib_radius)
-
-    # mirror the half-rib to create full one
-    rib_object = rib_object + mirror([1, 0, 0])(rib_object)
-
-    return rib_object
+    if cutout_location:
+        with Trace.Span("cutouts"):
+            cutouts += Rect_Rib_Cutouts(lamp, profile, cutout_location, lamp_base)
 
+        # Rib Hole Rectangular cutouts circular ribs
+        with Trace.Span("holes"):
+            holes = Rib_Holes_Rectangular(lamp, profile, lamp_base)
 
-def DrawRib_NonCircular(rib_number, lamp_base):
-    # generates non-circular ribs (just the half of it) in y-direction
+    # the half-rib - mirrored to the full one on export (not without cutouts, see above)
+    return RibModel.Rib(cutouts, holes, mirror_x=bool(cutout_location), **perimeters)
 
-    increment = lamp_width_x / (2 * smoothness)
 
-    polygon_coords_outer = [[0, -2 * epsilon]]
-    polygon_coords_inner = [[0, -2 * epsilon]]
-
-    # create 2 polygons (outer and inner)
+def Outline_Polygons(lamp, profile):
+    # create 2 polygons (outer and inner) from the sampled outline of the rib
     # outer for the outer perimeter - Geometry see drawing
     # inner for the inner perimeter
-    for j in range(0, smoothness+1):
+    outline_x, outline_outer, outline_inner = profile['outline']
+    polygon_coords_outer = [[0, -2 * lamp.epsilon]] + [list(point) for point in zip(outline_x, outline_outer)]
+    polygon_coords_inner = [[0, -2 * lamp.epsilon]] + [list(point) for point in zip(outline_x, outline_inner)]
+    return polygon_coords_outer, polygon_coords_inner
+
+
+def DrawRib_NonCircular(lamp, profile, lamp_base):
+    # generates non-circular ribs (just the half of it) in y-direction - returns the rib model
+    # profile: slice of Rib_Profiles for this rib - see Rib_Profile
 
-        z_coord = Non_Circular_Coords_Z(j*increment, rib_number)
-        polygon_coords_outer.append([j * increment, z_coord])
-        polygon_coords_inner.append([j * increment, z_coord-arc_height_main_rib])
+    polygon_coords_outer, polygon_coords_inner = Outline_Polygons(lamp, profile)
 
     # subtract inner from outer polygon, remove base
-    rib_object = difference()(
-        polygon(polygon_coords_outer),
-        polygon(polygon_coords_inner),
-        translate([-epsilon, -lamp_width_x+lamp_base])(
-            square(size=[lamp_width_x+2*epsilon, lamp_width_x], center=False)
-            )
-        )
+    cutouts = [[-lamp.epsilon, lamp_base - lamp.lamp_width_x, lamp.lamp_width_x + lamp.epsilon, lamp_base]]
 
     # Square cutouts rib intersection non circular (for putting ribs together)
-    dist_ribs = dist_ribs_x
     cutout_location = "inner"
-    rib_radius = 0
-    number_of_ribs = number_of_ribs_x
 
-    rib_object = Rect_Rib_Cutouts(rib_object, number_of_ribs, dist_ribs, cutout_location, lamp_base, 'non_circular', rib_radius, rib_number)
+    with Trace.Span("cutouts"):
+        cutouts += Rect_Rib_Cutouts(lamp, profile, cutout_location, lamp_base)
 
     # Rib Hole Rectangular cutouts non circular ribs
-    rib_object = Rib_Holes_Rectangular(rib_object, number_of_ribs, dist_ribs, lamp_base, 'non_circular', rib_radius, rib_number)
-
-    # mirror the half-rib to create full one
-    rib_object = rib_object + mirror([1, 0, 0])(rib_object)
+    with Trace.Span("holes"):
+        holes = Rib_Holes_Rectangular(lamp, profile, lamp_base)
 
-    return rib_object
+    # the half-rib - mirrored to the full one on export
+    return RibModel.Rib(cutouts, holes, outer=polygon_coords_outer, inner=polygon_coords_inner)
 
 
-def Generate_OpenSCAD_view(rib_object, direction, i):
+def Generate_OpenSCAD_view(lamp, rib_object, direction, i):
     # 2D-view
-    if direction == "x" and view == "2D_plotting":
-        rib_object = translate([0, -lamp_base_x - i * lamp_height])(rib_object)
-    elif direction == "y" and view == "2D_plotting":
-        rib_object = translate([lamp_width_x, -lamp_base_y - i * lamp_height])(rib_object)
-    elif direction == "ny" and view == "2D_plotting":
-        rib_object = translate([lamp_width_x, -i * lamp_height])(rib_object)
-
-    if direction == "x" and view == "2D_cutting":
-        rib_object = translate([0, -lamp_base_x -i * arc_height_main_rib + 1/(i+1)*10, 0])(rib_object)
-    elif direction == "y" and view == "2D_cutting":
-        rib_object = translate([lamp_width_x, -lamp_base_y - i * arc_height_main_rib + 1/(i+1)*10, 0])(rib_object)
-    elif direction == "ny" and view == "2D_cutting":
-        rib_object = translate([lamp_width_x, - (i + 3) * arc_height_main_rib + 1/(i+1)*10, 0])(rib_object)
+    if direction == "x" and lamp.view == "2D_plotting":
+        rib_object = translate([0, -lamp.lamp_base_x - i * lamp.lamp_height])(rib_object)
+    elif direction == "y" and lamp.view == "2D_plotting":
+        rib_object = translate([lamp.lamp_width_x, -lamp.lamp_base_y - i * lamp.lamp_height])(rib_object)
+    elif direction == "ny" and lamp.view == "2D_plotting":
+        rib_object = translate([lamp.lamp_width_x, -i * lamp.lamp_height])(rib_object)
+
+    elif direction == "x" and lamp.view == "2D_cutting":
+        rib_object = translate([0, -lamp.lamp_base_x -i * lamp.arc_height_main_rib + 1/(i+1)*10, 0])(rib_object)
+    elif direction == "y" and lamp.view == "2D_cutting":
+        rib_object = translate([lamp.lamp_width_x, -lamp.lamp_base_y - i * lamp.arc_height_main_rib + 1/(i+1)*10, 0])(rib_object)
+    elif direction == "ny" and lamp.view == "2D_cutting":
+        rib_object = translate([lamp.lamp_width_x, - (i + 3) * lamp.arc_height_main_rib + 1/(i+1)*10, 0])(rib_object)
 
     # 3D-view
     # extrude, rotate, move to rib spot, down to lamp base & mirror 2 times to create 360° lamp
-    elif direction == "x" and view == "3D_show":
-        rib_object = linear_extrude(height=thickness_material, center=True)(rib_object)
+    elif direction == "x" and lamp.view == "3D_show":
+        rib_object = linear_extrude(height=lamp.thickness_material, center=True)(rib_object)
         rib_object = rotate(v=[1, 0, 0], a=90)(rib_object)
         rib_object = rotate(v=[0, 0, 1], a=90)(rib_object)
-        rib_object = right(i * dist_ribs_x)(rib_object)
-        rib_object = down(lamp_base_x)(rib_object)
+        rib_object = right(i * lamp.dist_ribs_x)(rib_object)
+        rib_object = down(lamp.lamp_base_x)(rib_object)
         if i:
             rib_object = rib_object + mirror([1, 0, 0])(rib_object)
 
-    elif direction == "y" and view == "3D_show":
-        rib_object = linear_extrude(height=thickness_material, center=True)(rib_object)
+    elif direction == "y" and lamp.view == "3D_show":
+        rib_object = linear_extrude(height=lamp.thickness_material, center=True)(rib_object)
         rib_object = rotate(v=[1, 0, 0], a=90)(rib_object)
-        rib_object = forward(i * dist_ribs_y)(rib_object)
-        rib_object = down(lamp_base_y)(rib_object)
+        rib_object = forward(i * lamp.dist_ribs_y)(rib_object)
+        rib_object = down(lamp.lamp_base_y)(rib_object)
         rib_object = color(Brass)(rib_object)
 
-    elif direction == "ny" and view == "3D_show":
-        rib_object = linear_extrude(height=thickness_material, center=True)(rib_object)
+    elif direction == "ny" and lamp.view == "3D_show":
+        rib_object = linear_extrude(height=lamp.thickness_material, center=True)(rib_object)
         rib_object = rotate(v=[1, 0, 0], a=90)(rib_object)
-        rib_object = forward(i * dist_ribs_y)(rib_object)
-        rib_object = down(lamp_base_x)(rib_object)
+        rib_object = forward(i * lamp.dist_ribs_y)(rib_object)
+        rib_object = down(lamp.lamp_base_x)(rib_object)
         rib_object = rib_object + mirror([0, 1, 0])(rib_object)
         rib_object = color(Red)(rib_object)
 
@@ -415,67 +778,795 @@ def Generate_OpenSCAD_view(rib_object, direction, i):
     return rib_object
 
 
-if __name__ == "__main__":
-    SCAD_codelist = []          # empty list for storing the different solid-python objects
+def Render_OpenSCAD(SCAD_code, file_endings, timeout):
+    # renders SCAD-text with OpenSCAD in a temporary folder - returns the content of one file per ending
 
-    # calculate circular ribs Rib_y_0 and Rib_x_[n]
+    with tempfile.TemporaryDirectory() as tmp_path:
+        file_out_scad = os.path.join(tmp_path, 'rib.scad')
+        with open(file_out_scad, "w") as f:
+            f.write(SCAD_code)
+
+        rendered = []
+        for file_ending in file_endings:
+            file_out = os.path.join(tmp_path, 'rib' + file_ending)
+            Trace.Run_Subprocess(["openscad", "-o", file_out, file_out_scad], timeout=timeout, check=True,
+                                 stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            with open(file_out) as f:
+                rendered.append(f.read())
+
+    return rendered
+
+
+def Rib_Type(lamp, family):
+    # lamp base and direction (for Generate_OpenSCAD_view) of a rib family
+    if family == 'y0':
+        return lamp.lamp_base_y, "y"
+    elif family == 'x':
+        return lamp.lamp_base_x, "x"
+    else:
+        return lamp.lamp_base_x, "ny"
+
+
+def Rib_Name(family, rib_number):
+    return ("Rib_x_" if family == 'x' else "Rib_y_") + str(rib_number)
+
+
+def Rib_Quantity(family, rib_number):
+    # number of identical ribs in the lamp - all but Rib_x_0 and Rib_y_0 are mirrored (see 3D_show)
+    return 1 if rib_number == 0 else 2
+
+
+def Preflight_Check(lamp, profiles):
+    # checks all ribs on their profiles (see Validate) - returns the report
+
+    families = (
+        ('y0', [0]),
+        ('x', list(range(0, lamp.number_of_ribs_x))),
+        ('ny', list(range(1, lamp.number_of_ribs_y))),
+        )
+
+    findings = []
+    for family, rib_numbers in families:
+        lamp_base, direction = Rib_Type(lamp, family)
+        slot_location = "outer" if direction == "x" else "inner"    # see DrawRib_Circular & DrawRib_NonCircular
+        findings += Validate.Check_Family(lamp, profiles[family], rib_numbers,
+                                          [Rib_Name(family, rib_number) for rib_number in rib_numbers],
+                                          lamp_base, slot_location, Outline_Sampled(lamp, family))
+
+    # crossing points of the circular ribs Rib_x_[n] with Rib_y_0 (at y=0) and the non-circular Rib_y_[m]
+    def Crossing_Z(family):
+        return profiles[family]['outer'][:, profiles[family]['sections']['crossing']]
+
+    crossing_x, crossing_y0, crossing_ny = Crossing_Z('x'), Crossing_Z('y0')[0], Crossing_Z('ny')
+    partner_x = np.concatenate((crossing_y0[:, None] - lamp.lamp_base_y + lamp.lamp_base_x, crossing_ny[1:].T), axis=1)
+    partner_x[:, 0][Validate.Invalid(crossing_y0)] = -1     # keep the missing values
+
+    x_names = [Rib_Name('x', k) for k in range(0, lamp.number_of_ribs_x)]
+    crossing_positions = np.arange(lamp.number_of_ribs_y) * lamp.dist_ribs_y
+    findings += Validate.Check_Crossings(crossing_x, lamp.lamp_base_x, partner_x, lamp.lamp_base_x, x_names,
+                                         np.broadcast_to(crossing_positions, crossing_x.shape), lamp)
+    findings += Validate.Check_Crossings(crossing_y0[None, :], lamp.lamp_base_y, crossing_x[:, 0][None, :],
+                                         lamp.lamp_base_x, [Rib_Name('y0', 0)],
+                                         (np.arange(lamp.number_of_ribs_x) * lamp.dist_ribs_x)[None, :], lamp)
+    findings += Validate.Check_Crossings(crossing_ny[1:], lamp.lamp_base_x, crossing_x[:, 1:].T, lamp.lamp_base_x,
+                                         [Rib_Name('ny', m) for m in range(1, lamp.number_of_ribs_y)],
+                                         np.broadcast_to(np.arange(lamp.number_of_ribs_x) * lamp.dist_ribs_x,
+                                                         crossing_ny[1:].shape), lamp)
+
+    return Validate.Report(findings, sum(len(rib_numbers) for _, rib_numbers in families))
 
-    # the "x", "y" and "ny" indicators are for providing the movement direction of ribs as well as
-    # square cutout indicators
 
-    # calculate circular ribs Rib_y_0
-    rib_0_y = Generate_OpenSCAD_view(DrawRib_Circular(radius_0_y, lamp_base_y, "y"), "y", 0)
-    SCAD_codelist.append(scad_render(rib_0_y))  # render the SCAD-objects to SCAD-text
+def Outline_Sampled(lamp, family):
+    # True if the perimeters of the rib are drawn from the sampled outline (else as arcs)
+    return family == 'ny' or lamp.tessellation == "low_poly"
 
-    # calculate circular ribs Rib_x_[n]
 
-    for k in range(0, number_of_ribs_x):
-        if k == 0:
-            radius = radius_0_x
+def Rib_Cache_Inputs(lamp, family, profile):
+    # all inputs the geometry of a (not yet placed) rib depends on - see Generate_Rib
+
+    lamp_base, _ = Rib_Type(lamp, family)
+
+    # circular ribs are drawn as arcs - the sampled outline is just used for the non-circular & low poly ones
+    sections = ['crossing', 'holes']
+    if Outline_Sampled(lamp, family):
+        sections.append('outline')
+
+    profile_inputs = {key: profile[key] for key in ['radius', 'number_of_ribs', 'dist_ribs', 'hole_increment']
+                      + sections if key in profile}
+
+    inputs = {
+        'family': family,
+        'profile': profile_inputs,
+        'lamp_base': lamp_base,
+        'base_width': lamp.radius_0_y if family != 'ny' else lamp.lamp_width_x,
+        'arc_height_main_rib': lamp.arc_height_main_rib,
+        'thickness_material': lamp.thickness_material,
+        'tolerance': lamp.tolerance,
+        'rib_cutout_residue': lamp.rib_cutout_residue,
+        'epsilon': lamp.epsilon,
+        'arc_segments': None if Outline_Sampled(lamp, family) else Arc_Segments(lamp, profile['radius']),
+        }
+    if lamp.tessellation == "low_poly":
+        inputs['tessellation'] = lamp.tessellation     # holes are drawn differently - see Rib_Holes_Low_Poly
+
+    return inputs
+
+
+def CSG_Nodes(scad_object):
+    # number of nodes of a SolidPython object tree
+    return 1 + sum(CSG_Nodes(child) for child in scad_object.children)
+
+
+def Rib_Vertex_Budget(lamp, family, profile):
+    # number of vertices of a full rib: perimeters, hole outlines (upper limit - holes may be cut short)
+    # and the square cutouts
+
+    if Outline_Sampled(lamp, family):
+        perimeter = 2 * len(profile['outline'][0])
+    else:
+        perimeter = 2 * (Arc_Segments(lamp, profile['radius']) // 4 + 1)
+
+    holes = sum(2 * len(hole_x) for hole_x in profile['holes'][0])
+    cutouts = 4 * profile['number_of_ribs']
+
+    return 2 * (perimeter + holes + cutouts)
+
+
+def Generate_Rib(job):
+    # generates a single rib, not placed yet (see Place_Rib) - the ribs are independent of each other, so
+    # this runs in a worker process in parallel mode
+    # job: (rib family, rib number, profile, render, lamp) - see Rib_Profiles for the families
+    #      render: None, "native" (2D rings of the full rib) or "openscad" (2D rings of the dxf rendered for
+    #      this rib only)
+    # the rendered geometry is taken from the cache if the rib's inputs did not change
+
+    family, rib_number, profile, render, lamp = job
+    lamp_base, direction = Rib_Type(lamp, family)
+
+    # in a worker process the events of the job are returned with the result
+    worker_trace = lamp.trace and not Trace.Active()
+    if worker_trace:
+        Trace.Start()
+
+    with Trace.Span("rib", category="rib", rib=Rib_Name(family, rib_number)) as rib_span:
+        result = Generate_Rib_Object(family, rib_number, profile, render, lamp, lamp_base, direction)
+        rib_span.args.update(vertices=result['vertices'], csg_nodes=result.pop('csg_nodes', 0), cache=result['cache'])
+
+    if worker_trace:
+        result['trace'] = Trace.Stop()
+
+    return result
+
+
+def Generate_Rib_Object(family, rib_number, profile, render, lamp, lamp_base, direction):
+    # see Generate_Rib
+
+    with Trace.Span("draw"):
+        if family == 'ny':
+            rib = DrawRib_NonCircular(lamp, profile, lamp_base)
+        else:
+            rib = DrawRib_Circular(lamp, profile, lamp_base, direction)
+
+    # the SCAD-text defines the half-rib once (as module) - mirror & placement of the view just call it
+    rib_name = Rib_Name(family, rib_number)
+    rib_full = RibModel.Full_Object(rib, RibModel.Module_Call(rib_name))
+    with Trace.Span("scad_render"):
+        result = {'rib': rib, 'module': RibModel.Rib_Module(rib, rib_name, lamp.premerge_cutouts), 'cache': None,
+                  'vertices': Rib_Vertex_Budget(lamp, family, profile)}
+
+    if Trace.Active():
+        result['csg_nodes'] = CSG_Nodes(RibModel.Half_Object(rib)) + CSG_Nodes(rib_full)
+
+    if render is None:
+        return result
+
+    # the rings are cached without placement --> cache is independent from view and rib position
+    cache_inputs = Rib_Cache_Inputs(lamp, family, profile)
+    if render == "openscad":
+        cache_inputs.update(render=render)
+    cache_key = RibCache.Cache_Key(cache_inputs)
+
+    cached = None
+    if lamp.cache_path:
+        with Trace.Span("cache_load"):
+            cached = RibCache.Cache_Load(lamp.cache_path, cache_key)
+    result['cache'] = "miss" if cached is None else "hit"
+
+    if cached is None:
+        if render == "native":
+            with Trace.Span("native_2d"):
+                cached = {'rings': RibModel.Rib_Rings(rib)}
         else:
-            radius = radius_0_x - (radius_0_y - Circle_Coords_Z(k * dist_ribs_x, radius_0_y))
-
-        rib_x_n = Generate_OpenSCAD_view(DrawRib_Circular(radius, lamp_base_x, "x"), "x", k)
-        SCAD_codelist.append(scad_render(rib_x_n))  # render the SCAD-objects to SCAD-text
-
-    # calculate non-circular ribs Rib_y_[1...m]
-    
-    
-    for m in range(1, number_of_ribs_y):    # start at '1' cause rib_0_y is already created
-        rib_y_n = Generate_OpenSCAD_view(DrawRib_NonCircular(m, lamp_base_x), "ny", m)
-        SCAD_codelist.append(scad_render(rib_y_n))  # render the SCAD-objects to SCAD-text
-    
-    # combine the SCAD-text and write to the named file
-    
-    SCAD_code = "\n".join(SCAD_codelist)  # join the object fragments from SCAD_codelist together
-
-    file_name_scad = file_name + '.scad'
-    file_name_dxf = file_name + '.dxf'
-    file_name_svg = file_name + '.svg'
-    file_name_png = file_name + '.png'
-
-    file_out_scad = os.path.join(file_path, file_name_scad)
-    file_out_dxf = os.path.join(file_path, file_name_dxf)
-    file_out_svg = os.path.join(file_path, file_name_svg)
-    file_out_png = os.path.join(file_path, file_name_png)
-
-    f = open(file_out_scad, "w")
-    f.write(SCAD_code)
-    f.close()
-
-    # export 2D-View as dxf in same folder as SCAD-file
-    if view == "2D_plotting":
-        subprocess.run(["openscad", "-o", file_out_dxf, file_out_scad])
-        subprocess.run(["openscad", "-o", file_out_svg, file_out_scad])
-
-    elif view == "3D_show":
-        subprocess.run(["openscad", "-o", file_out_png, "--imgsize=1600,1200",
-                        "--camera=0,-100,100,60,0,20,1200", file_out_scad])
+            # rendered once (dxf) - the full rib without placement, like the native rings
+            dxf_code, = Render_OpenSCAD(RibModel.Rib_SCAD(result['module'], rib_full), ('.dxf',), lamp.job_timeout)
+            cached = {'rings': Native2D.Read_DXF(dxf_code)}
+    result['part'] = cached['rings']
+
+    # mesh (3D view) or arcs (2D views) of the rib - here in the (parallel) job, placed by Place_Rib
+    if lamp.view == "3D_show":
+        if render == "native":
+            with Trace.Span("native_3d"):
+                result['mesh'] = Native3D.Extrude_Rings(cached['rings'])
+    elif lamp.arc_tolerance is not None:
+        with Trace.Span("arcs"):
+            result['arcs'] = [Native2D.Ring_Arcs(ring, lamp.arc_tolerance) for ring in cached['rings']]
+
+    if lamp.cache_path and result['cache'] == "miss":
+        with Trace.Span("cache_store"):
+            RibCache.Cache_Store(lamp.cache_path, cache_key, cached)
+
+    return result
+
+
+def Place_Rib(lamp, family, rib_number, render, rib_result):
+    # the rib in the view of the lamp (see Generate_OpenSCAD_view) - returns the SCAD-text, the placed 2D
+    # rings & arcs or the 3D instances of the mesh for the writers (see Export)
+    # rib_result: of Generate_Rib - the mesh or arcs missing there (rib kept from a run with another view)
+    #             are added to it
+
+    _, direction = Rib_Type(lamp, family)
+    rib_full = RibModel.Full_Object(rib_result['rib'], RibModel.Module_Call(Rib_Name(family, rib_number)))
+    placed = {'scad': RibModel.Rib_SCAD(rib_result['module'], Generate_OpenSCAD_view(lamp, rib_full, direction,
+                                                                                       rib_number))}
+    if render is None:
+        return placed
+
+    if lamp.view == "3D_show":
+        # one mesh per rib - placed (and mirrored) by the instances of the view
+        if 'mesh' not in rib_result:
+            with Trace.Span("native_3d"):
+                rib_result['mesh'] = Native3D.Extrude_Rings(rib_result['part'])
+        placed['mesh'] = rib_result['mesh']
+        placed['instances'] = Native3D.Object_Instances(Generate_OpenSCAD_view(lamp, union(), direction, rib_number))
+    else:
+        placement = Native2D.Object_Placement(Generate_OpenSCAD_view(lamp, union(), direction, rib_number))
+        placed['rings'] = [Native2D.Transform_Points(placement, ring) for ring in rib_result['part']]
+        if lamp.arc_tolerance is not None:
+            if 'arcs' not in rib_result:
+                with Trace.Span("arcs"):
+                    rib_result['arcs'] = [Native2D.Ring_Arcs(ring, lamp.arc_tolerance) for ring in rib_result['part']]
+            placed['arcs'] = Native2D.Transform_Arcs(placement, rib_result['arcs'])
+
+    return placed
+
+
+def Rib_Node_Inputs(lamp, family, rib_number, profile, render):
+    # inputs of a rib - grouped by the part of the rib they define (see Generate_Lamp)
+    # the rib is generated again if perimeter, slots, holes or render change, just placed again for the placement
+
+    lamp_base, direction = Rib_Type(lamp, family)
+    shared = {'family': family, 'lamp_base': lamp_base, 'arc_height_main_rib': lamp.arc_height_main_rib}
+
+    return {
+        'perimeter': dict(shared, radius=profile.get('radius'),
+                          outline=profile['outline'] if Outline_Sampled(lamp, family) else None,
+                          base_width=lamp.radius_0_y if family != 'ny' else lamp.lamp_width_x, epsilon=lamp.epsilon,
+                          arc_segments=None if Outline_Sampled(lamp, family) else Arc_Segments(lamp, profile['radius'])),
+        'slots': dict(shared, crossing=profile['crossing'], number_of_ribs=profile['number_of_ribs'],
+                      dist_ribs=profile['dist_ribs'], thickness_material=lamp.thickness_material,
+                      tolerance=lamp.tolerance),
+        'holes': dict(shared, holes=profile['holes'], hole_increment=profile['hole_increment'],
+                      thickness_material=lamp.thickness_material, rib_cutout_residue=lamp.rib_cutout_residue,
+                      tessellation=lamp.tessellation == "low_poly"),
+        'render': {'render': render, 'premerge_cutouts': lamp.premerge_cutouts, 'arc_tolerance': lamp.arc_tolerance},
+        'placement': {'view': lamp.view, 'direction': direction, 'rib_number': rib_number,
+                      'placement': [lamp.lamp_base_x, lamp.lamp_base_y, lamp.lamp_height, lamp.lamp_width_x,
+                                    lamp.dist_ribs_x, lamp.dist_ribs_y, lamp.thickness_material]},
+        }
+
+
+def Rib_Geometry_Keys(keys):
+    # keys of the parts of a rib (see Rib_Node_Inputs) the generated rib depends on - all but the placement
+    return {part: key for part, key in keys.items() if part != 'placement'}
+
+
+def Session():
+    # state of the generation kept between runs (watch mode) - see Generate_Lamp
+    #   nodes:   node name --> (key of the inputs, value)
+    #   written: exports written by the last run
+    return {'nodes': {}, 'written': []}
+
+
+def Write_Text(file_out, text):
+    with open(file_out, "w") as f:
+        f.write(text)
+
+
+def Session_Changed(session, name, inputs, file_outs):
+    # False if the last run of the session did the export with the same inputs and its files still exist
+    if session is None:
+        return True
+    node = session['nodes'].get(name)
+    return (node is None or node[0] != RibCache.Cache_Key(inputs)
+            or not all(os.path.exists(file_out) for file_out in file_outs))
+
+
+def Session_Store(session, name, inputs, value):
+    # records an export done in this run
+    if session is not None:
+        session['nodes'][name] = (RibCache.Cache_Key(inputs), value)
+        session['written'].append(name)
+
+
+def Session_Export(session, name, inputs, file_outs, write):
+    # calls write() - with a session just if the inputs changed since the last run or a file is missing
+    # returns the value of write() (the stored one, if it was not called)
+
+    if not Session_Changed(session, name, inputs, file_outs):
+        return session['nodes'][name][1]
+
+    with Trace.Span(name, category="export"):
+        value = write()
+
+    Session_Store(session, name, inputs, value)
+    return value
+
+
+def Export_OpenSCAD_2D(file_out_scad, file_out_dxf, file_out_svg, arc_tolerance=None):
+    # renders the SCAD-file once (dxf) - the svg is written from the rings of the dxf
+    # arc_tolerance: the dxf is written again from the rings, with the fitted arcs (see Arcs)
+    with Export.Atomic_Output(file_out_dxf) as file_tmp:
+        Trace.Run_Subprocess(["openscad", "-o", file_tmp, file_out_scad], check=True)
+        with open(file_tmp) as f:
+            rings = Native2D.Read_DXF(f.read())
+        if arc_tolerance is not None:
+            Native2D.Write_DXF(file_tmp, rings, arc_tolerance)
+    with Export.Atomic_Output(file_out_svg) as file_tmp:
+        Native2D.Write_SVG(file_tmp, rings, arc_tolerance)
+
+
+def Export_OpenSCAD_PNG(file_out_scad, file_out_png):
+    with Export.Atomic_Output(file_out_png) as file_tmp:
+        Trace.Run_Subprocess(["openscad", "-o", file_tmp, "--imgsize=1600,1200", "--camera=0,-100,100,60,0,20,1200",
+                              file_out_scad], check=True)
         # examples for working command line options
         # for more beautiful pics use "--render" before camera command, but it needs time....
 
         # openscad -o Rasterlamp2.png --viewall --imgsize=1600,1200 --camera=250,-300,150,0,0,0 Rasterlamp2.scad
         # openscad -o Rasterlamp2.png --imgsize=1600,1200 --camera=0,-100,100,50,0,0,1200 Rasterlamp2.scad
 
+
+def Nest_Sheets(lamp, rib_jobs, rib_results):
+    # laser-cutter ready layout - all ribs of the lamp (mirrored ones twice) nested onto sheets
+    # writes one dxf per sheet (contours in cutting order, see Toolpath) - returns the number of sheets, the
+    # utilization and the estimated machine time
+
+    parts = []
+    for (family, rib_number, *_), rib_result in zip(rib_jobs, rib_results):
+        parts += [(Rib_Name(family, rib_number), rib_result['part'])] * Rib_Quantity(family, rib_number)
+
+    with Trace.Span("nesting"):
+        sheets = Nesting.Nest_Parts([rings for _, rings in parts], lamp.sheet_width, lamp.sheet_height,
+                                    lamp.sheet_margin, lamp.kerf, lamp.nesting_refinement)
+
+    machine_time = 0.0
+    for number, sheet in enumerate(sheets, 1):
+        placed = [[Native2D.Transform_Points(transform, ring) for ring in parts[index][1]]
+                  for index, transform in sheet['placements']]
+        file_out_sheet = os.path.join(lamp.file_path, "{0}_sheet_{1}".format(lamp.file_name, number))
+        text = "sheet {0}: {1} ribs, utilization {2:.1%}".format(number, len(sheet['placements']),
+                                                                  sheet['utilization'])
+
+        if lamp.toolpath:
+            with Trace.Span("toolpath"):
+                rings, path = Toolpath.Order_Contours(placed, lamp.cut_speed, lamp.travel_speed, lamp.pierce_time)
+            machine_time += path['time']
+            text += ", cut {0:.0f}mm, travel {1:.0f}mm (unordered {2:.0f}mm), est. {3:.1f}min".format(
+                path['cut_length'], path['travel_length'], path['travel_unordered'], path['time'] / 60)
+        else:
+            rings = [ring for part in placed for ring in part]
+
+        with Trace.Span("arcs"):
+            arcs = [Native2D.Ring_Arcs(ring, lamp.arc_tolerance) for ring in rings]
+        if lamp.toolpath == "gcode":
+            with Export.Atomic_Output(file_out_sheet + '.gcode') as file_tmp:
+                Toolpath.Write_GCode(file_tmp, arcs, lamp.cut_speed, lamp.travel_speed)
+        with Export.Atomic_Output(file_out_sheet + '.dxf') as file_tmp:
+            Native2D.Write_DXF_Arcs(file_tmp, arcs)
+        print(text)
+
+    utilization = sum(sheet['area'] for sheet in sheets) / (len(sheets) * lamp.sheet_width * lamp.sheet_height)
+    print("{0} ribs on {1} sheets of {2} x {3}mm, utilization {4:.1%}".format(
+        len(parts), len(sheets), lamp.sheet_width, lamp.sheet_height, utilization))
+
+    result = {'sheets': len(sheets), 'utilization': utilization}
+    if lamp.toolpath:
+        print("estimated machine time: {0:.1f}min".format(machine_time / 60))
+        result['machine_time'] = machine_time
+    return result
+
+
+def Generate_Lamp(config, session=None):
+    # generates all ribs of the lamp and writes the output files - returns a short summary of the run
+    # session: see Session - just the ribs and output files whose inputs changed since the last run
+    #          with the session are generated again (dependency graph: lamp --> profiles --> ribs with
+    #          perimeter, slots, holes & render --> placed ribs (view) --> scad, dxf, svg, stl, glb, png, sheets)
+    #          - derived values and profiles are kept by Lamp_Calculation & Rib_Profiles anyway
+
+    time_start = time.time()
+    lamp = Lamp_Calculation(config)
+
+    if lamp.trace:
+        Trace.Start()
+    if session is not None:
+        session['written'] = []
+
+    # the "x", "y" and "ny" indicators are for providing the movement direction of ribs as well as
+    # square cutout indicators
+
+    # perimeters of all ribs - calculated at once, the ribs below take their slice
+    # (shared by all lamps with the same geometry, e.g. variants of a sweep just differing in the output)
+    with Trace.Span("profiles"):
+        profiles = Rib_Profiles(Lamp_Geometry(lamp))
+
+    # weak spots of the design - found on the profiles, before any rib is drawn or rendered
+    if lamp.preflight_check:
+        with Trace.Span("preflight"):
+            report = Preflight_Check(lamp, profiles)
+        if not report['ok']:
+            if lamp.preflight_check == "error":
+                if lamp.trace:
+                    Trace.Stop()
+                raise Validate.Preflight_Error(report)
+            print(Validate.Report_Text(report))
+
+    # nesting of the ribs onto material sheets - needs the native 2D geometry (whatever the backend)
+    nesting = lamp.view == "2D_cutting" and lamp.sheet_width is not None
+
+    # the geometry is rendered along with the ribs: natively (3D view: extruded to meshes), or in parallel mode
+    # by one OpenSCAD job per 2D rib
+    render = None
+    if lamp.export_backend == "native" or nesting:
+        render = "native"
+    elif lamp.view == "2D_plotting" and lamp.parallel_workers != 1:
+        render = "openscad"
+
+    # circular ribs Rib_y_0 and Rib_x_[n], non-circular ribs Rib_y_[1...m]
+    # (start at '1' cause rib_0_y is already created)
+    with Trace.Span("profile_slices"):
+        rib_jobs = [('y0', 0, Rib_Profile(profiles, 'y0', 0), render, lamp)]
+        rib_jobs += [('x', k, Rib_Profile(profiles, 'x', k), render, lamp) for k in range(0, lamp.number_of_ribs_x)]
+        rib_jobs += [('ny', m, Rib_Profile(profiles, 'ny', m), render, lamp) for m in range(1, lamp.number_of_ribs_y)]
+
+    # with a session: ribs with unchanged inputs are taken from the last run - ribs with just another
+    # placement (e.g. the view) are placed again, not generated again (see Place_Rib)
+    rib_names = [Rib_Name(family, rib_number) for family, rib_number, *_ in rib_jobs]
+    rib_keys = [None] * len(rib_jobs)
+    rib_results = [None] * len(rib_jobs)
+    changed_parts = collections.Counter()
+
+    if session is not None:
+        for number, rib_job in enumerate(rib_jobs):
+            rib_keys[number] = {part: RibCache.Cache_Key(inputs)
+                                for part, inputs in Rib_Node_Inputs(lamp, *rib_job[:4]).items()}
+            node = session['nodes'].get(rib_names[number] + '_placed')
+            if node is None:
+                changed_parts.update(list(rib_keys[number]))
+            else:
+                changed_parts.update(part for part in rib_keys[number] if node[0].get(part) != rib_keys[number][part])
+
+            node = session['nodes'].get(rib_names[number])
+            if node is not None and node[0] == Rib_Geometry_Keys(rib_keys[number]):
+                rib_results[number] = node[1]
+
+    pending = [number for number, rib_result in enumerate(rib_results) if rib_result is None]
+
+    # output files - written while the ribs are generated, all formats from the same rib geometry (see Export)
+    # (outputs of a session are written again just if one of the ribs or the file name changed)
+
+    file_name_scad = lamp.file_name + '.scad'
+    file_name_dxf = lamp.file_name + '.dxf'
+    file_name_svg = lamp.file_name + '.svg'
+    file_name_png = lamp.file_name + '.png'
+    file_name_stl = lamp.file_name + '.stl'
+    file_name_gltf = lamp.file_name + '.glb'
+
+    file_out_scad = os.path.join(lamp.file_path, file_name_scad)
+    file_out_dxf = os.path.join(lamp.file_path, file_name_dxf)
+    file_out_svg = os.path.join(lamp.file_path, file_name_svg)
+    file_out_png = os.path.join(lamp.file_path, file_name_png)
+    file_out_stl = os.path.join(lamp.file_path, file_name_stl)
+    file_out_gltf = os.path.join(lamp.file_path, file_name_gltf)
+
+    export_inputs = [rib_keys, lamp.file_path, lamp.file_name, render, lamp.view, lamp.arc_tolerance]
+
+    writers = [Export.SCAD_Writer("write_scad", file_out_scad)]
+
+    # export 3D-View as stl & glTF (and the preview) in same folder as SCAD-file
+    if render == "native" and lamp.view == "3D_show":
+        writers += [Export.STL_Writer("write_stl", file_out_stl),
+                    Export.Mesh_Writer("write_gltf", file_out_gltf, Native3D.Write_GLTF)]
+        if lamp.preview_png:
+            writers.append(Export.Mesh_Writer("render_png", file_out_png, Native3D.Render_PNG))
+
+    # export 2D-View as dxf & svg - rings rendered natively or by OpenSCAD (per rib, placement already done)
+    elif render is not None:
+        writers += [Export.DXF_Writer("write_dxf", file_out_dxf), Export.SVG_Writer("write_svg", file_out_svg)]
+
+    writers = [writer for writer in writers if Session_Changed(session, writer.name, export_inputs, [writer.file_out])]
+
+    if lamp.parallel_workers == 1:
+        pending_results = (Generate_Rib(rib_jobs[number]) for number in pending)
+    else:
+        pending_results = Parallel.Iterate_Parallel(Generate_Rib, [rib_jobs[number] for number in pending],
+                                                    lamp.parallel_workers, lamp.job_timeout,
+                                                    lambda rib_job: Rib_Name(*rib_job[:2]))
+
+    # every rib goes to the writers as soon as it is generated and placed - in the order of the lamp
+    stream = Export.Export_Stream(writers)
+    computed = []
+    placed_ribs = 0
+    try:
+        with Trace.Span("ribs"):
+            for number, rib_name in enumerate(rib_names):
+                rib_result = rib_results[number]
+                if rib_result is None:
+                    rib_result = next(pending_results)
+                    Trace.Add(rib_result.pop('trace', []))
+                    computed.append(rib_result)
+                    if session is not None:
+                        session['nodes'][rib_name] = (Rib_Geometry_Keys(rib_keys[number]), rib_result)
+
+                node = session['nodes'].get(rib_name + '_placed') if session is not None else None
+                if node is not None and node[0] == rib_keys[number]:
+                    placed = node[1]
+                else:
+                    with Trace.Span("placement"):
+                        placed = Place_Rib(lamp, *rib_jobs[number][:2], render, rib_result)
+                    placed_ribs += 1
+                    if session is not None:
+                        session['nodes'][rib_name + '_placed'] = (rib_keys[number], placed)
+
+                stream.Add(rib_name, placed)
+
+                # without a session the geometry of a rib is just kept until it is written
+                if session is None:
+                    rib_result = {key: value for key, value in rib_result.items()
+                                  if key not in ('rib', 'module', 'arcs', 'mesh')}
+                rib_results[number] = rib_result
+    except BaseException:
+        stream.Abort()
+        raise
+    finally:
+        pending_results.close()
+
+    export_values = stream.Close()
+    for writer in writers:
+        Session_Store(session, writer.name, export_inputs, export_values[writer.name])
+
+    summary = {'file_name': lamp.file_name, 'ribs': len(rib_results),
+               'vertices': sum(rib_result['vertices'] for rib_result in rib_results)}
+    if lamp.preflight_check:
+        summary['preflight'] = dict(report['counts'])
+
+    if lamp.tessellation == "adaptive":
+        print("vertex budget per rib (chord tolerance {0}mm):".format(lamp.chord_tolerance))
+        for rib_name, rib_result in zip(rib_names, rib_results):
+            print("  {0:<10}{1:>8}".format(rib_name, rib_result['vertices']))
+        print("  {0:<10}{1:>8}".format("total", summary['vertices']))
+
+    if lamp.cache_path and render is not None and computed:
+        cache_hits = sum(rib_result['cache'] == "hit" for rib_result in computed)
+        cache_misses = len(computed) - cache_hits
+        cache_evictions = RibCache.Cache_Evict(lamp.cache_path, lamp.cache_size * 1024 ** 2)
+        cache_statistics = RibCache.Cache_Statistics(lamp.cache_path, cache_hits, cache_misses, cache_evictions)
+        print("rib cache: {0} hits, {1} misses, {2} evicted (total: {3} hits, {4} misses)".format(
+            cache_hits, cache_misses, cache_evictions, cache_statistics['hits'], cache_statistics['misses']))
+        summary.update(cache_hits=cache_hits, cache_misses=cache_misses)
+
+    # views rendered by OpenSCAD from the whole SCAD-file
+    if render is None and lamp.view == "2D_plotting":
+        Session_Export(session, "openscad_dxf_svg", export_inputs, [file_out_dxf, file_out_svg],
+                       lambda: Export_OpenSCAD_2D(file_out_scad, file_out_dxf, file_out_svg, lamp.arc_tolerance))
+
+    elif render is None and lamp.view == "3D_show":
+        Session_Export(session, "openscad_png", export_inputs, [file_out_png], lambda: Export_OpenSCAD_PNG(
+            file_out_scad, file_out_png))
+
+    if nesting:
+        sheet_inputs = export_inputs + [lamp.sheet_width, lamp.sheet_height, lamp.sheet_margin, lamp.kerf,
+                                        lamp.nesting_refinement, lamp.toolpath, lamp.cut_speed, lamp.travel_speed,
+                                        lamp.pierce_time]
+        summary.update(Session_Export(session, "write_sheets", sheet_inputs, [],
+                                      lambda: Nest_Sheets(lamp, rib_jobs, rib_results)))
+
     # open OpenSCAD for viewing the created lamp
     # subprocess.run(["openscad", file_out_scad])
+
+    if session is not None:
+        summary['recomputed'] = {'ribs': len(pending), 'placed': placed_ribs, 'parts': dict(changed_parts),
+                                 'written': session['written']}
+
+    summary['time'] = time.time() - time_start
+
+    if lamp.trace:
+        events = Trace.Stop()
+        file_out_trace = os.path.join(lamp.file_path, lamp.file_name + '_trace.json')
+        Trace.Write_Trace(file_out_trace, events)
+        print(Trace.Summary(events))
+        print("trace written to {0}".format(file_out_trace))
+
+    return summary
+
+
+# -------------------------------------------------------------------------------------------------------
+# Parameter sweep - many lamp variants in one process
+
+def Parse_Value(text):
+    # converts a parameter value given as text (csv, command line) to int, float, bool or None
+    text = text.strip()
+    if text == 'None':
+        return None
+    if text in ('True', 'False'):
+        return text == 'True'
+    for value_type in (int, float):
+        try:
+            return value_type(text)
+        except ValueError:
+            pass
+    return text
+
+
+def Sweep_Grid(grid):
+    # all combinations of a parameter grid {parameter: [values]} as list of variants
+    names = sorted(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[name] for name in names))]
+
+
+def Sweep_Variants(file_sweep):
+    # reads the variants of a sweep - one dict of changed parameters per variant
+    #   .json: list of objects (one per variant) or object of lists (parameter grid - all combinations)
+    #   .csv:  header with the parameter names, one variant per row
+
+    with open(file_sweep, newline='') as f:
+        if file_sweep.lower().endswith('.csv'):
+            return [{name: Parse_Value(value) for name, value in row.items() if value != ''}
+                    for row in csv.DictReader(f)]
+
+        variants = json.load(f)
+
+    if isinstance(variants, dict):
+        variants = Sweep_Grid(variants)
+    return variants
+
+
+def Config_Update(config, values):
+    # configuration with changed values {parameter: value}
+    unknown = set(values) - set(LampConfig._fields)
+    if unknown:
+        raise ValueError("unknown lamp parameter(s): {0}".format(", ".join(sorted(unknown))))
+    return config._replace(**values)
+
+
+def Sweep_Configs(base_config, variants):
+    # one configuration per variant - variants without own file_name are numbered after the base file_name
+
+    configs = []
+    for number, variant in enumerate(variants):
+        values = dict(variant)
+        values.setdefault('file_name', "{0}_{1:04d}".format(base_config.file_name, number))
+        configs.append(Config_Update(base_config, values))
+
+    return configs
+
+
+def Generate_Variant(config):
+    # generates one variant of a sweep - a variant failing the pre-flight check is skipped (summary
+    # with the report instead of the ribs)
+    try:
+        return Generate_Lamp(config)
+    except Validate.Preflight_Error as error:
+        return {'file_name': config.file_name, 'rejected': error.report}
+
+
+def Run_Sweep(configs, workers=1):
+    # generates all lamp variants in this process (workers=1) or in a pool of worker processes
+    # lamp calculations, rib profiles and the rib cache are shared between the variants
+
+    if workers == 1:
+        return [Generate_Variant(config) for config in configs]
+
+    # worker processes can't start their own pools --> ribs of a variant are generated one after another
+    configs = [config._replace(parallel_workers=1) for config in configs]
+    return Parallel.Run_Parallel(Generate_Variant, configs, workers)
+
+# Parameter sweep
+# -------------------------------------------------------------------------------------------------------
+
+
+# -------------------------------------------------------------------------------------------------------
+# Watch mode - regenerates the lamp on every change of a configuration file
+
+def Watch_Values(file_watch):
+    # parameters of the watched file: .json object, or one PARAMETER=VALUE per line (# for comments)
+
+    with open(file_watch) as f:
+        if file_watch.lower().endswith('.json'):
+            return json.load(f)
+
+        values = {}
+        for line in f:
+            line = line.split('#')[0].strip()
+            if line:
+                name, _, value = line.partition('=')
+                values[name.strip()] = Parse_Value(value)
+        return values
+
+
+def Watch(config, file_watch, interval=0.5):
+    # regenerates the lamp whenever the file is saved - just the ribs & outputs affected by the change
+
+    session = Session()
+    modified = None
+    print("watching {0} - stop with Ctrl-C".format(file_watch))
+
+    while True:
+        try:
+            current = os.stat(file_watch).st_mtime_ns
+        except OSError:
+            current = None
+
+        if current is not None and current != modified:
+            modified = current
+            try:
+                summary = Generate_Lamp(Config_Update(config, Watch_Values(file_watch)), session)
+            except Exception as error:      # keep on watching - the file will be saved again with a fix
+                print("error: {0}".format(error))
+            else:
+                recomputed = summary['recomputed']
+                print("{0} of {1} ribs regenerated, {2} placed ({3}), written: {4} - {5:.2f}s".format(
+                    recomputed['ribs'], summary['ribs'], recomputed['placed'],
+                    ", ".join("{0} {1}".format(part, count) for part, count in sorted(recomputed['parts'].items()))
+                    or "no changes",
+                    ", ".join(recomputed['written']) or "nothing", summary['time']))
+
+        time.sleep(interval)
+
+# Watch mode
+# -------------------------------------------------------------------------------------------------------
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Generates a lamp shade - or a sweep of lamp variants")
+    parser.add_argument('--set', action='append', default=[], metavar='PARAMETER=VALUE',
+                        help="change a value of the configuration above (can be used several times)")
+    parser.add_argument('--sweep', metavar='FILE',
+                        help="generate all variants of a .json or .csv file (see Sweep_Variants)")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="number of worker processes for a sweep - 0: one per CPU core")
+    parser.add_argument('--watch', metavar='FILE',
+                        help="regenerate on every change of a .json or PARAMETER=VALUE file (see Watch_Values)")
+    parser.add_argument('--check', action='store_true',
+                        help="just the pre-flight check of the lamp - exit code 1 for any finding")
+    args = parser.parse_args()
+
+    config = default_config
+    for setting in args.set:
+        name, _, value = setting.partition('=')
+        config = Config_Update(config, {name.strip(): Parse_Value(value)})
+
+    if args.watch:
+        try:
+            Watch(config, args.watch)
+        except KeyboardInterrupt:
+            pass
+    elif args.sweep:
+        summaries = Run_Sweep(Sweep_Configs(config, Sweep_Variants(args.sweep)), args.workers)
+        rejected = [summary for summary in summaries if 'rejected' in summary]
+        for summary in summaries:
+            if 'rejected' in summary:
+                print("{0}: rejected - {1}".format(summary['file_name'], ", ".join(
+                    "{0} {1}".format(count, check) for check, count in summary['rejected']['counts'].items() if count)))
+            else:
+                print("{0}: {1} ribs in {2:.2f}s".format(summary['file_name'], summary['ribs'], summary['time']))
+        print("{0} variants generated, {1} rejected by the pre-flight check".format(
+            len(summaries) - len(rejected), len(rejected)))
+    elif args.check:
+        lamp = Lamp_Calculation(config)
+        report = Preflight_Check(lamp, Rib_Profiles(Lamp_Geometry(lamp)))
+        print(Validate.Report_Text(report, spots=10))
+        if not report['ok']:
+            sys.exit(1)
+    else:
+        Generate_Lamp(config)
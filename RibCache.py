@@ -0,0 +1,132 @@
+"""
+On-disk cache for Rasterlamp - stores the rendered geometry of single ribs under a hash of their inputs
+
+Every entry is a json file named by the sha256 of the inputs it was generated from. Reading an entry
+updates its modification time, so the least recently used entries are removed first when the cache
+grows beyond its size limit. The hit & miss counts are stored per process (statistics-<pid>.json, written
+by this process only) and summed up on reading - parallel runs never overwrite the counts of each other.
+
+Copyright (C) 2019 Thomas Minke - tom@der-pfusch.de
+
+License (similar and successors):
+Attribution-NonCommercial-ShareAlike 3.0 Unported (CC BY-NC-SA 3.0)
+https://creativecommons.org/licenses/by-nc-sa/3.0/
+
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+
+cache_version = 3       # increase if the content of the entries changes - old entries are not used anymore
+
+
+def Cache_Key(inputs):
+    # sha256 of the json-serializable inputs
+    inputs_text = json.dumps([cache_version, inputs], sort_keys=True)
+    return hashlib.sha256(inputs_text.encode()).hexdigest()
+
+
+def Cache_File(cache_path, key):
+    return os.path.join(cache_path, key[:2], key + '.json')
+
+
+def Cache_Load(cache_path, key):
+    # returns the cached value or None if there is no entry for the key
+
+    file_cache = Cache_File(cache_path, key)
+    try:
+        with open(file_cache) as f:
+            value = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    try:
+        os.utime(file_cache)    # mark as recently used
+    except OSError:
+        pass
+    return value
+
+
+def Cache_Store(cache_path, key, value):
+    # writes the entry - via a temporary file, parallel workers never see half written entries
+
+    file_cache = Cache_File(cache_path, key)
+    os.makedirs(os.path.dirname(file_cache), exist_ok=True)
+
+    file_descriptor, file_tmp = tempfile.mkstemp(dir=os.path.dirname(file_cache), suffix='.tmp')
+    try:
+        with os.fdopen(file_descriptor, "w") as f:
+            json.dump(value, f)
+        os.replace(file_tmp, file_cache)
+    except BaseException:
+        os.remove(file_tmp)
+        raise
+
+
+def Cache_Evict(cache_path, max_size):
+    # removes the least recently used entries until the cache is smaller than max_size [bytes]
+    # returns the number of removed entries
+
+    entries = []
+    for dir_path, _, file_names in os.walk(cache_path):
+        for file_name in file_names:
+            if file_name.endswith('.json') and not file_name.startswith('statistics'):
+                file_cache = os.path.join(dir_path, file_name)
+                try:
+                    stat = os.stat(file_cache)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, file_cache))
+
+    entries.sort()
+    size = sum(entry[1] for entry in entries)
+
+    removed = 0
+    for _, entry_size, file_cache in entries:
+        if size <= max_size:
+            break
+        try:
+            os.remove(file_cache)
+        except OSError:
+            continue
+        size -= entry_size
+        removed += 1
+
+    return removed
+
+
+def Statistics_Load(file_statistics, statistics):
+    # adds the counts of a statistics file
+    try:
+        with open(file_statistics) as f:
+            for name, count in json.load(f).items():
+                statistics[name] = statistics.get(name, 0) + count
+    except (OSError, ValueError):
+        pass
+
+
+def Cache_Statistics(cache_path, hits, misses, evictions=0):
+    # adds the counts of this run to the statistics of this process - returns the totals of all processes
+
+    file_process = os.path.join(cache_path, 'statistics-{0}.json'.format(os.getpid()))
+    statistics = {'hits': 0, 'misses': 0, 'evictions': 0}
+    Statistics_Load(file_process, statistics)
+
+    statistics['hits'] += hits
+    statistics['misses'] += misses
+    statistics['evictions'] += evictions
+
+    os.makedirs(cache_path, exist_ok=True)
+    file_descriptor, file_tmp = tempfile.mkstemp(dir=cache_path, suffix='.tmp')
+    with os.fdopen(file_descriptor, "w") as f:
+        json.dump(statistics, f)
+    os.replace(file_tmp, file_process)
+
+    # totals - statistics.json of older versions included
+    totals = {'hits': 0, 'misses': 0, 'evictions': 0}
+    for file_name in sorted(os.listdir(cache_path)):
+        if file_name.startswith('statistics') and file_name.endswith('.json'):
+            Statistics_Load(os.path.join(cache_path, file_name), totals)
+    return totals
@@ -0,0 +1,164 @@
+"""
+Rib model for Rasterlamp - compact description of a rib as coordinate arrays
+
+A rib is stored just once as its half (x >= 0): the outer perimeter (a quarter arc for the circular
+ribs, the sampled outline for the others) and everything cut away from it - the inner perimeter,
+rectangles (lamp base & slots for the crossing ribs) and the hole polygons, all holes in one array.
+The mirror image of the half-rib and the placement of the view are applied just on export:
+
+- SCAD: the half-rib becomes a module (independent of the view), the full and placed rib just calls it
+  (twice)
+- native 2D: the half-rib is evaluated once, its slabs are mirrored (see Native2D.Slabs_Mirror_X)
+
+Copyright (C) 2019 Thomas Minke - tom@der-pfusch.de
+
+License (similar and successors):
+Attribution-NonCommercial-ShareAlike 3.0 Unported (CC BY-NC-SA 3.0)
+https://creativecommons.org/licenses/by-nc-sa/3.0/
+
+"""
+
+import math
+import numpy as np
+from solid import OpenSCADObject, difference, mirror, polygon, scad_render, square, translate, union
+from solid.utils import arc
+import Native2D
+
+
+class Rib:
+    # half-rib (x >= 0) - arrays of float coordinates [mm]
+    #   radius, segments: circular ribs - outer perimeter is the quarter arc of a circle with 'segments',
+    #                     the inner one the same arc shifted down by arc_height (None for sampled perimeters)
+    #   outer, inner:     (n, 2) sampled perimeters - polygons closed along the axis x = 0 (None for arcs)
+    #   rectangles:       (k, 4) rectangular cutouts as x_min, y_min, x_max, y_max
+    #   hole_points:      (n, 2) points of all hole polygons - hole i is hole_points[hole_starts[i]:hole_starts[i + 1]]
+    #   mirror_x:         symmetry - the full rib is the half-rib united with its mirror image at x = 0
+
+    __slots__ = ('radius', 'segments', 'arc_height', 'outer', 'inner', 'rectangles', 'hole_points', 'hole_starts',
+                 'mirror_x')
+
+    def __init__(self, rectangles, holes, radius=None, segments=None, arc_height=None, outer=None, inner=None,
+                 mirror_x=True):
+        self.radius = radius
+        self.segments = segments
+        self.arc_height = arc_height
+        self.outer = None if outer is None else np.asarray(outer, dtype=float).reshape(-1, 2)
+        self.inner = None if inner is None else np.asarray(inner, dtype=float).reshape(-1, 2)
+        self.rectangles = np.asarray(rectangles, dtype=float).reshape(-1, 4)
+        self.hole_points = np.asarray([point for hole in holes for point in hole], dtype=float).reshape(-1, 2)
+        self.hole_starts = np.cumsum([0] + [len(hole) for hole in holes])
+        self.mirror_x = mirror_x
+
+    def Holes(self):
+        return [self.hole_points[start:end] for start, end in zip(self.hole_starts, self.hole_starts[1:])]
+
+    def Perimeters(self):
+        # outer & inner perimeter as (n, 2) arrays
+        if self.outer is not None:
+            return self.outer, self.inner
+        outer = Arc_Points(self.radius, self.segments)
+        return outer, outer - [0.0, self.arc_height]
+
+    def Size(self):
+        # bytes of the coordinate arrays
+        return sum(array.nbytes for array in (self.outer, self.inner, self.rectangles, self.hole_points)
+                   if array is not None)
+
+
+def Arc_Points(radius, segments):
+    # quarter arc (0 - 90°) from the origin, with the vertices of a circle with 'segments' (like OpenSCAD)
+
+    angles = 2 * math.pi * np.arange(segments // 4 + 1) / segments
+    points = np.stack((radius * np.cos(angles), radius * np.sin(angles)), axis=1)
+    if segments % 4:
+        # the arc ends on the chord crossing the y-axis
+        x_a, y_a = points[-1]
+        angle_b = angles[-1] + 2 * math.pi / segments
+        x_b, y_b = radius * math.cos(angle_b), radius * math.sin(angle_b)
+        points = np.vstack((points, [0.0, y_a + (y_b - y_a) * x_a / (x_a - x_b)]))
+    else:
+        points[-1, 0] = 0.0
+    return np.vstack(([0.0, 0.0], points))
+
+
+# -------------------------------------------------------------------------------------------------------
+# native 2D
+
+def Rib_Shapes(rib):
+    # shapes (see Native2D.Object_To_Expression) of the half-rib: outer perimeter first, then the cutouts
+
+    outer, inner = rib.Perimeters()
+    shapes = [[[tuple(point) for point in outer.tolist()]], [[tuple(point) for point in inner.tolist()]]]
+    shapes += [[[(x_min, y_min), (x_max, y_min), (x_max, y_max), (x_min, y_max)]]
+               for x_min, y_min, x_max, y_max in rib.rectangles.tolist()]
+    shapes += [[[tuple(point) for point in hole.tolist()]] for hole in rib.Holes()]
+    return shapes
+
+
+def Cutout_Expression(shapes):
+    return ('union', [('shape', index) for index in range(1, len(shapes))])
+
+
+def Rib_Rings(rib):
+    # outline of the full rib (not placed) as list of rings - the half-rib is evaluated once
+    shapes = Rib_Shapes(rib)
+    x_coords, slabs = Native2D.Evaluate_Slabs(('difference', [('shape', 0), Cutout_Expression(shapes)]), shapes)
+    if rib.mirror_x:
+        x_coords, slabs = Native2D.Slabs_Mirror_X(x_coords, slabs)
+    return Native2D.Segments_To_Rings(Native2D.Slabs_To_Segments(x_coords, slabs))
+
+
+# -------------------------------------------------------------------------------------------------------
+# SCAD
+
+def Half_Object(rib, premerge_cutouts=False):
+    # SolidPython object of the half-rib - the outer perimeter minus one union of all cutouts
+    # premerge_cutouts: the union is calculated in python and passed on as one polygon
+
+    if rib.outer is None:
+        outer = arc(rad=rib.radius, start_degrees=0, end_degrees=90, segments=rib.segments)
+        inner = translate([0, -rib.arc_height])(
+            arc(rad=rib.radius, start_degrees=0, end_degrees=90, segments=rib.segments))
+    else:
+        outer = polygon(rib.outer.tolist())
+        inner = polygon(rib.inner.tolist())
+
+    if premerge_cutouts:
+        shapes = Rib_Shapes(rib)
+        rings = Native2D.Evaluate_Expression(Cutout_Expression(shapes), shapes)
+        points = [list(point) for ring in rings for point in ring]
+        paths = []
+        for ring in rings:
+            start = sum(len(path) for path in paths)
+            paths.append(list(range(start, start + len(ring))))
+        return difference()(outer, polygon(points, paths))
+
+    cutouts = [inner]
+    cutouts += [translate([x_min, y_min])(square(size=[x_max - x_min, y_max - y_min]))
+                for x_min, y_min, x_max, y_max in rib.rectangles.tolist()]
+    cutouts += [polygon(hole.tolist()) for hole in rib.Holes()]
+    return difference()(outer, union()(*cutouts))
+
+
+def Module_Call(name):
+    # SolidPython object calling the SCAD module 'name'
+    return OpenSCADObject(name, {})
+
+
+def Full_Object(rib, half_object):
+    # the half-rib (e.g. a module call) and its mirror image - the full rib
+    if rib.mirror_x:
+        return half_object + mirror([1, 0, 0])(half_object)
+    return half_object
+
+
+def Rib_Module(rib, name, premerge_cutouts=False):
+    # SCAD-text of the module 'name' with the half-rib - independent of the placement
+    body = scad_render(Half_Object(rib, premerge_cutouts)).strip("\n")
+    return "module {0}() {{\n\t{1}\n}}\n".format(name, body.replace("\n", "\n\t"))
+
+
+def Rib_SCAD(module, placed_call):
+    # SCAD-text of the rib: the module of the half-rib (see Rib_Module) and the placed call(s) of it
+    # (see Full_Object)
+    return module + scad_render(placed_call)
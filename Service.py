@@ -0,0 +1,413 @@
+"""
+Generation service for Rasterlamp - generates lamps on request in a pool of warm worker processes
+
+The workers are started once (modules imported, first lamp calculated) and generate one lamp after
+another, so a request costs just the generation itself - profiles and rendered ribs of similar lamps
+are shared by the caches of Rasterlamp. Identical requests are generated once: a request for a lamp
+already being generated waits for that run, a request for a lamp generated before gets the kept
+files right away.
+
+POST /lamp.<format> with the lamp parameters as json object (e.g. {"lamp_height": 120}) returns the
+file: dxf or svg (2D views), png, stl or glb (3D view) - json returns the summary of the run.
+The view follows the format, if not given. ?timeout=<s> limits the wait for this request.
+GET /status returns the state of the service.
+
+    503: too many lamps waiting for a worker - try again later (Retry-After)
+    504: the lamp was not ready within the wait of the request (the generation goes on, a later request
+         gets it) - or its generation exceeded the time limit of the service (--timeout): its worker is
+         killed and replaced by a new one, a later identical request starts it again
+    422: the lamp failed the pre-flight check ("preflight_check": "error") - the report is returned
+
+python Service.py --port 8080 --workers 4
+python Service.py --socket /tmp/rasterlamp.sock
+
+Copyright (C) 2019 Thomas Minke - tom@der-pfusch.de
+
+License (similar and successors):
+Attribution-NonCommercial-ShareAlike 3.0 Unported (CC BY-NC-SA 3.0)
+https://creativecommons.org/licenses/by-nc-sa/3.0/
+
+"""
+
+import argparse
+import collections
+import concurrent.futures
+import http.server
+import json
+import multiprocessing
+import multiprocessing.connection
+import os
+import shutil
+import socketserver
+import tempfile
+import threading
+import time
+import urllib.parse
+import Rasterlamp
+import RibCache
+
+# format: (content type, view if none is given)
+formats = {
+    'dxf': ("application/dxf", "2D_plotting"),
+    'svg': ("image/svg+xml", "2D_plotting"),
+    'png': ("image/png", "3D_show"),
+    'stl': ("model/stl", "3D_show"),
+    'glb': ("model/gltf-binary", "3D_show"),
+    'json': ("application/json", None),
+    }
+
+# parameters set by the service only
+reserved_parameters = ('file_path', 'file_name', 'cache_path', 'cache_size', 'parallel_workers', 'trace')
+
+chunk_size = 64 * 1024      # in [bytes] - files are streamed in chunks of this size
+poll_interval = 0.5         # in [s] - how often the running generations are checked
+
+
+class Busy(Exception):
+    pass
+
+
+def Warm_Up():
+    # imports & first calculations before the first request
+    lamp = Rasterlamp.Lamp_Calculation(Rasterlamp.default_config)
+    Rasterlamp.Rib_Profiles(Rasterlamp.Lamp_Geometry(lamp))
+
+
+def Worker_Loop(connection):
+    # worker process: warm up, then generate one lamp after another - gets (key, config), sends back
+    # (key, summary, None) or (key, None, error)
+
+    Warm_Up()
+    connection.send(None)       # ready
+    for key, config in iter(connection.recv, None):
+        try:
+            connection.send((key, Rasterlamp.Generate_Variant(config), None))
+        except Exception as error:
+            try:
+                connection.send((key, None, error))
+            except Exception:       # the error can't be pickled
+                connection.send((key, None, RuntimeError("{0}: {1}".format(type(error).__name__, error))))
+
+
+class Worker:
+    # a worker process of the service - killed & replaced if a generation exceeds the time limit
+
+    def __init__(self):
+        self.connection, worker_connection = multiprocessing.Pipe()
+        self.process = multiprocessing.Process(target=Worker_Loop, args=(worker_connection,), daemon=True)
+        self.process.start()
+        worker_connection.close()
+        self.ready = False
+        self.key = None             # lamp being generated
+        self.start = None           # start of its generation
+
+    def Run(self, key, config):
+        self.connection.send((key, config))
+        self.key, self.start = key, time.monotonic()
+
+    def Kill(self):
+        self.process.kill()
+        self.process.join()
+        self.connection.close()
+
+
+class Service:
+    # lamps generated by worker processes of the service - identical requests are generated once
+
+    def __init__(self, base_config, output_path, workers=0, queue_limit=0, keep_results=64, timeout=60):
+        self.base_config = base_config._replace(parallel_workers=1, trace=False)
+        self.output_path = output_path
+        self.workers = workers or os.cpu_count() or 1
+        self.queue_limit = queue_limit or 2 * self.workers     # lamps generated or waiting for a worker
+        self.keep_results = keep_results                        # generated lamps kept (files & summary)
+        self.timeout = timeout                                  # in [s] - time limit of a generation & a request
+
+        self.lock = threading.Lock()
+        self.running = {}                           # key --> future of the generation (waiting or generated)
+        self.waiting = collections.deque()          # (key, config) waiting for a worker
+        self.results = collections.OrderedDict()    # key --> summary, least recently used first
+        self.counts = collections.Counter()
+        self.closed = False
+
+        # the dispatcher thread owns the workers - Submit wakes it up through the pipe
+        self.pool = [Worker() for _ in range(self.workers)]
+        self.wake_receive, self.wake_send = multiprocessing.Pipe(duplex=False)
+        self.dispatcher = threading.Thread(target=self.Dispatch, daemon=True)
+        self.dispatcher.start()
+
+    def Config(self, values, file_format):
+        # configuration & key of a request - raises ValueError for invalid parameters
+
+        if not isinstance(values, dict):
+            raise ValueError("the lamp parameters have to be a json object")
+        reserved = set(values) & set(reserved_parameters)
+        if reserved:
+            raise ValueError("parameter(s) set by the service: {0}".format(", ".join(sorted(reserved))))
+
+        values = dict(values)
+        if formats[file_format][1] is not None:
+            values.setdefault('view', formats[file_format][1])
+        config = Rasterlamp.Config_Update(self.base_config, values)
+        if file_format in ('dxf', 'svg') and config.view == "3D_show" or \
+                file_format in ('png', 'stl', 'glb') and config.view != "3D_show":
+            raise ValueError("view {0} does not produce a .{1} file".format(config.view, file_format))
+
+        key = RibCache.Cache_Key(config._replace(file_path=None, file_name=None)._asdict())
+        return config._replace(file_path=os.path.join(self.output_path, key, ''), file_name='lamp'), key
+
+    def Submit(self, config, key):
+        # future of the summary & how it was found: "hit" (generated before), "joined" (being generated)
+        # or "miss" - raises Busy if too many lamps are waiting
+
+        with self.lock:
+            if key in self.results:
+                self.results.move_to_end(key)
+                self.counts['hit'] += 1
+                future = concurrent.futures.Future()
+                future.set_result(self.results[key])
+                return future, "hit"
+            if key in self.running:
+                self.counts['joined'] += 1
+                return self.running[key], "joined"
+            if len(self.running) >= self.queue_limit:
+                self.counts['busy'] += 1
+                raise Busy()
+            future = concurrent.futures.Future()
+            self.running[key] = future
+            self.counts['miss'] += 1
+
+        os.makedirs(config.file_path, exist_ok=True)
+        with self.lock:
+            self.waiting.append((key, config))
+        self.wake_send.send(None)
+        return future, "miss"
+
+    def Done(self, key, summary):
+        # a lamp is generated (or rejected by the pre-flight check - not kept)
+        with self.lock:
+            future = self.running.pop(key)
+            if 'rejected' in summary:
+                self.Remove(key)
+            else:
+                self.results[key] = summary
+                while len(self.results) > self.keep_results:
+                    self.Remove(self.results.popitem(last=False)[0])
+        future.set_result(summary)
+
+    def Failed(self, key, error, count='error'):
+        # a generation failed or exceeded the time limit - a later identical request starts it again
+        with self.lock:
+            future = self.running.pop(key)
+            self.Remove(key)
+            self.counts[count] += 1
+        future.set_exception(error)
+
+    def Dispatch(self):
+        # thread of the service - hands the waiting lamps to the free workers, takes their results and kills
+        # the workers exceeding the time limit (replaced by a new worker, warming up)
+
+        while not self.closed:
+            connections = {worker.connection: worker for worker in self.pool}
+            for connection in multiprocessing.connection.wait(list(connections) + [self.wake_receive],
+                                                              poll_interval):
+                if connection is self.wake_receive:
+                    self.wake_receive.recv()
+                    continue
+                worker = connections[connection]
+                try:
+                    message = connection.recv()
+                except (EOFError, OSError):     # worker died
+                    if worker.key is not None:
+                        self.Failed(worker.key, RuntimeError("worker process ended"))
+                    self.Replace(worker)
+                    continue
+                if message is None:
+                    worker.ready = True
+                else:
+                    key, summary, error = message
+                    worker.key = worker.start = None
+                    if error is None:
+                        self.Done(key, summary)
+                    else:
+                        self.Failed(key, error)
+
+            for worker in list(self.pool):
+                if worker.key is not None and time.monotonic() - worker.start > self.timeout:
+                    self.Failed(worker.key, TimeoutError("generation exceeded the time limit - worker killed"),
+                                'timeout')
+                    self.Replace(worker)
+
+            with self.lock:
+                for worker in self.pool:
+                    if worker.ready and worker.key is None and self.waiting:
+                        worker.Run(*self.waiting.popleft())
+
+    def Replace(self, worker):
+        worker.Kill()
+        self.pool[self.pool.index(worker)] = Worker()
+
+    def Remove(self, key):
+        shutil.rmtree(os.path.join(self.output_path, key), ignore_errors=True)
+
+    def Open_Result(self, key, config, file_format):
+        # opened output file of a kept lamp (still readable, if the lamp is removed meanwhile) - None if
+        # the lamp is not kept anymore
+        with self.lock:
+            if key not in self.results:
+                return None
+            return open(os.path.join(config.file_path, config.file_name + '.' + file_format), 'rb')
+
+    def Status(self):
+        with self.lock:
+            return {'workers': self.workers, 'queue_limit': self.queue_limit, 'running': len(self.running),
+                    'kept': len(self.results), 'requests': dict(self.counts)}
+
+    def Close(self):
+        self.closed = True
+        self.dispatcher.join()
+        for worker in self.pool:
+            worker.Kill()
+
+
+class Request_Handler(http.server.BaseHTTPRequestHandler):
+
+    protocol_version = "HTTP/1.1"       # keep-alive - bursts of requests use one connection
+
+    def address_string(self):
+        # unix socket: no client address
+        return self.client_address[0] if isinstance(self.client_address, tuple) else "local"
+
+    def Send(self, status, content_type, body, headers=()):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def Send_JSON(self, status, value, headers=()):
+        self.Send(status, formats['json'][0], json.dumps(value).encode(), headers)
+
+    def do_GET(self):
+        if urllib.parse.urlsplit(self.path).path.rstrip('/') == '/status':
+            self.Send_JSON(200, self.server.service.Status())
+        else:
+            self.Send_JSON(404, {'error': "unknown path"})
+
+    def do_POST(self):
+        service = self.server.service
+        url = urllib.parse.urlsplit(self.path)
+        name, _, file_format = url.path.strip('/').partition('.')
+        body = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+
+        if name != 'lamp' or file_format not in formats:
+            self.Send_JSON(404, {'error': "unknown path - POST /lamp.<{0}>".format("|".join(formats))})
+            return
+
+        try:
+            query = urllib.parse.parse_qs(url.query)
+            timeout = min(float(query['timeout'][0]), service.timeout) if 'timeout' in query else service.timeout
+            config, key = service.Config(json.loads(body.decode() or '{}'), file_format)
+        except (ValueError, TypeError) as error:
+            self.Send_JSON(400, {'error': str(error)})
+            return
+
+        for _ in range(2):      # once more if the lamp was removed before its file was opened
+            try:
+                future, state = service.Submit(config, key)
+                summary = future.result(timeout)
+            except Busy:
+                self.Send_JSON(503, {'error': "too many lamps waiting - try again later"}, [("Retry-After", "1")])
+                return
+            except (concurrent.futures.TimeoutError, TimeoutError) as error:
+                # generation stopped (time limit of the service) or still running
+                message = "{0} ({1}s)".format(error, service.timeout) if future.done() else \
+                    "lamp not ready within {0}s".format(timeout)
+                self.Send_JSON(504, {'error': message})
+                return
+            except Exception as error:
+                self.Send_JSON(500, {'error': "{0}: {1}".format(type(error).__name__, error)})
+                return
+
+            headers = [("X-Lamp-Key", key), ("X-Lamp-Cache", state)]
+            if 'rejected' in summary:
+                self.Send_JSON(422, summary['rejected'], headers)
+                return
+            if file_format == 'json':
+                self.Send_JSON(200, summary, headers)
+                return
+
+            try:
+                f = service.Open_Result(key, config, file_format)
+            except FileNotFoundError:
+                self.Send_JSON(404, {'error': "no .{0} file for this lamp".format(file_format)})
+                return
+            if f is not None:
+                break
+        else:
+            self.Send_JSON(503, {'error': "too many lamps requested - try again later"}, [("Retry-After", "1")])
+            return
+
+        # stream the file
+        with f:
+            self.send_response(200)
+            self.send_header("Content-Type", formats[file_format][0])
+            self.send_header("Content-Length", str(os.fstat(f.fileno()).st_size))
+            for name, value in headers:
+                self.send_header(name, value)
+            self.end_headers()
+            shutil.copyfileobj(f, self.wfile, chunk_size)
+
+
+class HTTP_Server(socketserver.ThreadingMixIn, http.server.HTTPServer):
+    daemon_threads = True
+
+
+class Unix_Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Generates lamps on request - see the description of Service.py")
+    parser.add_argument('--host', default='127.0.0.1', help="address of the HTTP service")
+    parser.add_argument('--port', type=int, default=8080, help="port of the HTTP service")
+    parser.add_argument('--socket', metavar='PATH', help="unix socket instead of the HTTP port")
+    parser.add_argument('--workers', type=int, default=0, help="worker processes - 0: one per CPU core")
+    parser.add_argument('--queue', type=int, default=0,
+                        help="max. lamps generated or waiting - more get 503 (0: twice the workers)")
+    parser.add_argument('--keep', type=int, default=64, help="number of generated lamps kept for identical requests")
+    parser.add_argument('--timeout', type=float, default=60, help="time limit of a generation & max. wait of a request in [s]")
+    parser.add_argument('--output', metavar='PATH', help="folder for the generated files (default: temporary)")
+    parser.add_argument('--set', action='append', default=[], metavar='PARAMETER=VALUE',
+                        help="change a value of the base configuration (see Rasterlamp.py)")
+    args = parser.parse_args()
+
+    base_config = Rasterlamp.default_config
+    for setting in args.set:
+        name, _, value = setting.partition('=')
+        base_config = Rasterlamp.Config_Update(base_config, {name.strip(): Rasterlamp.Parse_Value(value)})
+
+    output_path = args.output or tempfile.mkdtemp(prefix='rasterlamp_')
+    service = Service(base_config, output_path, args.workers, args.queue, args.keep, args.timeout)
+
+    if args.socket:
+        if os.path.exists(args.socket):
+            os.remove(args.socket)
+        server = Unix_Server(args.socket, Request_Handler)
+        print("serving on {0} - {1} workers".format(args.socket, service.workers))
+    else:
+        server = HTTP_Server((args.host, args.port), Request_Handler)
+        print("serving on http://{0}:{1} - {2} workers".format(args.host, args.port, service.workers))
+    server.service = service
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.Close()
+        if not args.output:
+            shutil.rmtree(output_path, ignore_errors=True)
@@ -0,0 +1,209 @@
+"""
+Toolpath for Rasterlamp - cutting order of the contours on a material sheet for the laser
+
+Each contour is cut as closed loop from its start point back to it, so the laser travels from start
+point to start point. The holes of a part are cut before its outer contour - the part drops out of the
+sheet just with its last cut. The order:
+
+- nearest neighbour from the machine origin: always the closest contour allowed next (all holes of a
+  part first), entering it at its closest point
+- 2-opt: reverses sections of the order as long as the travel gets shorter (keeping holes before outer)
+- start points: each contour is entered at the point closest to the previous and the next start point
+
+Copyright (C) 2019 Thomas Minke - tom@der-pfusch.de
+
+License (similar and successors):
+Attribution-NonCommercial-ShareAlike 3.0 Unported (CC BY-NC-SA 3.0)
+https://creativecommons.org/licenses/by-nc-sa/3.0/
+
+"""
+
+import numpy as np
+import Arcs
+import Nesting
+
+origin = (0.0, 0.0)     # machine position at the start
+max_passes = 20         # 2-opt: max. passes over the whole order
+
+
+def Point_Inside(point, ring):
+    # even-odd rule
+    x, y = point
+    x_a, y_a = ring[:, 0], ring[:, 1]
+    x_b, y_b = np.roll(x_a, -1), np.roll(y_a, -1)
+    crossing = (y_a > y) != (y_b > y)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        x_cross = x_a + (y - y_a) * (x_b - x_a) / (y_b - y_a)
+    return bool(np.count_nonzero(crossing & (x < x_cross)) % 2)
+
+
+def Contours(parts):
+    # contours of the placed parts (each a list of rings) - returns the points (n, 2) of each contour and
+    # for each the index of the outer contour around it that has to be cut after it (-1 for outer contours)
+    # outer contours are counter-clockwise, holes clockwise (see Native2D.Evaluate_Expression) - a hole
+    # belongs to the smallest outer contour of its part around it
+
+    points = []
+    after = []
+    for rings in parts:
+        start = len(points)
+        contours = [np.asarray(ring, dtype=float) for ring in rings]
+        areas = [Nesting.Ring_Area(ring) for ring in rings]
+        outer = sorted((number for number, area in enumerate(areas) if area > 0), key=lambda number: areas[number])
+        for number, contour in enumerate(contours):
+            around = [start + other for other in outer if areas[number] < 0 and Point_Inside(contour[0], contours[other])]
+            after.append(around[0] if around else -1)
+        points += contours
+    return points, np.array(after, dtype=int)
+
+
+def Nearest_Neighbour(points, after):
+    # order & start point (vertex index) of each contour: closest contour allowed next (all holes cut
+    # before their outer contour)
+
+    vertices = np.concatenate(points) if points else np.zeros((0, 2))
+    owners = np.repeat(np.arange(len(points)), [len(contour) for contour in points])
+    offsets = np.cumsum([0] + [len(contour) for contour in points])
+    holes_left = np.bincount(after[after >= 0], minlength=len(points))
+    available = np.repeat(holes_left == 0, [len(contour) for contour in points])
+
+    order = []
+    starts = [0] * len(points)
+    position = np.asarray(origin)
+    for _ in range(len(points)):
+        distances = np.where(available, np.hypot(*(vertices - position).T), np.inf)
+        vertex = int(np.argmin(distances))
+        contour = owners[vertex]
+        order.append(contour)
+        starts[contour] = int(vertex - offsets[contour])
+        position = vertices[vertex]
+
+        available[offsets[contour]:offsets[contour + 1]] = False
+        if after[contour] >= 0:
+            holes_left[after[contour]] -= 1
+            if holes_left[after[contour]] == 0:
+                outer = after[contour]
+                available[offsets[outer]:offsets[outer + 1]] = True
+
+    return order, starts
+
+
+def Latest_Holes(order, after):
+    # for each position of the order: latest position of a hole of the contour there (-1: none / a hole)
+    position = np.empty(len(order), dtype=int)
+    position[order] = np.arange(len(order))
+    latest = np.full(len(order), -1)
+    holes = np.nonzero(after >= 0)[0]
+    np.maximum.at(latest, position[after[holes]], position[holes])
+    return latest
+
+
+def Two_Opt(order, entries, after):
+    # reverses sections order[i..j] while the travel between the entry points gets shorter - a section may
+    # not hold a hole and its outer contour (the reversal would cut the outer one first)
+    # entries: entry point of each contour (n, 2)
+
+    order = np.array(order, dtype=int)
+    count = len(order)
+    for _ in range(max_passes):
+        improved = False
+        path = np.vstack((origin, entries[order]))      # path[k + 1] is the entry of order[k]
+        latest = Latest_Holes(order, after)
+        for i in range(count - 1):
+            j = np.arange(i + 1, count)
+            before, first, last = path[i], path[i + 1], path[j + 1]
+            following = path[np.minimum(j + 2, count)]
+            delta = np.hypot(*(before - last).T) - np.hypot(*(before - first)) + np.where(
+                j + 1 < count, np.hypot(*(first - following).T) - np.hypot(*(last - following).T), 0.0)
+            valid = np.maximum.accumulate(latest[i:])[1:] < i
+            delta = np.where(valid, delta, np.inf)
+
+            best = int(np.argmin(delta))
+            if delta[best] < -1e-9:
+                end = j[best] + 1
+                order[i:end] = order[i:end][::-1]
+                path[i + 1:end + 1] = path[i + 1:end + 1][::-1]
+                latest = Latest_Holes(order, after)
+                improved = True
+        if not improved:
+            break
+    return order.tolist()
+
+
+def Start_Points(points, order, starts, passes=2):
+    # start point (vertex index) of each contour closest to the start points of the previous and the next
+    # contour - starts: initial start point of each contour
+
+    starts = list(starts)
+    for _ in range(passes):
+        for number, contour in enumerate(order):
+            previous = np.asarray(origin) if number == 0 else points[order[number - 1]][starts[order[number - 1]]]
+            distances = np.hypot(*(points[contour] - previous).T)
+            if number + 1 < len(order):
+                following = points[order[number + 1]][starts[order[number + 1]]]
+                distances = distances + np.hypot(*(points[contour] - following).T)
+            starts[contour] = int(np.argmin(distances))
+    return starts
+
+
+def Path_Lengths(points, order, starts):
+    # length of the cuts and of the travel between the start points (starts: start point of each contour)
+    cut = sum(float(np.sum(np.hypot(*(np.roll(points[contour], -1, axis=0) - points[contour]).T)))
+              for contour in order)
+    path = np.vstack([origin] + [points[contour][starts[contour]] for contour in order])
+    travel = float(np.sum(np.hypot(*np.diff(path, axis=0).T)))
+    return cut, travel
+
+
+def Machine_Time(cut, travel, contours, cut_speed, travel_speed, pierce_time):
+    # in [s] - cutting, travel & piercing of every contour
+    return cut / cut_speed + travel / travel_speed + contours * pierce_time
+
+
+def Order_Contours(parts, cut_speed, travel_speed, pierce_time):
+    # cutting order of the placed parts (each a list of rings) on one sheet - returns the rings in that
+    # order, each starting at its start point, and the lengths & estimated times (unordered: as given)
+
+    points, after = Contours(parts)
+    order, starts = Nearest_Neighbour(points, after)
+    entries = np.array([points[contour][starts[contour]] for contour in range(len(points))]).reshape(-1, 2)
+    order = Two_Opt(order, entries, after)
+    starts = Start_Points(points, order, starts)
+
+    cut, travel = Path_Lengths(points, order, starts)
+    _, travel_unordered = Path_Lengths(points, range(len(points)), [0] * len(points))
+    rings = [[tuple(point) for point in np.roll(points[contour], -starts[contour], axis=0).tolist()]
+             for contour in order]
+
+    return rings, {'contours': len(points), 'cut_length': cut, 'travel_length': travel,
+                   'travel_unordered': travel_unordered,
+                   'cut_time': cut / cut_speed + len(points) * pierce_time, 'travel_time': travel / travel_speed,
+                   'time': Machine_Time(cut, travel, len(points), cut_speed, travel_speed, pierce_time),
+                   'time_unordered': Machine_Time(cut, travel_unordered, len(points), cut_speed, travel_speed,
+                                                  pierce_time)}
+
+
+def Write_GCode(file_out, arcs, cut_speed, travel_speed):
+    # simple G-code of the ordered rings: rapid move to the start point, laser on (M3), cut the closed
+    # loop, laser off (M5) - speeds in [mm/s]
+    # arcs: (ring, bulges) of each ring (see Native2D.Ring_Arcs) - arcs are cut as G2 / G3 (center relative
+    # to the start point)
+
+    lines = ["; Rasterlamp - {0} contours".format(len(arcs)), "G21", "G90", "M5"]
+    for ring, bulges in arcs:
+        lines.append("G0 X{0:.3f} Y{1:.3f} F{2:.0f}".format(ring[0][0], ring[0][1], travel_speed * 60))
+        lines.append("M3")
+        for number, start in enumerate(ring):
+            x, y = ring[(number + 1) % len(ring)]
+            if bulges and bulges[number]:
+                (center_x, center_y), _ = Arcs.Arc_Center(start, (x, y), bulges[number])
+                lines.append("{0} X{1:.3f} Y{2:.3f} I{3:.3f} J{4:.3f} F{5:.0f}".format(
+                    "G3" if bulges[number] > 0 else "G2", x, y, center_x - start[0], center_y - start[1],
+                    cut_speed * 60))
+            else:
+                lines.append("G1 X{0:.3f} Y{1:.3f} F{2:.0f}".format(x, y, cut_speed * 60))
+        lines.append("M5")
+    lines += ["G0 X{0:.3f} Y{1:.3f}".format(*origin), "M2"]
+
+    with open(file_out, "w") as f:
+        f.write("\n".join(lines) + "\n")
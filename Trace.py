@@ -0,0 +1,153 @@
+"""
+Instrumentation for Rasterlamp - timing spans of the generation stages, written as trace file
+(Chrome trace event format - open in chrome://tracing or https://ui.perfetto.dev) and a summary table
+
+Tracing is off until Start() is called: Span() then returns a shared object doing nothing, so the
+instrumented code costs just a function call. Worker processes collect their own events (Start/Stop
+in the job) and hand them back to the main process, see Add().
+
+Copyright (C) 2019 Thomas Minke - tom@der-pfusch.de
+
+License (similar and successors):
+Attribution-NonCommercial-ShareAlike 3.0 Unported (CC BY-NC-SA 3.0)
+https://creativecommons.org/licenses/by-nc-sa/3.0/
+
+"""
+
+import json
+import os
+import subprocess
+import threading
+import time
+
+try:
+    import resource     # CPU time of subprocesses - not available on Windows
+except ImportError:
+    resource = None
+
+_events = None          # list of the recorded events - None: tracing is off
+_process = None         # process that started the tracing - forked workers don't record into a copy
+
+
+def Active():
+    return _events is not None and os.getpid() == _process
+
+
+def Start():
+    # starts recording (again) in this process
+    global _events, _process
+    _events = []
+    _process = os.getpid()
+
+
+def Stop():
+    # stops recording - returns the recorded events
+    global _events
+    events = _events if Active() else []
+    _events = None
+    return events
+
+
+def Add(events):
+    # adds events recorded in another process
+    if Active():
+        _events.extend(events)
+
+
+def Timestamp():
+    # [µs] - monotonic clock of the system, comparable between the processes
+    return time.perf_counter() * 1e6
+
+
+class _Span:
+    # records a complete event ("X") on exit - args can be extended while the span is open
+
+    __slots__ = ('name', 'category', 'args', 'start')
+
+    def __init__(self, name, category, args):
+        self.name = name
+        self.category = category
+        self.args = args
+
+    def __enter__(self):
+        self.start = Timestamp()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        _events.append({'name': self.name, 'cat': self.category, 'ph': "X", 'ts': self.start,
+                        'dur': Timestamp() - self.start, 'pid': _process, 'tid': threading.get_ident(),
+                        'args': self.args})
+        return False
+
+
+class _NoSpan:
+    # stands in for _Span while tracing is off
+
+    __slots__ = ()
+    args = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+no_span = _NoSpan()
+
+
+def Span(name, category="stage", **args):
+    # with Trace.Span("holes", rib="Rib_x_3"): ...
+    if _events is None or os.getpid() != _process:
+        return no_span
+    return _Span(name, category, args)
+
+
+def Run_Subprocess(command, **kwargs):
+    # subprocess.run, traced with the wall time and the CPU time of the subprocess
+
+    if not Active():
+        return subprocess.run(command, **kwargs)
+
+    usage_start = resource.getrusage(resource.RUSAGE_CHILDREN) if resource else None
+    with Span(os.path.basename(command[0]), category="subprocess", command=" ".join(command)) as span:
+        try:
+            return subprocess.run(command, **kwargs)
+        finally:
+            span.args['wall'] = (Timestamp() - span.start) / 1e6
+            if usage_start is not None:
+                usage_end = resource.getrusage(resource.RUSAGE_CHILDREN)
+                span.args['cpu'] = (usage_end.ru_utime - usage_start.ru_utime
+                                    + usage_end.ru_stime - usage_start.ru_stime)
+
+
+def Write_Trace(file_out, events):
+    # Chrome trace event format - timestamps start at 0
+    start = min((event['ts'] for event in events), default=0.0)
+    trace_events = [dict(event, ts=event['ts'] - start) for event in events]
+    with open(file_out, "w") as f:
+        json.dump({'traceEvents': trace_events, 'displayTimeUnit': "ms"}, f)
+
+
+def Summary(events):
+    # table of the spans by category & name: count, total, mean & max time, sums of the numeric args
+
+    stages = {}
+    for event in events:
+        stage = stages.setdefault((event['cat'], event['name']), {'count': 0, 'total': 0.0, 'max': 0.0, 'args': {}})
+        stage['count'] += 1
+        stage['total'] += event['dur'] / 1e6
+        stage['max'] = max(stage['max'], event['dur'] / 1e6)
+        for key, value in event['args'].items():
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                stage['args'][key] = stage['args'].get(key, 0) + value
+
+    lines = ["{0:<30}{1:>7}{2:>11}{3:>11}{4:>11}  {5}".format(
+        "stage", "count", "total[s]", "mean[ms]", "max[ms]", "sums")]
+    for (category, name), stage in sorted(stages.items(), key=lambda item: -item[1]['total']):
+        sums = ", ".join("{0}={1:.6g}".format(key, value) for key, value in sorted(stage['args'].items()))
+        lines.append("{0:<30}{1:>7}{2:>11.3f}{3:>11.2f}{4:>11.2f}  {5}".format(
+            category + ":" + name, stage['count'], stage['total'], stage['total'] / stage['count'] * 1e3,
+            stage['max'] * 1e3, sums))
+
+    return "\n".join(lines)
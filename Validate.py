@@ -0,0 +1,199 @@
+"""
+Pre-flight check for Rasterlamp - finds weak or broken spots of the ribs on the sampled profiles,
+before any SCAD-object is built or rendered
+
+All checks work on the (ribs x samples) arrays of Rasterlamp.Rib_Profiles, one rib family at once:
+
+- out_of_domain:     outline samples without a value (-1 of Circle_Coords_Z, nan) next to samples above
+                     the lamp base - the perimeter jumps there instead of following the curve - and
+                     crossing points without a value where the crossing rib needs a slot
+- web_width:         material between a hole and the perimeters (measured across the slope) or the
+                     neighbouring slot thinner than min_web_width
+- edge_length:       outline points closer than min_edge_length, holes and slots less high than it
+- slot_depth:        material left above/below the slot for the crossing rib thinner than min_web_width
+- self_intersection: holes with the top below the bottom (rib too narrow for the residues) or no
+                     width left between the slots, outlines running backwards
+
+Every finding is one spot: check, rib, x & z of the spot (half-rib coordinates, as Rib_Profile),
+the measured value and its limit.
+
+Copyright (C) 2019 Thomas Minke - tom@der-pfusch.de
+
+License (similar and successors):
+Attribution-NonCommercial-ShareAlike 3.0 Unported (CC BY-NC-SA 3.0)
+https://creativecommons.org/licenses/by-nc-sa/3.0/
+
+"""
+
+import collections
+import numpy as np
+
+checks = ('out_of_domain', 'web_width', 'edge_length', 'slot_depth', 'self_intersection')
+
+
+class Preflight_Error(ValueError):
+    # raised for a lamp failing the check - the report is attached
+
+    def __init__(self, report):
+        ValueError.__init__(self, "pre-flight check failed: " + ", ".join(
+            "{0} {1}".format(count, check) for check, count in report['counts'].items() if count))
+        self.report = report
+
+
+def Findings(check, mask, rib_names, x_coords, z_coords, values, limit):
+    # one finding per True of the mask (first axis: ribs) - x, z & values of the same shape as the mask
+    return [{'check': check, 'rib': rib_names[index[0]], 'x': float(x_coords[index]), 'z': float(z_coords[index]),
+             'value': float(values[index]), 'limit': limit}
+            for index in zip(*np.nonzero(mask))]
+
+
+def Worst_Sample(values, *arrays):
+    # minimum of the values along the last axis (one per hole) and the arrays at its position
+    position = np.argmin(values, axis=-1)[..., None]
+    return [np.take_along_axis(array, position, axis=-1)[..., 0] for array in (values,) + arrays]
+
+
+def Invalid(z_coords):
+    return ~np.isfinite(z_coords) | (z_coords == -1)
+
+
+def Check_Domain(z_coords, lamp_base):
+    # invalid samples with a neighbour (along the last axis) above the lamp base
+    invalid = Invalid(z_coords)
+    above = ~invalid & (z_coords > lamp_base)
+    neighbour = np.zeros_like(invalid)
+    neighbour[..., 1:] |= above[..., :-1]
+    neighbour[..., :-1] |= above[..., 1:]
+    return invalid & neighbour
+
+
+def Check_Crossings(z_rib, base_rib, z_partner, base_partner, rib_names, x_coords, lamp):
+    # crossing points of the ribs (ribs x crossings) and the same points on the crossing ribs - the rib has
+    # no value (no slot, see Rect_Rib_Cutouts) where the crossing rib stands above its lamp base
+    missing = Invalid(z_rib) & ~Invalid(z_partner) & (z_partner - base_partner > lamp.min_edge_length)
+    return Findings('out_of_domain', missing, rib_names, x_coords, np.full(z_rib.shape, base_rib), z_rib, -1)
+
+
+def Check_Family(lamp, family_profile, rows, rib_names, lamp_base, slot_location, outline_sampled):
+    # all checks for the ribs 'rows' of one family of Rib_Profiles - returns the list of findings
+    # slot_location: "inner" or "outer" - see Rect_Rib_Cutouts
+    # outline_sampled: the outline is drawn as polygon (else as arc - its samples are not used)
+
+    findings = []
+    sections = family_profile['sections']
+    outer = family_profile['outer'][rows]
+    inner = family_profile['inner'][rows]
+    x_coords = family_profile['x']
+    x_coords = np.broadcast_to(x_coords[rows] if x_coords.ndim == 2 else x_coords, outer.shape)
+    residue = lamp.rib_cutout_residue
+
+    def Section(array, section):
+        values = array[:, sections[section]]
+        if section == 'holes':
+            values = values.reshape((len(rows),) + tuple(family_profile['hole_shape']))
+        return values
+
+    # outline (if drawn from the samples) - domain, edges & direction
+    # (holes treat missing values like samples below the lamp base, see Rib_Holes_Rectangular)
+    if outline_sampled:
+        outline_x, outline_z = Section(x_coords, 'outline'), Section(outer, 'outline')
+        findings += Findings('out_of_domain', Check_Domain(outline_z, lamp_base), rib_names,
+                             outline_x, np.full(outline_z.shape, lamp_base), outline_z, -1)
+        edge_x, edge_z = np.diff(outline_x, axis=1), np.diff(outline_z, axis=1)
+        used = ~Invalid(outline_z[:, 1:]) & ~Invalid(outline_z[:, :-1]) & (outline_z[:, 1:] > lamp_base)
+        edge_length = np.hypot(edge_x, edge_z)
+        findings += Findings('edge_length', used & (edge_length < lamp.min_edge_length), rib_names,
+                             outline_x[:, 1:], outline_z[:, 1:], edge_length, lamp.min_edge_length)
+        findings += Findings('self_intersection', used & (edge_x < 0), rib_names,
+                             outline_x[:, 1:], outline_z[:, 1:], edge_x, 0.0)
+
+    # slots - material left above (inner slots) or below (outer slots) the slot, see Rect_Rib_Cutouts
+    crossing_x, crossing_z = Section(x_coords, 'crossing'), Section(outer, 'crossing')
+    slotted = ~Invalid(crossing_z) & (crossing_z > lamp_base)
+    cutout_height = np.where(crossing_z - lamp.arc_height_main_rib < lamp_base, crossing_z - lamp_base,
+                             lamp.arc_height_main_rib)
+    if slot_location == "inner":
+        slot_center = np.where(crossing_z - lamp.arc_height_main_rib > lamp_base,
+                               crossing_z - lamp.arc_height_main_rib, lamp_base)
+        remaining = crossing_z - (slot_center + cutout_height / 2)
+    else:
+        remaining = crossing_z - cutout_height / 2 - np.maximum(crossing_z - lamp.arc_height_main_rib, lamp_base)
+    findings += Findings('slot_depth', slotted & (remaining < lamp.min_web_width), rib_names,
+                         crossing_x, crossing_z, remaining, lamp.min_web_width)
+    findings += Findings('edge_length', slotted & (cutout_height < lamp.min_edge_length), rib_names,
+                         crossing_x, crossing_z, cutout_height, lamp.min_edge_length)
+
+    # holes - top follows the outer, bottom the inner perimeter (cut at the residue above the lamp base)
+    holes_x, holes_outer, holes_inner = (Section(array, 'holes') for array in (x_coords, outer, inner))
+    hole_cutoff = lamp_base + residue
+    hole_top = holes_outer - residue
+    hole_bottom = np.maximum(holes_inner + residue, hole_cutoff)
+    clearance = hole_top - hole_bottom
+    valid = ~Invalid(holes_outer) & (hole_top > hole_cutoff)
+    drawn = valid & (clearance > 0)
+    hole_drawn = drawn.any(axis=-1)
+
+    # top below the bottom: the hole polygon crosses itself
+    worst, worst_x, worst_z = Worst_Sample(np.where(valid, clearance, np.inf), holes_x, hole_top)
+    findings += Findings('self_intersection', worst < 0, rib_names, worst_x, worst_z, worst, 0.0)
+
+    # no width left between the slots
+    design_width = np.full(hole_drawn.shape, family_profile['dist_ribs'] - 2 * residue - lamp.thickness_material)
+    findings += Findings('self_intersection', valid.any(axis=-1) & (design_width <= 0), rib_names,
+                         holes_x[..., 0], hole_top[..., 0], design_width, 0.0)
+
+    # slivers - holes nowhere higher or wider than the min. edge length (a single sample: no width at all)
+    hole_width = holes_x[..., -1] - holes_x[..., 0]
+    highest = np.where(drawn, clearance, 0.0).max(axis=-1)
+    findings += Findings('edge_length', hole_drawn & ((highest < lamp.min_edge_length) |
+                                                      (hole_width < lamp.min_edge_length)), rib_names,
+                         holes_x[..., 0], hole_bottom[..., 0], np.minimum(highest, hole_width), lamp.min_edge_length)
+
+    # webs to the perimeters - the vertical residue gets thinner across a sloped perimeter
+    if holes_x.shape[-1] > 1:
+        with np.errstate(invalid='ignore', divide='ignore'):
+            slope_outer = np.gradient(holes_outer, axis=-1) / np.gradient(holes_x, axis=-1)
+            slope_inner = np.gradient(holes_inner, axis=-1) / np.gradient(holes_x, axis=-1)
+    else:
+        slope_outer = slope_inner = np.zeros(holes_x.shape)
+    web_top = residue / np.sqrt(1 + slope_outer ** 2)
+    web_bottom = np.where(holes_inner + residue > hole_cutoff, residue / np.sqrt(1 + slope_inner ** 2), np.inf)
+    web = np.where(drawn, np.minimum(web_top, web_bottom), np.inf)
+    worst, worst_x, worst_z = Worst_Sample(web, holes_x, hole_top)
+    findings += Findings('web_width', worst < lamp.min_web_width, rib_names, worst_x, worst_z, worst,
+                         lamp.min_web_width)
+
+    # webs to the slots on both sides of the hole
+    slot_half_width = lamp.thickness_material / 2 + lamp.tolerance
+    slot_web = np.minimum(holes_x[..., 0] - (crossing_x[:, :holes_x.shape[1]] + slot_half_width),
+                          crossing_x[:, :holes_x.shape[1]] + family_profile['dist_ribs'] - slot_half_width
+                          - holes_x[..., -1])
+    findings += Findings('web_width', hole_drawn & (slot_web < lamp.min_web_width), rib_names,
+                         holes_x[..., 0], hole_top[..., 0], slot_web, lamp.min_web_width)
+
+    return findings
+
+
+def Report(findings, ribs):
+    # structured report of all findings - counts per check
+    counts = collections.OrderedDict((check, 0) for check in checks)
+    for finding in findings:
+        counts[finding['check']] += 1
+    return {'ok': not findings, 'ribs': ribs, 'counts': counts, 'findings': findings}
+
+
+def Report_Text(report, spots=3):
+    # short text of the report - number of findings per check and the worst spots of each
+    if report['ok']:
+        return "pre-flight check: {0} ribs ok".format(report['ribs'])
+
+    lines = ["pre-flight check: {0} ribs, {1} findings".format(report['ribs'], len(report['findings']))]
+    for check, count in report['counts'].items():
+        if not count:
+            continue
+        findings = sorted((finding for finding in report['findings'] if finding['check'] == check),
+                          key=lambda finding: finding['value'] - finding['limit'])
+        lines.append("  {0:<18}{1:>6}".format(check, count))
+        for finding in findings[:spots]:
+            lines.append("    {rib:<10} x={x:8.2f} z={z:8.2f}  {value:8.3f} (limit {limit})".format(**finding))
+    return "\n".join(lines)
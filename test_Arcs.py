@@ -0,0 +1,137 @@
+"""
+Tests of the arc fitting (see Arcs) - the fitted arcs are compared with the polyline they replace, the
+arcs written to svg, dxf & G-code with the arcs given
+
+python -m pytest test_Arcs.py
+
+Copyright (C) 2019 Thomas Minke - tom@der-pfusch.de
+
+License (similar and successors):
+Attribution-NonCommercial-ShareAlike 3.0 Unported (CC BY-NC-SA 3.0)
+https://creativecommons.org/licenses/by-nc-sa/3.0/
+
+"""
+
+import math
+import numpy as np
+import Arcs
+import Native2D
+import Toolpath
+
+tolerance = 0.01    # in [mm]
+
+
+def Circle_Ring(radius, points, start_angle=0.0):
+    # counter-clockwise ring with all points on the circle
+    return [(radius * math.cos(start_angle + 2 * math.pi * number / points),
+             radius * math.sin(start_angle + 2 * math.pi * number / points)) for number in range(points)]
+
+
+def Fit_Deviation(ring, starts, bulges, samples=9):
+    # max. distance of the polyline (points & edges) from the arc or straight edge fitted to it
+
+    ring = [tuple(point) for point in ring]
+    index = {point: number for number, point in enumerate(ring)}
+    deviation = 0.0
+    for number, (start, bulge) in enumerate(zip(starts, bulges)):
+        end = starts[(number + 1) % len(starts)]
+        first, last = index[tuple(start)], index[tuple(end)]
+        run = [ring[(first + step) % len(ring)] for step in range((last - first) % len(ring) or len(ring))] + [end]
+        points = np.array([np.add(np.multiply(a, 1 - t), np.multiply(b, t))
+                           for a, b in zip(run[:-1], run[1:]) for t in np.linspace(0, 1, samples)])
+        if bulge:
+            center, radius = Arcs.Arc_Center(start, end, bulge)
+            distances = np.abs(np.hypot(*(points - center).T) - radius)
+        else:
+            chord = np.subtract(end, start)
+            distances = np.abs((points - start) @ np.array([chord[1], -chord[0]])) / math.hypot(*chord)
+        deviation = max(deviation, float(np.max(distances)))
+    return deviation
+
+
+def test_circle_becomes_arcs():
+    # finely tessellated circle --> few arcs along the polyline
+    ring = Circle_Ring(50.0, 360)
+    starts, bulges = Arcs.Fit_Ring(ring, tolerance)
+    assert len(starts) <= 4
+    assert any(bulge > 0 for bulge in bulges)
+    assert Fit_Deviation(ring, starts, bulges) <= tolerance
+
+
+def test_low_poly_edges_stay_straight():
+    # long straight edges with their ends on a circle (low poly perimeter) are no arcs
+    ring = Circle_Ring(175.0, 24)
+    starts, bulges = Arcs.Fit_Ring(ring, tolerance)
+    assert starts == ring
+    assert not any(bulges)
+    assert Fit_Deviation(ring, starts, bulges) <= tolerance
+
+
+def test_mixed_ring_within_tolerance():
+    # half circle (fine) closed by a low poly half (coarse) and a slot - every edge within the tolerance
+    fine = [(100 * math.cos(math.pi * step / 180), 100 * math.sin(math.pi * step / 180)) for step in range(181)]
+    coarse = [(100 * math.cos(math.pi + math.pi * step / 6), 100 * math.sin(math.pi + math.pi * step / 6))
+              for step in range(1, 3)]
+    slot = [(0.0, -100.0), (0.0, -80.0), (3.0, -80.0), (3.0, -99.955)]
+    ring = fine + coarse + slot + [(100 * math.cos(-math.pi * step / 180), 100 * math.sin(-math.pi * step / 180))
+                                   for step in range(88, 0, -1)]
+    starts, bulges = Arcs.Fit_Ring(ring, tolerance)
+    assert len(starts) < len(ring) // 10
+    assert Fit_Deviation(ring, starts, bulges) <= tolerance
+    assert (0.0, -80.0) in starts and (3.0, -80.0) in starts
+
+
+# -------------------------------------------------------------------------------------------------------
+# the arcs in the output files - center as given by Arcs.Arc_Center
+
+def SVG_Arc_Center(start, command):
+    # center of an svg arc "A rx,ry rotation large sweep x,y" from start (svg endpoint parameterization,
+    # circles only)
+    _, radii, _, large, sweep, end = command.split()
+    radius = float(radii.split(',')[0])
+    end = tuple(float(value) for value in end.split(','))
+    half_x, half_y = (start[0] - end[0]) / 2, (start[1] - end[1]) / 2
+    factor = math.sqrt(max(0.0, radius ** 2 / (half_x ** 2 + half_y ** 2) - 1))
+    if large == sweep:
+        factor = -factor
+    return (factor * half_y + (start[0] + end[0]) / 2, -factor * half_x + (start[1] + end[1]) / 2)
+
+
+def Arc_Cases():
+    # (start, end, bulge): quarter arcs both ways around the origin, an arc above 180°
+    quarter = math.tan(math.radians(90) / 4)
+    return [((50.0, 0.0), (0.0, 50.0), quarter), ((0.0, 50.0), (50.0, 0.0), -quarter),
+            ((50.0, 0.0), (0.0, -50.0), math.tan(math.radians(270) / 4))]
+
+
+def test_svg_arc_center():
+    for start, end, bulge in Arc_Cases():
+        path = Native2D.SVG_Ring([start, end], [bulge, 0.0])
+        command = path[path.index("A"):path.index(" z")]
+        center_x, center_y = SVG_Arc_Center((start[0], -start[1]), command)     # y-axis flipped in svg
+        (expected_x, expected_y), _ = Arcs.Arc_Center(start, end, bulge)
+        assert abs(center_x - expected_x) < 1e-6 and abs(-center_y - expected_y) < 1e-6
+        assert abs(expected_x) < 1e-6 and abs(expected_y) < 1e-6
+
+
+def test_dxf_bulges_read_back(tmp_path):
+    # bulges written to the dxf come back as points on the circle around the origin
+    file_out = str(tmp_path / "arcs.dxf")
+    for start, end, bulge in Arc_Cases():
+        Native2D.Write_DXF_Arcs(file_out, [([start, end], [bulge, 0.0])])
+        with open(file_out) as f:
+            ring, = Native2D.Read_DXF(f.read())
+        assert len(ring) > 2
+        assert all(abs(math.hypot(x, y) - 50.0) < 1e-6 for x, y in ring)
+
+
+def test_gcode_arc_center(tmp_path):
+    file_out = str(tmp_path / "arcs.gcode")
+    for start, end, bulge in Arc_Cases():
+        Toolpath.Write_GCode(file_out, [([start, end], [bulge, 0.0])], cut_speed=20, travel_speed=200)
+        with open(file_out) as f:
+            arc, = [line.split() for line in f if line.split()[0] in ("G2", "G3")]
+        assert arc[0] == ("G3" if bulge > 0 else "G2")
+        values = {word[0]: float(word[1:]) for word in arc[1:]}
+        assert abs(start[0] + values['I']) < 1e-3 and abs(start[1] + values['J']) < 1e-3
+        assert (values['X'], values['Y']) == end
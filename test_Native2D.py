@@ -0,0 +1,71 @@
+"""
+Tests of the native 2D backend (see Native2D) - outlines of slotted ribs against hand-computed areas, the
+orientation of the rings (outer counter-clockwise, holes clockwise)
+
+python -m pytest test_Native2D.py
+
+Copyright (C) 2019 Thomas Minke - tom@der-pfusch.de
+
+License (similar and successors):
+Attribution-NonCommercial-ShareAlike 3.0 Unported (CC BY-NC-SA 3.0)
+https://creativecommons.org/licenses/by-nc-sa/3.0/
+
+"""
+
+from solid import difference, square, translate, union
+import Native2D
+import Nesting
+import RibModel
+
+
+def Slotted_Rib():
+    # half-rib (x >= 0) of a 100 x 40 rib: arch 80 x 10 cut from the bottom, a slot 3 x 10 from the top,
+    # a hole 5 x 5 (all mirrored) and a hole 8 x 4 on the axis
+    return RibModel.Rib(rectangles=[(20, 30, 23, 40), (0, 28, 4, 32)],
+                        holes=[[(10, 20), (15, 20), (15, 25), (10, 25)]],
+                        outer=[(0, 0), (50, 0), (50, 40), (0, 40)],
+                        inner=[(0, 0), (40, 0), (40, 10), (0, 10)])
+
+
+slotted_area = 100 * 40 - 80 * 10 - 2 * 3 * 10 - 2 * 5 * 5 - 8 * 4
+slotted_holes = 3      # 2 holes 5 x 5 & the hole on the axis - the slots open to the perimeter
+
+
+def test_slotted_rib_area():
+    rings = RibModel.Rib_Rings(Slotted_Rib())
+    assert len(rings) == 1 + slotted_holes
+    assert abs(Nesting.Part_Area(rings) - slotted_area) < 1e-9
+
+
+def test_ring_orientation():
+    # one counter-clockwise outer ring (the full area around the holes), the holes clockwise
+    areas = sorted(Nesting.Ring_Area(ring) for ring in RibModel.Rib_Rings(Slotted_Rib()))
+    assert areas[-1] == 100 * 40 - 80 * 10 - 2 * 3 * 10
+    assert sorted(areas[:-1]) == [-32, -25, -25]
+
+
+def test_scad_object_outline():
+    # the same rib as SolidPython object - evaluated without mirroring the slabs
+    rib = difference()(
+        translate([-50, 0])(square([100, 40])),
+        union()(translate([-40, 0])(square([80, 10])),
+                translate([20, 30])(square([3, 10])), translate([-23, 30])(square([3, 10])),
+                translate([10, 20])(square(5)), translate([-15, 20])(square(5)),
+                translate([-4, 28])(square([8, 4]))))
+    rings = Native2D.Object_To_Rings(rib)
+    assert len(rings) == 1 + slotted_holes
+    assert abs(Nesting.Part_Area(rings) - slotted_area) < 1e-9
+    assert sum(Nesting.Ring_Area(ring) > 0 for ring in rings) == 1
+
+
+def test_expression_operations():
+    # union of two overlapping squares, their intersection and a square cutting the other in two
+    shapes = [[[(0, 0), (10, 0), (10, 10), (0, 10)]], [[(5, 5), (15, 5), (15, 15), (5, 15)]],
+              [[(4, -1), (6, -1), (6, 11), (4, 11)]]]
+    union_rings = Native2D.Evaluate_Expression(('union', [('shape', 0), ('shape', 1)]), shapes)
+    intersection_rings = Native2D.Evaluate_Expression(('intersection', [('shape', 0), ('shape', 1)]), shapes)
+    split_rings = Native2D.Evaluate_Expression(('difference', [('shape', 0), ('shape', 2)]), shapes)
+
+    assert len(union_rings) == 1 and Nesting.Part_Area(union_rings) == 175
+    assert len(intersection_rings) == 1 and Nesting.Part_Area(intersection_rings) == 25
+    assert len(split_rings) == 2 and [Nesting.Ring_Area(ring) for ring in split_rings] == [40, 40]
@@ -0,0 +1,54 @@
+"""
+Tests of the rib cache (see RibCache) - entries, eviction & the statistics of parallel runs
+
+python -m pytest test_RibCache.py
+
+Copyright (C) 2019 Thomas Minke - tom@der-pfusch.de
+
+License (similar and successors):
+Attribution-NonCommercial-ShareAlike 3.0 Unported (CC BY-NC-SA 3.0)
+https://creativecommons.org/licenses/by-nc-sa/3.0/
+
+"""
+
+import multiprocessing
+import os
+import RibCache
+
+runs = 25       # statistics updates of each process
+
+
+def Count_Runs(cache_path):
+    for _ in range(runs):
+        RibCache.Cache_Statistics(cache_path, hits=2, misses=1)
+
+
+def test_store_load_evict(tmp_path):
+    cache_path = str(tmp_path)
+    keys = [RibCache.Cache_Key({'rib': number}) for number in range(3)]
+    for number, key in enumerate(keys):
+        RibCache.Cache_Store(cache_path, key, {'rings': [[[0, 0], [number, 0], [0, 1]]]})
+        os.utime(RibCache.Cache_File(cache_path, key), (number, number))
+    RibCache.Cache_Statistics(cache_path, hits=1, misses=3)
+
+    assert RibCache.Cache_Load(cache_path, keys[1])['rings'][0][1] == [1, 0]
+    assert RibCache.Cache_Load(cache_path, RibCache.Cache_Key({'rib': 3})) is None
+
+    # keys[1] used recently --> keys[0] & keys[2] removed, the statistics kept
+    size = os.path.getsize(RibCache.Cache_File(cache_path, keys[1]))
+    assert RibCache.Cache_Evict(cache_path, size) == 2
+    assert RibCache.Cache_Load(cache_path, keys[1]) is not None
+    assert RibCache.Cache_Statistics(cache_path, 0, 0)['misses'] == 3
+
+
+def test_statistics_of_parallel_runs(tmp_path):
+    # no counts lost if processes update the statistics at the same time
+    cache_path = str(tmp_path)
+    processes = [multiprocessing.Process(target=Count_Runs, args=(cache_path,)) for _ in range(4)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+    statistics = RibCache.Cache_Statistics(cache_path, hits=0, misses=0, evictions=1)
+    assert statistics == {'hits': 4 * runs * 2, 'misses': 4 * runs, 'evictions': 1}
@@ -0,0 +1,57 @@
+"""
+Tests of the cutting order (see Toolpath) - every hole is cut before the outer contour around it
+
+python -m pytest test_Toolpath.py
+
+Copyright (C) 2019 Thomas Minke - tom@der-pfusch.de
+
+License (similar and successors):
+Attribution-NonCommercial-ShareAlike 3.0 Unported (CC BY-NC-SA 3.0)
+https://creativecommons.org/licenses/by-nc-sa/3.0/
+
+"""
+
+import Nesting
+import Toolpath
+
+
+def Square(x, y, size, clockwise=False):
+    ring = [(x, y), (x + size, y), (x + size, y + size), (x, y + size)]
+    return ring[::-1] if clockwise else ring
+
+
+def Parts():
+    # a frame with two holes next to the origin, a part without holes and a far part with a hole - each
+    # outer contour closer to the machine position than its holes
+    return [[Square(0, 0, 100), Square(10, 10, 30, clockwise=True), Square(60, 60, 30, clockwise=True)],
+            [Square(110, 0, 20)],
+            [Square(150, 0, 60), Square(170, 20, 20, clockwise=True)]]
+
+
+def Outer_Contour(ring, parts):
+    # outer ring of the part the (ordered) ring belongs to
+    for rings in parts:
+        for contour in rings:
+            if sorted(contour) == sorted(ring):
+                return max(rings, key=Nesting.Ring_Area)
+
+
+def test_holes_before_outer_contour():
+    parts = Parts()
+    rings, summary = Toolpath.Order_Contours(parts, cut_speed=20, travel_speed=200, pierce_time=0.5)
+    assert summary['contours'] == len(rings) == 6
+
+    cut = []
+    for ring in rings:
+        if Nesting.Ring_Area(ring) < 0:
+            assert sorted(Outer_Contour(ring, parts)) not in cut
+        cut.append(sorted(ring))
+
+
+def test_order_keeps_the_rings():
+    # the same rings in the same direction (just starting at another point), the travel not longer
+    parts = Parts()
+    rings, summary = Toolpath.Order_Contours(parts, cut_speed=20, travel_speed=200, pierce_time=0.5)
+    given = sorted((sorted(ring), Nesting.Ring_Area(ring)) for rings in parts for ring in rings)
+    assert sorted((sorted(ring), Nesting.Ring_Area(ring)) for ring in rings) == given
+    assert summary['travel_length'] <= summary['travel_unordered']